@@ -23,6 +23,10 @@ from app.models.user import User
 from app.models.enrichment import PropertyData
 from app.models.vision import VisionScan
 from app.models.seo import SEOJob
+from app.models.settings import ClientSettings
+from app.models.scoring import RescoreJob
+from app.models.analytics import LeadDailyStats
+from app.models.pipeline import Pipeline, PipelineStage, LeadStageTransition, PipelineStageStats, PipelineStageDuration
 
 target_metadata = Base.metadata
 
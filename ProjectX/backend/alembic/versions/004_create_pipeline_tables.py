@@ -1,7 +1,7 @@
 """create pipeline tables
 
 Revision ID: 004_create_pipeline_tables
-Revises: 003_create_phase3_tables
+Revises: 003
 Create Date: 2026-01-12 14:00:00.000000
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '004_create_pipeline_tables'
-down_revision = '003_create_phase3_tables'
+down_revision = '003'
 branch_labels = None
 depends_on = None
 
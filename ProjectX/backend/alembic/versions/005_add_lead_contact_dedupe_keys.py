@@ -0,0 +1,70 @@
+"""add lead contact dedupe keys
+
+Revision ID: 005_add_lead_contact_dedupe_keys
+Revises: 004_create_pipeline_tables
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_lead_contact_dedupe_keys'
+down_revision = '004_create_pipeline_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Normalized contact columns
+    op.add_column('leads', sa.Column('email_normalized', sa.String(), nullable=True))
+    op.add_column('leads', sa.Column('phone_e164', sa.String(), nullable=True))
+
+    # 2. Backfill (mirrors app.core.normalize)
+    op.execute("""
+        UPDATE leads SET
+            email_normalized = NULLIF(lower(trim(email)), ''),
+            phone_e164 = CASE
+                WHEN trim(phone) LIKE '+%'
+                     AND length(regexp_replace(phone, '\\D', '', 'g')) BETWEEN 8 AND 15
+                     AND regexp_replace(phone, '\\D', '', 'g') !~ '^1([01]\\d{9}|\\d{3}[01]\\d{6})$'
+                    THEN '+' || regexp_replace(phone, '\\D', '', 'g')
+                WHEN trim(phone) NOT LIKE '+%'
+                     AND regexp_replace(phone, '\\D', '', 'g') ~ '^1?[2-9]\\d\\d[2-9]\\d{6}$'
+                    THEN '+1' || right(regexp_replace(phone, '\\D', '', 'g'), 10)
+            END
+    """)
+
+    # 3. Existing duplicates keep their rows, but only the oldest one per org owns the key
+    op.execute("""
+        UPDATE leads l SET email_normalized = NULL
+        FROM leads k
+        WHERE k.organization_id = l.organization_id
+          AND k.email_normalized = l.email_normalized
+          AND k.id < l.id
+    """)
+    op.execute("""
+        UPDATE leads l SET phone_e164 = NULL
+        FROM leads k
+        WHERE k.organization_id = l.organization_id
+          AND k.phone_e164 = l.phone_e164
+          AND k.id < l.id
+    """)
+
+    # 4. Per-organization unique indexes
+    op.create_index(
+        'uq_leads_org_email_normalized', 'leads', ['organization_id', 'email_normalized'],
+        unique=True, postgresql_where=sa.text('email_normalized IS NOT NULL'),
+    )
+    op.create_index(
+        'uq_leads_org_phone_e164', 'leads', ['organization_id', 'phone_e164'],
+        unique=True, postgresql_where=sa.text('phone_e164 IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_leads_org_phone_e164', table_name='leads')
+    op.drop_index('uq_leads_org_email_normalized', table_name='leads')
+    op.drop_column('leads', 'phone_e164')
+    op.drop_column('leads', 'email_normalized')
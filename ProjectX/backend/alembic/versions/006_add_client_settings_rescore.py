@@ -0,0 +1,69 @@
+"""add client settings and rescore jobs
+
+Revision ID: 006_add_client_settings_rescore
+Revises: 005_add_lead_contact_dedupe_keys
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_client_settings_rescore'
+down_revision = '005_add_lead_contact_dedupe_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'client_settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('business_bio', sa.Text(), nullable=True),
+        sa.Column('voice_clone_id', sa.String(), nullable=True),
+        sa.Column('active_zip_codes', sa.JSON(), nullable=True),
+        sa.Column('min_lead_score', sa.Integer(), nullable=True),
+        sa.Column('target_roas', sa.Float(), nullable=True),
+        sa.Column('alert_settings', sa.JSON(), nullable=True),
+        sa.Column('lead_score_weights', sa.JSON(), nullable=True),
+        sa.Column('scoring_version', sa.Integer(), server_default='1', nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('organization_id')
+    )
+    op.create_index(op.f('ix_client_settings_id'), 'client_settings', ['id'], unique=False)
+
+    op.create_table(
+        'rescore_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('scoring_version', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('last_lead_id', sa.Integer(), nullable=False),
+        sa.Column('scanned', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_rescore_jobs_id'), 'rescore_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_rescore_jobs_organization_id'), 'rescore_jobs', ['organization_id'], unique=False)
+    op.create_index(op.f('ix_rescore_jobs_status'), 'rescore_jobs', ['status'], unique=False)
+
+    # The rescorer walks one org's scored leads in id order
+    op.create_index('ix_leads_org_id', 'leads', ['organization_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_org_id', table_name='leads')
+    op.drop_index(op.f('ix_rescore_jobs_status'), table_name='rescore_jobs')
+    op.drop_index(op.f('ix_rescore_jobs_organization_id'), table_name='rescore_jobs')
+    op.drop_index(op.f('ix_rescore_jobs_id'), table_name='rescore_jobs')
+    op.drop_table('rescore_jobs')
+    op.drop_index(op.f('ix_client_settings_id'), table_name='client_settings')
+    op.drop_table('client_settings')
@@ -0,0 +1,24 @@
+"""add client scoring rules
+
+Revision ID: 007_add_client_scoring_rules
+Revises: 006_add_client_settings_rescore
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_client_scoring_rules'
+down_revision = '006_add_client_settings_rescore'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('client_settings', sa.Column('scoring_rules', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('client_settings', 'scoring_rules')
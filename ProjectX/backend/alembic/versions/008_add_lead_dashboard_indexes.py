@@ -0,0 +1,26 @@
+"""add lead dashboard indexes
+
+Revision ID: 008_add_lead_dashboard_indexes
+Revises: 007_add_client_scoring_rules
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_lead_dashboard_indexes'
+down_revision = '007_add_client_scoring_rules'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_leads_org_status_score', 'leads', ['organization_id', 'status', 'lead_score'], unique=False)
+    op.create_index('ix_leads_org_created_at', 'leads', ['organization_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_org_created_at', table_name='leads')
+    op.drop_index('ix_leads_org_status_score', table_name='leads')
@@ -0,0 +1,34 @@
+"""add lead daily stats rollup
+
+Revision ID: 009_add_lead_daily_stats
+Revises: 008_add_lead_dashboard_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_lead_daily_stats'
+down_revision = '008_add_lead_dashboard_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by `python -m scripts.backfill_lead_daily_stats` after deploy
+    op.create_table(
+        'lead_daily_stats',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('leads', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'day', 'status', 'source')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('lead_daily_stats')
@@ -0,0 +1,86 @@
+"""add pipeline stage transitions and counters
+
+Revision ID: 010_add_pipeline_stage_tracking
+Revises: 009_add_lead_daily_stats
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_pipeline_stage_tracking'
+down_revision = '009_add_lead_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('leads', sa.Column('stage_entered_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'lead_stage_transitions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('lead_id', sa.Integer(), nullable=False),
+        sa.Column('pipeline_id', sa.Integer(), nullable=False),
+        sa.Column('from_stage_id', sa.Integer(), nullable=True),
+        sa.Column('to_stage_id', sa.Integer(), nullable=False),
+        sa.Column('seconds_in_stage', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ),
+        sa.ForeignKeyConstraint(['pipeline_id'], ['pipelines.id'], ),
+        sa.ForeignKeyConstraint(['from_stage_id'], ['pipeline_stages.id'], ),
+        sa.ForeignKeyConstraint(['to_stage_id'], ['pipeline_stages.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lead_stage_transitions_id'), 'lead_stage_transitions', ['id'], unique=False)
+    op.create_index('ix_lead_stage_transitions_lead_id', 'lead_stage_transitions', ['lead_id', 'id'], unique=False)
+    op.create_index('ix_lead_stage_transitions_pipeline_id', 'lead_stage_transitions', ['pipeline_id', 'created_at'], unique=False)
+
+    op.create_table(
+        'pipeline_stage_stats',
+        sa.Column('stage_id', sa.Integer(), nullable=False),
+        sa.Column('pipeline_id', sa.Integer(), nullable=False),
+        sa.Column('entered', sa.Integer(), nullable=False),
+        sa.Column('exited', sa.Integer(), nullable=False),
+        sa.Column('seconds_in_stage_sum', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['stage_id'], ['pipeline_stages.id'], ),
+        sa.ForeignKeyConstraint(['pipeline_id'], ['pipelines.id'], ),
+        sa.PrimaryKeyConstraint('stage_id')
+    )
+    op.create_index(op.f('ix_pipeline_stage_stats_pipeline_id'), 'pipeline_stage_stats', ['pipeline_id'], unique=False)
+
+    op.create_table(
+        'pipeline_stage_durations',
+        sa.Column('stage_id', sa.Integer(), nullable=False),
+        sa.Column('le', sa.Float(), nullable=False),
+        sa.Column('pipeline_id', sa.Integer(), nullable=False),
+        sa.Column('leads', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['stage_id'], ['pipeline_stages.id'], ),
+        sa.ForeignKeyConstraint(['pipeline_id'], ['pipelines.id'], ),
+        sa.PrimaryKeyConstraint('stage_id', 'le')
+    )
+    op.create_index(op.f('ix_pipeline_stage_durations_pipeline_id'), 'pipeline_stage_durations', ['pipeline_id'], unique=False)
+
+    # Leads already sitting in a stage count as having entered it (entry time unknown)
+    op.execute(
+        "INSERT INTO pipeline_stage_stats (stage_id, pipeline_id, entered, exited, seconds_in_stage_sum) "
+        "SELECT leads.stage_id, pipeline_stages.pipeline_id, count(*), 0, 0 FROM leads "
+        "JOIN pipeline_stages ON pipeline_stages.id = leads.stage_id "
+        "GROUP BY leads.stage_id, pipeline_stages.pipeline_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pipeline_stage_durations_pipeline_id'), table_name='pipeline_stage_durations')
+    op.drop_table('pipeline_stage_durations')
+    op.drop_index(op.f('ix_pipeline_stage_stats_pipeline_id'), table_name='pipeline_stage_stats')
+    op.drop_table('pipeline_stage_stats')
+    op.drop_index('ix_lead_stage_transitions_pipeline_id', table_name='lead_stage_transitions')
+    op.drop_index('ix_lead_stage_transitions_lead_id', table_name='lead_stage_transitions')
+    op.drop_index(op.f('ix_lead_stage_transitions_id'), table_name='lead_stage_transitions')
+    op.drop_table('lead_stage_transitions')
+    op.drop_column('leads', 'stage_entered_at')
@@ -0,0 +1,28 @@
+"""add lead stage board index
+
+Revision ID: 011_add_lead_stage_board_index
+Revises: 010_add_pipeline_stage_tracking
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_add_lead_stage_board_index'
+down_revision = '010_add_pipeline_stage_tracking'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Board columns: per stage, by score then recency (scanned backwards)
+    op.create_index(
+        'ix_leads_stage_board', 'leads',
+        ['stage_id', sa.text('coalesce(lead_score, 0)'), 'created_at', 'id'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_stage_board', table_name='leads')
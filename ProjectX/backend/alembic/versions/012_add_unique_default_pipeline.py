@@ -0,0 +1,32 @@
+"""add unique default pipeline per organization
+
+Revision ID: 012_add_unique_default_pipeline
+Revises: 011_add_lead_stage_board_index
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_add_unique_default_pipeline'
+down_revision = '011_add_lead_stage_board_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent bootstraps may already have created several defaults; keep the oldest
+    op.execute(
+        "UPDATE pipelines SET is_default = false WHERE is_default AND id NOT IN "
+        "(SELECT min(id) FROM pipelines WHERE is_default GROUP BY organization_id)"
+    )
+    op.create_index(
+        'uq_pipelines_org_default', 'pipelines', ['organization_id'], unique=True,
+        postgresql_where=sa.text('is_default IS true'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_pipelines_org_default', table_name='pipelines')
@@ -0,0 +1,45 @@
+"""add lead listing indexes
+
+Revision ID: 013_add_lead_listing_indexes
+Revises: 012_add_unique_default_pipeline
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_add_lead_listing_indexes'
+down_revision = '012_add_unique_default_pipeline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset listing: (organization_id, created_at, id) ranges, with the filter
+    # columns carried in the index so a page of ids needs no heap access.
+    # The covering index is built CONCURRENTLY next to the current one, which
+    # keeps serving the dashboard until the swap; no step blocks lead writes.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_org_created_at_covering ON leads "
+            "(organization_id, created_at, id) INCLUDE (status, lead_score, zip_code, source)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_leads_org_created_at")
+        op.execute("ALTER INDEX ix_leads_org_created_at_covering RENAME TO ix_leads_org_created_at")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_org_status_created_at ON leads "
+            "(organization_id, status, created_at, id) INCLUDE (lead_score)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_leads_org_status_created_at")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_org_created_at_plain ON leads "
+            "(organization_id, created_at, id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_leads_org_created_at")
+        op.execute("ALTER INDEX ix_leads_org_created_at_plain RENAME TO ix_leads_org_created_at")
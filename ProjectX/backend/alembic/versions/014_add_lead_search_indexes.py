@@ -0,0 +1,44 @@
+"""add lead search indexes
+
+Revision ID: 014_add_lead_search_indexes
+Revises: 013_add_lead_listing_indexes
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_add_lead_search_indexes'
+down_revision = '013_add_lead_listing_indexes'
+branch_labels = None
+depends_on = None
+
+# Must match app.models.lead.search_document(first_name, last_name, email, address)
+SEARCH_DOCUMENT = (
+    "lower((((((coalesce(first_name, '') || ' ') || coalesce(last_name, '')) || ' ') "
+    "|| coalesce(email, '')) || ' ') || coalesce(address, ''))"
+)
+
+
+def upgrade() -> None:
+    # Both are trusted extensions: the database owner can create them
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin") # organization_id inside the GIN indexes
+
+    # GIN builds over the whole table take a while; don't block lead writes meanwhile
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_search_trgm ON leads "
+            f"USING gin (organization_id, {SEARCH_DOCUMENT} gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_search_tsv ON leads "
+            f"USING gin (organization_id, to_tsvector('simple', {SEARCH_DOCUMENT}))"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_search_tsv', table_name='leads')
+    op.drop_index('ix_leads_search_trgm', table_name='leads')
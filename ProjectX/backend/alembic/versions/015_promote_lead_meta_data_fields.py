@@ -0,0 +1,116 @@
+"""promote lead meta_data fields
+
+Revision ID: 015_promote_lead_meta_fields
+Revises: 014_add_lead_search_indexes
+Create Date: 2026-10-18 22:00:00.000000
+
+Moves priority_tag, ai_dossier, sales_cheat_sheet and last_call_sid out of
+leads.meta_data into typed columns and turns meta_data into JSONB, without
+holding a table lock for the length of the backfill:
+
+1. The new columns are added (no default, so no table rewrite), together with
+   a trigger that fills them, and a JSONB copy of meta_data, on every write.
+2. Rows are touched in id batches, one short transaction each, so the trigger
+   backfills them while the app keeps writing.
+3. One short transaction swaps the JSONB copy in for meta_data.
+4. The indexes are built CONCURRENTLY.
+
+Drain workers still running the previous release before step 3: once the
+trigger is gone, their meta_data writes are no longer promoted.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_promote_lead_meta_fields'
+down_revision = '014_add_lead_search_indexes'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+PROMOTED_KEYS = ("priority_tag", "ai_dossier", "sales_cheat_sheet", "last_call_sid")
+
+
+def _promote_key(key: str, get: str) -> str:
+    """
+    Trigger step for one promoted key. The meta_data value only wins when this
+    write set it (an insert, or an update that changed the key: the previous
+    release); otherwise the column keeps what the statement wrote. Rows not yet
+    converted (the backfill) take the meta_data value unless the column is set.
+    """
+    value = f"NEW.meta_data::jsonb {get} '{key}'"
+    return f"""
+            IF TG_OP = 'INSERT' OR {value} IS DISTINCT FROM OLD.meta_data::jsonb {get} '{key}' THEN
+                NEW.{key} := coalesce({value}, NEW.{key});
+            ELSIF OLD.meta_data_jsonb IS NULL THEN
+                NEW.{key} := coalesce(NEW.{key}, {value});
+            END IF;"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE leads ADD COLUMN IF NOT EXISTS priority_tag varchar")
+    op.execute("ALTER TABLE leads ADD COLUMN IF NOT EXISTS ai_dossier text")
+    op.execute("ALTER TABLE leads ADD COLUMN IF NOT EXISTS sales_cheat_sheet jsonb")
+    op.execute("ALTER TABLE leads ADD COLUMN IF NOT EXISTS last_call_sid varchar")
+    op.execute("ALTER TABLE leads ADD COLUMN IF NOT EXISTS meta_data_jsonb jsonb")
+    stripped = " - ".join(["coalesce(NEW.meta_data::jsonb, '{}'::jsonb)"] + [f"'{key}'" for key in PROMOTED_KEYS])
+    promote = "".join(_promote_key(key, "->" if key == "sales_cheat_sheet" else "->>") for key in PROMOTED_KEYS)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION leads_promote_meta_data() RETURNS trigger AS $$
+        BEGIN{promote}
+            NEW.meta_data_jsonb := {stripped};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS leads_promote_meta_data ON leads")
+    op.execute(
+        "CREATE TRIGGER leads_promote_meta_data BEFORE INSERT OR UPDATE ON leads "
+        "FOR EACH ROW EXECUTE FUNCTION leads_promote_meta_data()"
+    )
+
+    # The trigger is committed on entry, so rows written from here on are already converted
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM leads")).scalar()
+        for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE leads SET meta_data = meta_data "
+                    "WHERE id > :start AND id <= :end AND meta_data_jsonb IS NULL"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+    # Catalog-only changes; wait briefly for the lock rather than queueing writes behind it
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("DROP TRIGGER leads_promote_meta_data ON leads")
+    op.execute("DROP FUNCTION leads_promote_meta_data()")
+    op.execute("ALTER TABLE leads DROP COLUMN meta_data")
+    op.execute("ALTER TABLE leads RENAME COLUMN meta_data_jsonb TO meta_data")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_org_priority_created_at ON leads "
+            "(organization_id, priority_tag, created_at, id) INCLUDE (status, lead_score)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_meta_data ON leads "
+            "USING gin (meta_data jsonb_path_ops)"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_meta_data', table_name='leads')
+    op.drop_index('ix_leads_org_priority_created_at', table_name='leads')
+    op.execute(
+        "ALTER TABLE leads ALTER COLUMN meta_data TYPE json USING (coalesce(meta_data, '{}'::jsonb) || "
+        "jsonb_strip_nulls(jsonb_build_object("
+        "'priority_tag', priority_tag, 'ai_dossier', ai_dossier, "
+        "'sales_cheat_sheet', sales_cheat_sheet, 'last_call_sid', last_call_sid)))::json"
+    )
+    op.drop_column('leads', 'last_call_sid')
+    op.drop_column('leads', 'sales_cheat_sheet')
+    op.drop_column('leads', 'ai_dossier')
+    op.drop_column('leads', 'priority_tag')
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""add user token version
+
+Revision ID: 016_add_user_token_version
+Revises: 015_promote_lead_meta_fields
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_add_user_token_version'
+down_revision = '015_promote_lead_meta_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,38 @@
+"""hash organization api keys
+
+Revision ID: 017_hash_org_api_keys
+Revises: 016_add_user_token_version
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017_hash_org_api_keys'
+down_revision = '016_add_user_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('organizations', sa.Column('api_key_hash', sa.String(), nullable=True))
+    op.add_column('organizations', sa.Column('api_key_prefix', sa.String(), nullable=True))
+    # Existing keys keep working: same SHA-256 as app.services.api_key_service.hash_api_key.
+    # No prefix for them, as older keys may be short enough for a prefix to give them away.
+    op.execute("UPDATE organizations SET api_key_hash = encode(sha256(convert_to(api_key, 'UTF8')), 'hex')")
+    op.create_index(op.f('ix_organizations_api_key_hash'), 'organizations', ['api_key_hash'], unique=True)
+    op.drop_index(op.f('ix_organizations_api_key'), table_name='organizations')
+    op.drop_column('organizations', 'api_key')
+
+
+def downgrade() -> None:
+    # Plaintext keys cannot be recovered: every org gets a placeholder and must rotate its key
+    op.add_column('organizations', sa.Column('api_key', sa.String(), nullable=True))
+    op.execute("UPDATE organizations SET api_key = 'revoked_' || id")
+    op.alter_column('organizations', 'api_key', nullable=False)
+    op.create_index(op.f('ix_organizations_api_key'), 'organizations', ['api_key'], unique=True)
+    op.drop_index(op.f('ix_organizations_api_key_hash'), table_name='organizations')
+    op.drop_column('organizations', 'api_key_prefix')
+    op.drop_column('organizations', 'api_key_hash')
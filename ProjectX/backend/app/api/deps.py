@@ -1,37 +1,83 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Security, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.core.config import settings
 from app.core import security
-from app.models.user import User
+from app.services.api_key_service import organization_for_api_key
+from app.services.user_service import CurrentUser, cached_user
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    org: Optional[int] = None
+    act: bool = False
+    tv: Optional[int] = None # Tokens issued before token versions have none
 
 def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(reusable_oauth2)
-) -> User:
+) -> CurrentUser:
+    """
+    Authenticate from the token's claims and the cached user: usually no
+    database round-trip. Tokens of a deactivated user, or issued before its
+    token version was bumped, are rejected.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Could not validate credentials",
+    )
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-    except (JWTError, ValueError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
+        user_id = int(token_data.sub)
+    except (JWTError, ValueError, TypeError):
+        raise credentials_exception
+    if token_data.tv is None:
+        raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    user = cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active or not token_data.act:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    if user.token_version != token_data.tv or user.organization_id != token_data.org:
+        raise credentials_exception
     return user
+
+def get_api_key_organization(
+    db: Session = Depends(get_db),
+    api_key: Optional[str] = Security(api_key_header),
+) -> Optional[int]:
+    """
+    Organization id of the request's X-API-Key (machine clients), None when
+    no key is sent. Resolved from the in-memory key index.
+    """
+    if not api_key:
+        return None
+    organization_id = organization_for_api_key(db, api_key)
+    if organization_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+    return organization_id
+
+def require_api_key_organization(
+    organization_id: Optional[int] = Depends(get_api_key_organization),
+) -> int:
+    if organization_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing X-API-Key header",
+        )
+    return organization_id
@@ -1,3 +1,4 @@
+from fastapi import APIRouter
 from app.api.v1.endpoints import leads, marketing, analytics, compliance, auth, vision, agent, settings, pipeline
 
 api_router = APIRouter()
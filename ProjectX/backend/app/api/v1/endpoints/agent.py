@@ -4,7 +4,6 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.api import deps
-from app.models.user import User
 from app.services.spy_service import scrape_neighborhood_opportunities
 from app.services.agent_service import trigger_nurture_cycle
 
@@ -24,7 +23,7 @@ class Opportunity(BaseModel):
 @router.get("/spy/opportunities", response_model=List[Opportunity])
 def get_neighborhood_opportunities(
     zip_code: str = "90210",
-    current_user: User = Depends(deps.get_current_user)
+    current_user: deps.CurrentUser = Depends(deps.get_current_user)
 ):
     """
     Scrapes local social platforms for leads in a given ZIP code.
@@ -43,7 +42,7 @@ class AgentAction(BaseModel):
 @router.post("/agent/nurture/{lead_id}", response_model=AgentAction)
 def start_nurture_agent(
     lead_id: int,
-    current_user: User = Depends(deps.get_current_user)
+    current_user: deps.CurrentUser = Depends(deps.get_current_user)
 ):
     """
     Trigger the LangGraph autonomous agent to start nurturing a lead.
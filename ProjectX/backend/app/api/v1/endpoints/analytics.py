@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.services.analytics_service import get_dashboard_stats
+from app.services.lead_stats_service import TIMESERIES_DIMENSIONS, lead_timeseries
 from app.services.transcription_service import transcribe_call
-from typing import List, Any
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
 router = APIRouter()
 
+class RecentLead(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    status: Optional[str] = None
+    lead_score: Optional[int] = 0
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 # Simple schema for stats response
 class StatsResponse(BaseModel):
     revenue: int
@@ -15,23 +27,60 @@ class StatsResponse(BaseModel):
     qualified_leads: int
     conversion_rate: float
     pipeline_value: int
-    recent_leads: List[Any] # Using Any for simplicity with ORM objects in this demo
+    recent_leads: List[RecentLead]
 
     class Config:
         from_attributes = True
 
+TIMESERIES_MAX_DAYS = 366
+
+class TimeseriesPoint(BaseModel):
+    day: date
+    total: int
+    breakdown: Dict[str, int] # status (or source) -> leads created that day
+
+class TimeseriesResponse(BaseModel):
+    start: date
+    end: date
+    by: str
+    points: List[TimeseriesPoint]
+
 from app.api import deps
-from app.models.user import User
 
 @router.get("/stats", response_model=StatsResponse)
 def get_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: deps.CurrentUser = Depends(deps.get_current_user)
+):
+    """
+    Get aggregated dashboard statistics for the user's organization.
+    """
+    if current_user.organization_id is None:
+        raise HTTPException(status_code=400, detail="User is not linked to an organization")
+    return get_dashboard_stats(db, current_user.organization_id)
+
+@router.get("/timeseries", response_model=TimeseriesResponse)
+def get_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    by: str = Query("status", pattern=f"^({'|'.join(TIMESERIES_DIMENSIONS)})$"),
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user)
 ):
     """
-    Get aggregated dashboard statistics.
+    Leads created per day (UTC) for charts, split by current status or by source.
+    Defaults to the last 30 days; served from the daily rollup.
     """
-    return get_dashboard_stats(db)
+    if current_user.organization_id is None:
+        raise HTTPException(status_code=400, detail="User is not linked to an organization")
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {TIMESERIES_MAX_DAYS} days")
+    points = lead_timeseries(db, current_user.organization_id, start, end, by=by)
+    return {"start": start, "end": end, "by": by, "points": points}
 
 @router.get("/calls/{call_id}/transcript")
 def get_call_transcript(call_id: str):
@@ -1,11 +1,14 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.base import get_db
-from app.core import security
+from app.core import security, throttle
+from app.core.config import settings
 from app.models.user import User
 from app.api import deps
+from app.services.user_service import access_token_for, revoke_tokens
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter()
@@ -13,13 +16,13 @@ router = APIRouter()
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
-    full_name: str = None
+    full_name: Optional[str] = None
     organization_id: int = 1
 
 class UserResponse(BaseModel):
     id: int
     email: str
-    full_name: str = None
+    full_name: Optional[str] = None
     is_active: bool
     
     class Config:
@@ -29,67 +32,139 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+def _too_many_requests(retry_after: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+def _hasher_busy() -> HTTPException:
+    return _too_many_requests(1, "Too many logins in progress, retry shortly")
+
+async def _run_hasher(operation):
+    try:
+        return await operation
+    except security.PasswordHasherBusy:
+        raise _hasher_busy()
+
+def _find_user(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def _find_login_user(db: Session, username: str, ip_key: str, account_key: str) -> Optional[User]:
+    if settings.LOGIN_THROTTLE_ENABLED:
+        limit_ip = settings.LOGIN_IP_MAX_ATTEMPTS > 0
+        wait = max(
+            throttle.retry_after(ip_key, settings.LOGIN_IP_MAX_ATTEMPTS) if limit_ip else 0,
+            throttle.retry_after(account_key, settings.LOGIN_ACCOUNT_MAX_FAILURES),
+        )
+        if wait:
+            raise _too_many_requests(wait, "Too many login attempts, retry later")
+        if limit_ip:
+            throttle.count_attempt(ip_key, settings.LOGIN_THROTTLE_WINDOW_SECONDS)
+    user = _find_user(db, username)
+    db.close() # Hand the connection back before the slow password check; the user stays readable
+    return user
+
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(
+async def login_access_token(
+    request: Request,
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
+    Attempts are throttled per client IP (see TRUSTED_PROXY_IPS when behind a
+    load balancer) and failures per account (429 with Retry-After); bcrypt
+    runs in the password hasher's process pool.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if security.password_hasher.saturated:
+        raise _hasher_busy() # Shed load before touching Redis or the database
+    ip_key = f"login:ip:{throttle.client_ip(request)}"
+    account_key = f"login:account:{form_data.username.strip().lower()}"
+    user = await run_in_threadpool(_find_login_user, db, form_data.username, ip_key, account_key)
+    if not user or not await _run_hasher(security.password_hasher.verify(form_data.password, user.hashed_password)):
+        if settings.LOGIN_THROTTLE_ENABLED:
+            await run_in_threadpool(throttle.count_attempt, account_key, settings.LOGIN_THROTTLE_WINDOW_SECONDS)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-        
-    access_token = security.create_access_token(subject=user.id)
+    
+    if settings.LOGIN_THROTTLE_ENABLED:
+        await run_in_threadpool(throttle.clear_attempts, account_key)
+    access_token = access_token_for(user)
     return {
         "access_token": access_token,
         "token_type": "bearer",
     }
 
+def _create_user(db: Session, user_in: UserCreate, hashed_password: str) -> User:
+    user = User(
+        email=user_in.email,
+        hashed_password=hashed_password,
+        full_name=user_in.full_name,
+        organization_id=user_in.organization_id
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("/signup", response_model=UserResponse)
-def signup(
+async def signup(
     user_in: UserCreate,
     db: Session = Depends(get_db)
 ) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(_find_user, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system",
         )
-        
-    user = User(
-        email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
-        full_name=user_in.full_name,
-        organization_id=user_in.organization_id
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    
+    hashed_password = await _run_hasher(security.password_hasher.hash(user_in.password))
+    return await run_in_threadpool(_create_user, db, user_in, hashed_password)
 
 @router.get("/me", response_model=UserResponse)
 def read_users_me(
-    current_user: User = Depends(deps.get_current_user),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user.
     """
     return current_user
 
+@router.post("/logout-all", status_code=204)
+def logout_all(
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+) -> None:
+    """
+    Revoke every access token issued to the current user, this one included.
+    """
+    revoke_tokens(db, current_user.id)
+
+@router.post("/users/{user_id}/deactivate", response_model=UserResponse)
+def deactivate_user(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Deactivate a user and revoke their tokens (superusers only).
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    user = revoke_tokens(db, user_id, deactivate=True)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
 @router.get("/users", response_model=list[UserResponse])
 def read_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
 ) -> Any:
     """
     Retrieve users.
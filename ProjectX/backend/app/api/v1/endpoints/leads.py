@@ -1,24 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.base import get_db
+from app.api import deps
+from app.core.config import settings
+from app.core.locks import claim_once
+from app.core.metrics import get_timeline, record_stage
+from app.core.normalize import normalize_email, normalize_phone
 from app.models.lead import Lead
-from app.schemas.lead import LeadCreate, LeadResponse, OTPVerify
+from app.schemas.lead import (
+    LeadCreate, LeadResponse, OTPVerify, LeadBatchCreate, LeadBatchResponse, LeadImportResult,
+    LeadBufferedAccepted, LeadBufferedStatus, LeadBufferStats, LeadTimeline, LeadPage,
+    LeadSearchResponse,
+)
+from app.services.ingest_service import bulk_insert_leads, queue_enrichment
+from app.services.lead_list_service import list_leads
+from app.services.lead_search_service import search_leads
+from app.services.import_service import import_leads_stream
+from app.services.ingest_buffer import LeadIngestBuffer
+from app.services.dedupe_service import contact_index, find_conflicting_lead, find_duplicate_lead, merge_lead
 
 router = APIRouter()
 
+@router.get("/", response_model=LeadPage)
+def read_leads(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[List[str]] = Query(None),
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    zip_code: Optional[str] = None,
+    source: Optional[str] = None,
+    priority_tag: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+):
+    """
+    List the organization's leads, newest first, with cursor pagination.
+    `status` may be repeated; pass `next_cursor` back as `cursor` for the next page.
+    """
+    if current_user.organization_id is None:
+        raise HTTPException(status_code=400, detail="User is not linked to an organization")
+    try:
+        items, next_cursor = list_leads(
+            db, current_user.organization_id, limit, cursor,
+            statuses=status, min_score=min_score, max_score=max_score, zip_code=zip_code, source=source,
+            priority_tag=priority_tag,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/search", response_model=LeadSearchResponse)
+def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+):
+    """
+    Typeahead search of the organization's leads by partial name, email or street.
+    Tolerates typos; best matches first. Two-character queries match word prefixes only.
+    """
+    if current_user.organization_id is None:
+        raise HTTPException(status_code=400, detail="User is not linked to an organization")
+    return {"query": q, "items": search_leads(db, current_user.organization_id, q, limit)}
+
+def _scope_to_organization(leads_in: List[LeadCreate], organization_id: Optional[int]):
+    # An API key decides the org; the organization_id in the body is then ignored.
+    # Without a key leads go to the public web form's org, and naming one is refused
+    if organization_id is None:
+        if any("organization_id" in lead_in.model_fields_set for lead_in in leads_in):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Send X-API-Key to ingest leads for an organization",
+            )
+        organization_id = settings.PUBLIC_FORM_ORGANIZATION_ID
+    for lead_in in leads_in:
+        lead_in.organization_id = organization_id
+
 @router.post("/ingest", response_model=LeadResponse)
-def ingest_lead(lead_in: LeadCreate, db: Session = Depends(get_db)):
+def ingest_lead(
+    lead_in: LeadCreate,
+    db: Session = Depends(get_db),
+    api_key_organization_id: Optional[int] = Depends(deps.get_api_key_organization),
+):
     """
-    Ingest a new lead.
-    1. Normalize data (TODO)
+    Ingest a new lead. The public web form posts without credentials (and
+    without organization_id); partner systems send X-API-Key, which
+    attributes the lead to the key's organization.
+    1. Normalize data (E.164 phone, canonical email)
     2. Check Geo-Fencing (Mock: All ZIPs valid)
-    3. Create Lead in DB (Pending)
+    3. Merge into an existing lead with the same contact, or create Lead in DB (Pending)
     4. Trigger SMS OTP (Mock: Always sends '123456')
     """
     
+    _scope_to_organization([lead_in], api_key_organization_id)
+
     # Mock Geo-Fencing
     # if lead_in.zip_code not in SERVICE_AREAS: ...
 
+    existing = find_duplicate_lead(
+        db, lead_in.organization_id, normalize_email(lead_in.email), normalize_phone(lead_in.phone)
+    )
+    if existing:
+        return _merge_duplicate(db, existing, lead_in)
+
     new_lead = Lead(
         organization_id=lead_in.organization_id,
         first_name=lead_in.first_name,
@@ -34,15 +122,144 @@ def ingest_lead(lead_in: LeadCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_lead)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request (possibly another process) created the same contact since our lookup
+        db.rollback()
+        existing = find_conflicting_lead(
+            db, lead_in.organization_id, normalize_email(lead_in.email), normalize_phone(lead_in.phone)
+        )
+        if not existing:
+            raise
+        return _merge_duplicate(db, existing, lead_in)
     db.refresh(new_lead)
+    contact_index.add(new_lead.organization_id, new_lead.email_normalized, new_lead.phone_e164)
     
     # Trigger Mock OTP (Log to console)
     print(f"DTO: Sending OTP to {new_lead.phone}: 123456")
     
     return new_lead
 
-from app.worker import process_lead_enrichment
+def _merge_duplicate(db: Session, existing: Lead, lead_in: LeadCreate) -> Lead:
+    """
+    Repeat submission from a known contact: fill in blanks on the existing
+    lead instead of creating a second one (and a second enrichment).
+    """
+    if merge_lead(existing, lead_in):
+        db.commit()
+        db.refresh(existing)
+    if existing.status == "pending":
+        # Still unverified, so they need a fresh code
+        print(f"DTO: Sending OTP to {existing.phone}: 123456")
+    return existing
+
+@router.post("/ingest/batch", response_model=LeadBatchResponse)
+def ingest_leads_batch(
+    batch_in: LeadBatchCreate,
+    db: Session = Depends(get_db),
+    organization_id: int = Depends(deps.require_api_key_organization),
+):
+    """
+    Bulk-ingest partner leads (X-API-Key required; every lead goes to the key's organization).
+    1. Insert every lead in one transaction (COPY on Postgres)
+    2. Return the lead ids in request order (known contacts resolve to the existing lead)
+    3. Queue enrichment as chunked Celery tasks (partner leads skip OTP)
+    """
+    _scope_to_organization(batch_in.leads, organization_id)
+    lead_status = "verified" if batch_in.enrich else "pending"
+    try:
+        result = bulk_insert_leads(db, batch_in.leads, status=lead_status, source=batch_in.source)
+        db.commit()
+    except IntegrityError:
+        # Another process created some of these contacts since this one's Bloom
+        # filter last saw them: retry, looking every contact up in the database
+        db.rollback()
+        result = bulk_insert_leads(
+            db, batch_in.leads, status=lead_status, source=batch_in.source, use_contact_index=False
+        )
+        db.commit()
+
+    # Duplicates resolve to existing leads, which never get enriched twice
+    enrichment_tasks = queue_enrichment(result.created_ids) if batch_in.enrich else 0
+
+    return {
+        "ids": result.lead_ids,
+        "count": len(result.lead_ids),
+        "duplicates": len(result.lead_ids) - len(result.created_ids),
+        "enrichment_tasks": enrichment_tasks
+    }
+
+@router.post("/ingest/buffered", response_model=LeadBufferedAccepted, status_code=status.HTTP_202_ACCEPTED)
+def ingest_lead_buffered(
+    lead_in: LeadCreate,
+    api_key_organization_id: Optional[int] = Depends(deps.get_api_key_organization),
+):
+    """
+    Write-behind ingest for traffic spikes (X-API-Key optional, as for /ingest).
+    The lead is appended to a Redis stream and acknowledged at once; the
+    `flush_lead_ingest_buffer` worker task writes it to Postgres in batches
+    and sends the OTP. Poll /ingest/buffered/{ingest_id} for the lead id.
+    """
+    _scope_to_organization([lead_in], api_key_organization_id)
+    ingest_id = LeadIngestBuffer().append(lead_in, source="web_form")
+    return {"ingest_id": ingest_id}
+
+@router.get("/ingest/buffered/stats", response_model=LeadBufferStats)
+def ingest_buffer_stats(current_user: deps.CurrentUser = Depends(deps.get_current_user)):
+    """
+    Lag metrics for the write-behind ingest buffer (signed-in users only).
+    """
+    return LeadIngestBuffer().stats()
+
+@router.get("/ingest/buffered/{ingest_id}", response_model=LeadBufferedStatus)
+def ingest_buffered_status(ingest_id: str):
+    """
+    Resolve a buffered ingest id to the stored lead.
+    """
+    buffer = LeadIngestBuffer()
+    lead_id = buffer.get_result(ingest_id)
+    if lead_id is not None:
+        return {"ingest_id": ingest_id, "status": "stored", "lead_id": lead_id}
+    if buffer.is_pending(ingest_id):
+        return {"ingest_id": ingest_id, "status": "accepted"}
+    return {"ingest_id": ingest_id, "status": "unknown"}
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+@router.post("/import", response_model=LeadImportResult)
+async def import_leads(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    source: str = "vendor_import",
+    enrich: bool = True,
+    db: Session = Depends(get_db),
+    organization_id: int = Depends(deps.require_api_key_organization),
+):
+    """
+    Stream a vendor file (CSV with a header row, or NDJSON) into the leads table
+    of the X-API-Key's organization.
+    The raw request body is parsed as it arrives and committed in chunks;
+    invalid rows are reported back without rolling back the rest.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_CONTENT_TYPES.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+        )
+
+    return await import_leads_stream(
+        db, request.stream(), format, source=source, enrich=enrich, organization_id=organization_id
+    )
+
+from app.worker import start_lead_processing
 
 @router.post("/verify", response_model=LeadResponse)
 def verify_lead(otp_in: OTPVerify, db: Session = Depends(get_db)):
@@ -56,12 +273,29 @@ def verify_lead(otp_in: OTPVerify, db: Session = Depends(get_db)):
         
     if otp_in.otp_code != "123456":
         raise HTTPException(status_code=400, detail="Invalid OTP code")
+    
+    if lead.status != "pending":
+        # Already verified (e.g. a merged duplicate): enrichment is done or queued
+        return lead
         
     lead.status = "verified"
     db.commit()
     db.refresh(lead)
+    record_stage(lead.id, "verified")
     
-    # Trigger Async Enrichment
-    process_lead_enrichment.delay(lead.id)
+    # Trigger Async Enrichment (once, even if concurrent retries both got here)
+    if claim_once(f"lead:{lead.id}:pipeline", settings.LEAD_IDEMPOTENCY_TTL_SECONDS):
+        start_lead_processing(lead.id)
     
     return lead
+
+@router.get("/{lead_id}/timeline", response_model=LeadTimeline)
+def get_lead_timeline(lead_id: int):
+    """
+    Speed-to-Lead stage timestamps for one lead (verify -> enrich -> score -> call).
+    """
+    stages = get_timeline(lead_id)
+    if not stages:
+        raise HTTPException(status_code=404, detail="No timeline recorded for this lead")
+    total = stages["called"] - stages["verified"] if {"called", "verified"} <= stages.keys() else None
+    return {"lead_id": lead_id, "stages": stages, "verify_to_call_seconds": total}
@@ -1,10 +1,14 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.base import get_db
+from app.models.lead import Lead
 from app.models.pipeline import Pipeline, PipelineStage
 from app.schemas import pipeline as pipeline_schema
-from app.core.security import get_current_user
+from app.api.deps import get_current_user
+from app.services import pipeline_service
 
 router = APIRouter()
 
@@ -17,29 +21,10 @@ def read_pipelines(
 ):
     """
     Retrieve pipelines for the current user's organization.
+    If no pipelines exist, a default one is created.
     """
-    pipelines = db.query(Pipeline).filter(Pipeline.organization_id == current_user.organization_id).offset(skip).limit(limit).all()
-    # If no pipelines exist, create a default one
-    if not pipelines:
-        default_pipeline = Pipeline(name="Sales Pipeline", is_default=True, organization_id=current_user.organization_id)
-        db.add(default_pipeline)
-        db.commit()
-        db.refresh(default_pipeline)
-        
-        # Create default stages
-        default_stages = [
-            PipelineStage(pipeline_id=default_pipeline.id, name="Initial Contact", color="bg-blue-500", order=0),
-            PipelineStage(pipeline_id=default_pipeline.id, name="Offer Made", color="bg-yellow-500", order=1),
-            PipelineStage(pipeline_id=default_pipeline.id, name="Negotiation", color="bg-purple-500", order=2),
-            PipelineStage(pipeline_id=default_pipeline.id, name="Closed Won", color="bg-green-500", order=3, is_system_stage=True),
-            PipelineStage(pipeline_id=default_pipeline.id, name="Closed Lost", color="bg-red-500", order=4, is_system_stage=True),
-        ]
-        db.add_all(default_stages)
-        db.commit()
-        
-        pipelines = [default_pipeline]
-        
-    return pipelines
+    pipelines = pipeline_service.org_pipelines(db, current_user.organization_id)
+    return pipelines[skip:skip + limit]
 
 @router.post("/", response_model=pipeline_schema.Pipeline)
 def create_pipeline(
@@ -49,16 +34,27 @@ def create_pipeline(
     current_user: Any = Depends(get_current_user),
 ):
     """
-    Create new pipeline.
+    Create new pipeline. A new default pipeline replaces the current default.
     """
+    if pipeline_in.is_default:
+        db.execute(
+            update(Pipeline)
+            .where(Pipeline.organization_id == current_user.organization_id, Pipeline.is_default.is_(True))
+            .values(is_default=False)
+        )
     pipeline = Pipeline(
         name=pipeline_in.name,
         is_default=pipeline_in.is_default,
         organization_id=current_user.organization_id,
     )
     db.add(pipeline)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Another default pipeline was created concurrently")
     db.refresh(pipeline)
+    pipeline_service.invalidate_org_pipelines(current_user.organization_id)
     return pipeline
 
 @router.put("/stages/{stage_id}", response_model=pipeline_schema.PipelineStage)
@@ -71,23 +67,167 @@ def update_stage(
     """
     Update a pipeline stage.
     """
-    stage = db.query(PipelineStage).filter(PipelineStage.id == stage_id).first()
+    # Organization ownership via the pipeline is checked in the same statement
+    owned = (
+        PipelineStage.id == stage_id,
+        PipelineStage.pipeline_id == Pipeline.id,
+        Pipeline.organization_id == current_user.organization_id,
+    )
+    values = stage_in.model_dump(exclude_none=True)
+    if values:
+        stage = db.execute(
+            update(PipelineStage).where(*owned).values(**values).returning(PipelineStage)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+    else:
+        stage = db.query(PipelineStage).filter(*owned).first()
     if not stage:
         raise HTTPException(status_code=404, detail="Stage not found")
-    
-    # Verify organization ownership via pipeline
-    pipeline = db.query(Pipeline).filter(Pipeline.id == stage.pipeline_id).first()
-    if pipeline.organization_id != current_user.organization_id:
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-
-    if stage_in.name is not None:
-        stage.name = stage_in.name
-    if stage_in.color is not None:
-        stage.color = stage_in.color
-    if stage_in.order is not None:
-        stage.order = stage_in.order
 
-    db.add(stage)
     db.commit()
     db.refresh(stage)
+    pipeline_service.invalidate_org_pipelines(current_user.organization_id)
     return stage
+
+@router.put("/{pipeline_id}/stages/order", response_model=List[pipeline_schema.PipelineStage])
+def reorder_stages(
+    pipeline_id: int,
+    order_in: pipeline_schema.PipelineStageReorder,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Reorder a pipeline's stages in one statement; `stage_ids` is the new
+    order and must list every stage of the pipeline.
+    """
+    try:
+        updated = pipeline_service.reorder_stages(db, current_user.organization_id, pipeline_id, order_in.stage_ids)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if updated is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    db.commit()
+    pipeline_service.invalidate_org_pipelines(current_user.organization_id)
+    return (
+        db.query(PipelineStage)
+        .filter(PipelineStage.pipeline_id == pipeline_id)
+        .order_by(PipelineStage.order, PipelineStage.id)
+        .all()
+    )
+
+@router.post("/leads/move", response_model=pipeline_schema.LeadBulkMoveResult)
+def move_leads(
+    move_in: pipeline_schema.LeadBulkMove,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Move many leads to a stage in one statement (e.g. a multi-card drag on the board).
+    """
+    moves = pipeline_service.move_leads(db, current_user.organization_id, move_in.lead_ids, move_in.stage_id)
+    if moves is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Stage not found")
+    db.commit()
+    moved = [move.lead_id for move in moves]
+    moved_ids = set(moved)
+    return {
+        "stage_id": move_in.stage_id,
+        "moved": moved,
+        "unchanged": [lead_id for lead_id in dict.fromkeys(move_in.lead_ids) if lead_id not in moved_ids],
+    }
+
+@router.post("/leads/{lead_id}/move", response_model=pipeline_schema.LeadStageMove)
+def move_lead(
+    lead_id: int,
+    move_in: pipeline_schema.LeadStageMoveRequest,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Move a lead to a stage, logging the transition and updating the funnel counters.
+    """
+    stage = (
+        db.query(PipelineStage)
+        .join(Pipeline, Pipeline.id == PipelineStage.pipeline_id)
+        .filter(PipelineStage.id == move_in.stage_id, Pipeline.organization_id == current_user.organization_id)
+        .first()
+    )
+    if not stage:
+        raise HTTPException(status_code=404, detail="Stage not found")
+    lead = (
+        db.query(Lead)
+        .filter(Lead.id == lead_id, Lead.organization_id == current_user.organization_id)
+        .with_for_update()
+        .first()
+    )
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    move = pipeline_service.move_lead(db, lead, stage)
+    db.commit()
+    if move is None:
+        return {"lead_id": lead_id, "from_stage_id": stage.id, "to_stage_id": stage.id, "moved": False}
+    return {**move._asdict(), "moved": True}
+
+@router.get("/{pipeline_id}/funnel", response_model=pipeline_schema.PipelineFunnel)
+def read_funnel(
+    pipeline_id: int,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Per-stage counts, conversion rates and median time-in-stage for a pipeline.
+    """
+    pipeline = db.query(Pipeline).filter(
+        Pipeline.id == pipeline_id, Pipeline.organization_id == current_user.organization_id
+    ).first()
+    if not pipeline:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return {"pipeline_id": pipeline.id, "stages": pipeline_service.pipeline_funnel(db, pipeline)}
+
+@router.get("/{pipeline_id}/board", response_model=pipeline_schema.PipelineBoard)
+def read_board(
+    pipeline_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Kanban board: every stage with its lead count and top `limit` leads by score, then recency.
+    """
+    pipeline = db.query(Pipeline).filter(
+        Pipeline.id == pipeline_id, Pipeline.organization_id == current_user.organization_id
+    ).first()
+    if not pipeline:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return {"pipeline_id": pipeline.id, "columns": pipeline_service.pipeline_board(db, pipeline, limit)}
+
+@router.get("/stages/{stage_id}/leads", response_model=pipeline_schema.BoardColumnPage)
+def read_stage_leads(
+    stage_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Next page of one board column; pass the `next_cursor` from the board or the previous page.
+    """
+    stage = (
+        db.query(PipelineStage)
+        .join(Pipeline, Pipeline.id == PipelineStage.pipeline_id)
+        .filter(PipelineStage.id == stage_id, Pipeline.organization_id == current_user.organization_id)
+        .first()
+    )
+    if not stage:
+        raise HTTPException(status_code=404, detail="Stage not found")
+    try:
+        leads, next_cursor = pipeline_service.stage_leads_page(
+            db, stage, current_user.organization_id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"stage_id": stage.id, "leads": leads, "next_cursor": next_cursor}
@@ -1,11 +1,15 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.db.base import get_db
 from app.api import deps
-from app.models.user import User
-# from app.models.settings import ClientSettings # Need to make sure this is imported in base or here
+from app.models.settings import ClientSettings
+from app.models.scoring import RescoreJob
+from app.services.api_key_service import API_KEY_DISPLAY_CHARS, rotate_api_key
+from app.services.rescoring_service import get_client_settings, publish_scoring_version, resume_rescore, start_rescore
+from app.services.scoring_rules import validate_rules
+from app.services.scoring_service import validate_weights
 
 router = APIRouter()
 
@@ -15,58 +19,160 @@ class SettingsUpdate(BaseModel):
     voice_clone_id: str = None
     min_lead_score: int = None
     active_zip_codes: List[str] = None
+    target_roas: float = None
     alert_settings: dict = None
-    lead_score_weights: dict = None
+    lead_score_weights: Dict[str, float] = None
+    scoring_rules: Optional[dict] = None # Declarative rules; null goes back to the weighted defaults
 
 class ChatTestRequest(BaseModel):
     message: str
     business_bio: str  # We pass it explicitly or fetch from DB in real implementation
 
+SETTINGS_FIELDS = (
+    "business_bio", "voice_clone_id", "active_zip_codes", "min_lead_score",
+    "target_roas", "alert_settings", "lead_score_weights", "scoring_rules",
+)
+# Changing any of these changes every lead's score
+SCORING_FIELDS = ("min_lead_score", "lead_score_weights", "scoring_rules")
+
+def _org_id(current_user: deps.CurrentUser) -> int:
+    if current_user.organization_id is None:
+        raise HTTPException(status_code=400, detail="User is not linked to an organization")
+    return current_user.organization_id
+
+def _settings_dict(row: ClientSettings) -> dict:
+    data = {field: getattr(row, field) for field in SETTINGS_FIELDS}
+    data["scoring_version"] = row.scoring_version
+    return data
+
+def _job_dict(job: RescoreJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "scoring_version": job.scoring_version,
+        "scanned": job.scanned,
+        "updated": job.updated,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
 @router.get("/", response_model=dict)
 def get_settings(
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Get client settings. (Mocked for speed if DB table isn't fully migrated in session)
+    Get client settings (created with defaults on first access).
     """
-    # In a real app:
-    # settings = db.query(ClientSettings).filter(ClientSettings.organization_id == current_user.organization_id).first()
-    # return settings
-    
-    return {
-        "business_bio": "We are top-rated AC repair experts in Miami.",
-        "active_zip_codes": ["33101", "33139", "33140"],
-        "min_lead_score": 60,
-        "alert_settings": {
-            "sms_on_new_lead": True,
-            "email_daily_summary": True
-        },
-        "lead_score_weights": {
-            "property_value": 50,
-            "social_presence": 30,
-            "urgency": 20
-        }
-    }
+    row = get_client_settings(db, _org_id(current_user))
+    db.commit()
+    return _settings_dict(row)
 
 @router.put("/", response_model=dict)
 def update_settings(
     settings_in: SettingsUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Update client settings. API Stub.
+    Update client settings. Changing the scoring weights, rules or minimum score
+    bumps the scoring version, invalidates every process's compiled scoring and
+    starts a background rescoring of the org's leads (cancelling any run still
+    going for the previous version).
     """
+    organization_id = _org_id(current_user)
+    # Row lock: concurrent updates must not hand out the same scoring version
+    get_client_settings(db, organization_id)
+    row = db.query(ClientSettings).filter(
+        ClientSettings.organization_id == organization_id
+    ).with_for_update().one()
+    
+    updates = settings_in.model_dump(exclude_unset=True)
+    if updates.get("scoring_rules") is not None:
+        try:
+            updates["scoring_rules"] = validate_rules(updates["scoring_rules"])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid scoring rules: {e}")
+    if updates.get("lead_score_weights") is not None:
+        try:
+            validate_weights(updates["lead_score_weights"])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid lead score weights: {e}")
+    scoring_changed = any(
+        field in updates and updates[field] != getattr(row, field) for field in SCORING_FIELDS
+    )
+    for field, value in updates.items():
+        setattr(row, field, value)
+    if scoring_changed:
+        row.scoring_version += 1
+    db.commit()
+    
+    job = None
+    if scoring_changed:
+        publish_scoring_version(organization_id, row.scoring_version)
+        job = start_rescore(db, organization_id, row.scoring_version)
     return {
         "status": "success",
-        "updated": settings_in.dict(exclude_unset=True)
+        "updated": updates,
+        "settings": _settings_dict(row),
+        "rescore_job": _job_dict(job) if job else None,
     }
 
+@router.get("/rescore-jobs/latest", response_model=dict)
+def get_latest_rescore_job(
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Progress of the org's most recent rescoring run.
+    """
+    job = db.query(RescoreJob).filter(
+        RescoreJob.organization_id == _org_id(current_user)
+    ).order_by(RescoreJob.id.desc()).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="No rescoring runs yet")
+    return _job_dict(job)
+
+@router.post("/rescore-jobs/{job_id}/resume", response_model=dict)
+def resume_rescore_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Restart a failed rescoring run from its last committed chunk.
+    """
+    job = db.query(RescoreJob).filter(
+        RescoreJob.id == job_id, RescoreJob.organization_id == _org_id(current_user)
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Only failed runs can be resumed (status: {job.status})")
+    job = resume_rescore(db, job)
+    if job.status != "pending":
+        raise HTTPException(status_code=409, detail="Scoring weights changed since this run; a newer run replaces it")
+    return _job_dict(job)
+
+@router.post("/api-key", response_model=dict)
+def rotate_organization_api_key(
+    db: Session = Depends(get_db),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Issue a new API key for partner integrations (sent as X-API-Key) and revoke
+    the previous one (superusers only). The key is shown only in this response.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    api_key = rotate_api_key(db, _org_id(current_user))
+    return {"api_key": api_key, "prefix": api_key[:API_KEY_DISPLAY_CHARS]}
+
 @router.post("/chat-test")
 def test_ai_response(
     request: ChatTestRequest,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: deps.CurrentUser = Depends(deps.get_current_user),
 ) -> Any:
     """
     AI Playground: Simulates RAG response using the Business Bio.
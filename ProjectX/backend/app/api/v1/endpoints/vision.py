@@ -3,7 +3,6 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.db.base import get_db
 from app.api import deps
-from app.models.user import User
 from app.models.lead import Lead
 from app.models.vision import VisionScan
 from app.services.vision_service import analyze_image
@@ -45,7 +44,7 @@ def analyze_photo(
     request: VisionRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: deps.CurrentUser = Depends(deps.get_current_user)
 ):
     """
     Submit a photo for AI Analysis (Gemini Vision).
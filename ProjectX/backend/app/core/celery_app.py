@@ -1,8 +1,68 @@
+import os
+
 from celery import Celery
+from kombu import Queue
 from app.core.config import settings
 
-celery_app = Celery("worker", broker=settings.REDIS_URL)
+celery_app = Celery("worker", broker=settings.REDIS_URL, include=["app.worker"])
+
+# Lead processing runs as separate stages (enrich -> score -> dial), each on its
+# own queue so a slow enrichment provider never holds up scoring or calls.
+MAIN_QUEUE = "main-queue"
+ENRICHMENT_QUEUE = "enrichment"
+SCORING_QUEUE = "scoring"
+DIALER_QUEUE = "dialer" # Only HOT leads are dialed, so nothing queues ahead of them here
+RESCORING_QUEUE = "rescoring" # Whole-book rescores hold a process for minutes; kept off live scoring
+
+# Worker processes per queue. Enrichment is I/O bound (provider latency), scoring
+# is cheap CPU, dialing is limited by telephony capacity, rescoring by how much
+# database load a background job may add.
+QUEUE_CONCURRENCY = {
+    MAIN_QUEUE: 2,
+    ENRICHMENT_QUEUE: 16,
+    SCORING_QUEUE: 4,
+    DIALER_QUEUE: 4,
+    RESCORING_QUEUE: 2,
+}
+
+celery_app.conf.task_queues = [Queue(name) for name in QUEUE_CONCURRENCY]
+celery_app.conf.task_default_queue = MAIN_QUEUE
 
 celery_app.conf.task_routes = {
-    "app.worker.process_lead_enrichment": "main-queue",
+    "app.worker.process_lead_enrichment": ENRICHMENT_QUEUE,
+    "app.worker.process_lead_enrichment_batch": ENRICHMENT_QUEUE,
+    "app.worker.enrich_lead": ENRICHMENT_QUEUE,
+    "app.worker.score_lead": SCORING_QUEUE,
+    "app.worker.dial_lead": DIALER_QUEUE,
+    "app.worker.rescore_leads": RESCORING_QUEUE,
+    "app.worker.resume_stalled_rescore_jobs": MAIN_QUEUE,
+    "app.worker.flush_lead_ingest_buffer": MAIN_QUEUE,
+}
+
+# Fetch one task at a time so a busy process does not sit on calls another could take
+celery_app.conf.worker_prefetch_multiplier = 1
+
+# A worker started with WORKER_QUEUES (the same list as its -Q) sizes its pool
+# from QUEUE_CONCURRENCY unless --concurrency is passed.
+_worker_queues = [q.strip() for q in os.getenv("WORKER_QUEUES", "").split(",") if q.strip()]
+_unknown_queues = sorted(set(_worker_queues) - QUEUE_CONCURRENCY.keys())
+if _unknown_queues:
+    raise ValueError(
+        f"WORKER_QUEUES names unknown queue(s) {', '.join(_unknown_queues)}; "
+        f"known queues: {', '.join(QUEUE_CONCURRENCY)}"
+    )
+if _worker_queues:
+    celery_app.conf.worker_concurrency = sum(QUEUE_CONCURRENCY[q] for q in _worker_queues)
+
+celery_app.conf.beat_schedule = {
+    "flush-lead-ingest-buffer": {
+        "task": "app.worker.flush_lead_ingest_buffer",
+        "schedule": settings.LEAD_INGEST_FLUSH_INTERVAL_SECONDS,
+        # Skip runs that could not start in time instead of piling them up
+        "options": {"expires": settings.LEAD_INGEST_FLUSH_INTERVAL_SECONDS * 5},
+    },
+    "resume-stalled-rescore-jobs": {
+        "task": "app.worker.resume_stalled_rescore_jobs",
+        "schedule": 60.0,
+    },
 }
@@ -15,8 +15,91 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     
+    # Lead Ingest
+    LEAD_BATCH_MAX_SIZE: int = 5000
+    LEAD_COPY_THRESHOLD: int = 50 # Below this a multi-row INSERT beats COPY setup
+    ENRICHMENT_CHUNK_SIZE: int = 100 # Leads per batch enrichment task
+    ENRICHMENT_BATCH_SIZE: int = 200 # Leads claimed per backlog-draining batch task
+    ENRICHMENT_BATCH_CONCURRENCY: int = 50 # In-flight lead enrichments per batch task
+    DEDUPE_BLOOM_CAPACITY: int = 1_000_000 # Contact keys per organization before the false-positive rate degrades
+    DEDUPE_BLOOM_ERROR_RATE: float = 0.01
+    LEAD_IMPORT_CHUNK_SIZE: int = 1000 # Rows per commit for streaming file imports
+    LEAD_IMPORT_MAX_ERRORS: int = 1000 # Per-row errors reported back; the rest are only counted
+    PUBLIC_FORM_ORGANIZATION_ID: int = 1 # Org of leads posted without X-API-Key (the public web form)
+    
+    # Enrichment Providers
+    ENRICHMENT_PROVIDER_TIMEOUT_SECONDS: float = 5.0
+    ENRICHMENT_PROVIDER_TIMEOUTS: dict = {} # Per-provider overrides, e.g. {"social_data": 2.5}
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    
+    # Enrichment Result Cache (in-process LRU in front of Redis)
+    ENRICHMENT_CACHE_ENABLED: bool = True
+    ENRICHMENT_CACHE_LOCAL_TTL_SECONDS: float = 60 * 10
+    ENRICHMENT_CACHE_LOCAL_MAXSIZE: int = 10000
+    ENRICHMENT_CACHE_REDIS_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    ENRICHMENT_CACHE_STATS_INTERVAL_SECONDS: float = 10 # How often each process adds its hit/miss counts to /metrics
+    
+    # Write-behind Ingest Buffer (Redis stream drained by the worker)
+    LEAD_INGEST_STREAM: str = "leads:ingest"
+    LEAD_INGEST_GROUP: str = "lead-flushers"
+    LEAD_INGEST_DEAD_LETTER_STREAM: str = "leads:ingest:dead"
+    LEAD_INGEST_FLUSH_BATCH: int = 500
+    LEAD_INGEST_FLUSH_MAX_BATCHES: int = 20 # Per flusher run
+    LEAD_INGEST_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LEAD_INGEST_CLAIM_IDLE_MS: int = 60000 # Re-deliver entries a dead flusher never acked
+    LEAD_INGEST_RESULT_TTL_SECONDS: int = 60 * 60 * 24
+    
+    # Duplicate-delivery guards (Redis locks / idempotency keys)
+    ENRICHMENT_LOCK_TTL_SECONDS: float = 60 # Must outlive one enrichment (slowest provider timeout + writes)
+    LEAD_IDEMPOTENCY_TTL_SECONDS: int = 60 * 60 * 24
+    
+    # Whole-book Rescoring (when an org's scoring weights change)
+    RESCORE_CHUNK_SIZE: int = 5000 # Leads per server-side cursor fetch / commit
+    RESCORE_STALL_SECONDS: int = 300 # A running job with no committed chunk for this long is resumed
+    SCORING_CACHE_TTL_SECONDS: float = 300 # Compiled org scoring; bounds staleness if Redis misses a version bump
+    SCORING_CACHE_MAXSIZE: int = 10000
+    
+    # Dashboard
+    DASHBOARD_CACHE_TTL_SECONDS: float = 60 # Per-org stats; bounds staleness if Redis misses a lead write
+    DASHBOARD_CACHE_MAXSIZE: int = 10000
+    
+    # Pipelines
+    PIPELINE_BULK_MOVE_MAX_SIZE: int = 1000 # Leads per bulk stage move request
+    PIPELINE_CACHE_TTL_SECONDS: float = 300 # Per-org pipelines + stages; bounds staleness if Redis misses a write
+    PIPELINE_CACHE_MAXSIZE: int = 10000
+    # Time-in-stage histogram bounds (1h .. 90d); longer stays land in a +Inf bucket
+    STAGE_DURATION_BUCKETS_SECONDS: list = [
+        3600, 4 * 3600, 12 * 3600, 86400, 2 * 86400, 3 * 86400, 5 * 86400,
+        7 * 86400, 14 * 86400, 30 * 86400, 60 * 86400, 90 * 86400,
+    ]
+    
+    # Speed-to-Lead Latency (verify -> call)
+    SPEED_TO_LEAD_SLO_SECONDS: float = 30.0
+    LEAD_TIMELINE_TTL_SECONDS: int = 60 * 60 * 24 * 3 # Per-lead stage timestamps
+    LATENCY_BUCKETS_SECONDS: list = [0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300]
+    
     SECRET_KEY: str = "your-super-secret-key-change-in-prod"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8 # 8 days
+    # Authenticated users are cached per process; a deactivation or logout-all
+    # reaches the others through Redis, or within the TTL if Redis misses it
+    USER_CACHE_TTL_SECONDS: float = 30
+    USER_CACHE_MAXSIZE: int = 10000
+    # Org API keys are resolved from an in-process index; each process checks
+    # Redis for key changes at most this often
+    API_KEY_INDEX_CHECK_SECONDS: float = 5
+    
+    # Login: bcrypt runs in a dedicated process pool, off the request threadpool
+    PASSWORD_HASH_WORKERS: int = 2 # Processes per API process
+    PASSWORD_HASH_MAX_PENDING: int = 32 # Queued + running hashes; further logins get a 429 right away
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+    LOGIN_IP_MAX_ATTEMPTS: int = 30 # Login attempts per client IP per window; 0 turns the IP limit off
+    LOGIN_ACCOUNT_MAX_FAILURES: int = 5 # Failed logins per account per window
+    # Load balancers / reverse proxies (addresses or CIDRs) whose X-Forwarded-For
+    # header names the client. Without them every request behind the proxy
+    # shares the proxy's IP, and so one IP limit.
+    TRUSTED_PROXY_IPS: list = []
 
     class Config:
         env_file = ".env"
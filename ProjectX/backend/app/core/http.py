@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+import httpx
+from app.core.config import settings
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    One background event loop per process. Celery prefork children each get
+    their own (the pid check stops a child from reusing the parent's loop).
+    """
+    global _loop, _loop_pid, _client
+    if _loop is not None and _loop_pid == os.getpid():
+        return _loop
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _client = None
+            threading.Thread(target=_loop.run_forever, name="async-runtime", daemon=True).start()
+    return _loop
+
+
+def run_async(coro: Awaitable) -> Any:
+    """
+    Run a coroutine on the process-wide loop from sync code (Celery tasks).
+    Keeping one loop lets every call share the pooled HTTP client below.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared, connection-pooled client for outbound provider calls.
+    Must be used from the loop returned by `run_async`.
+    """
+    global _client
+    _get_loop()
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(settings.ENRICHMENT_PROVIDER_TIMEOUT_SECONDS),
+        )
+    return _client
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+import redis
+
+from app.core.redis import get_redis
+
+
+@contextmanager
+def redis_lock(name: str, ttl_seconds: float) -> Iterator[bool]:
+    """
+    Short-lived, non-blocking distributed lock. Yields whether it was acquired;
+    the holder's token is checked on release, so a lock that expired and was
+    taken over is never released by the old holder.
+    If Redis is unreachable this yields True: callers still have their
+    database guards, and losing Redis must not stop lead processing.
+    """
+    lock = get_redis().lock(f"lock:{name}", timeout=ttl_seconds, blocking=False)
+    try:
+        acquired = lock.acquire()
+    except redis.RedisError as e:
+        print(f"[Locks] Could not acquire {name}: {e!r}")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except (redis.RedisError, redis.exceptions.LockError):
+                pass # Expired while held; nothing left to release
+
+
+def claim_once(key: str, ttl_seconds: int) -> bool:
+    """
+    Idempotency key: True only for the first caller within `ttl_seconds`.
+    Fails open (True) when Redis is unreachable, like `redis_lock`.
+    """
+    try:
+        return bool(get_redis().set(f"idem:{key}", 1, nx=True, ex=ttl_seconds))
+    except redis.RedisError as e:
+        print(f"[Locks] Could not claim {key}: {e!r}")
+        return True
+
+
+def release_claim(key: str):
+    """Give an idempotency key back, e.g. when the guarded work failed before it had any effect."""
+    try:
+        get_redis().delete(f"idem:{key}")
+    except redis.RedisError:
+        pass
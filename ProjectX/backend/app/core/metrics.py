@@ -0,0 +1,174 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# Speed-to-Lead stages, in pipeline order. Each lead gets a Redis hash of
+# stage -> unix timestamp so the API, the workers and the dialer all write to
+# the same timeline.
+STAGES = (
+    "verified",        # OTP accepted, pipeline queued
+    "enrich_started",  # Celery picked up the enrichment
+    "enriched",
+    "score_started",
+    "scored",
+    "dial_started",
+    "called",
+)
+
+# Histogram -> (from stage, to stage). Observed when the "to" stage is recorded.
+INTERVALS = {
+    "enrich_queue_wait": ("verified", "enrich_started"),
+    "enrich": ("enrich_started", "enriched"),
+    "score_queue_wait": ("enriched", "score_started"),
+    "score": ("score_started", "scored"),
+    "dial_queue_wait": ("scored", "dial_started"),
+    "dial": ("dial_started", "called"),
+    "verify_to_call": ("verified", "called"),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = "speed_to_lead_stage_seconds"
+SLO_BREACHES = "speed_to_lead_slo_breaches_total"
+
+
+def _timeline_key(lead_id: int) -> str:
+    return f"leads:timeline:{lead_id}"
+
+
+def _histogram_key(interval: str) -> str:
+    return f"metrics:{METRIC_NAME}:{interval}"
+
+
+def record_stages(lead_ids: Iterable[int], stage: str, at: Optional[float] = None):
+    """
+    Stamp `stage` on each lead's timeline and observe every interval that
+    ends at this stage. Only the first stamp per stage counts, so retried
+    tasks do not skew the histograms. Metrics never fail the caller: Redis
+    errors are swallowed.
+    """
+    lead_ids = list(lead_ids)
+    if not lead_ids:
+        return
+    at = time.time() if at is None else at
+    ending = [(name, start) for name, (start, end) in INTERVALS.items() if end == stage]
+
+    try:
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for lead_id in lead_ids:
+            key = _timeline_key(lead_id)
+            pipe.hsetnx(key, stage, at)
+            pipe.expire(key, settings.LEAD_TIMELINE_TTL_SECONDS)
+            pipe.hmget(key, [start for _, start in ending])
+        replies = pipe.execute()
+
+        observations = []
+        for i in range(len(lead_ids)):
+            created, _, starts = replies[i * 3:i * 3 + 3]
+            if not created:
+                continue
+            for (name, _), started_at in zip(ending, starts):
+                if started_at is not None:
+                    observations.append((name, max(at - float(started_at), 0.0)))
+        _observe(client, observations)
+    except redis.RedisError as e:
+        print(f"[Metrics] Could not record stage {stage}: {e!r}")
+
+
+def record_stage(lead_id: int, stage: str, at: Optional[float] = None):
+    record_stages([lead_id], stage, at)
+
+
+def get_timeline(lead_id: int) -> Dict[str, float]:
+    raw = get_redis().hgetall(_timeline_key(lead_id))
+    return {stage: float(raw[stage]) for stage in STAGES if stage in raw}
+
+
+def _observe(client: redis.Redis, observations: List[tuple]):
+    """Cumulative Prometheus histogram buckets, kept in one Redis hash per interval."""
+    if not observations:
+        return
+    pipe = client.pipeline(transaction=False)
+    for name, seconds in observations:
+        key = _histogram_key(name)
+        for bound in settings.LATENCY_BUCKETS_SECONDS:
+            if seconds <= bound:
+                pipe.hincrby(key, f"le:{bound}", 1)
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "sum", seconds)
+        if name == "verify_to_call" and seconds > settings.SPEED_TO_LEAD_SLO_SECONDS:
+            pipe.incr(f"metrics:{SLO_BREACHES}")
+    pipe.execute()
+
+
+def histogram_quantile(q: float, buckets: List[tuple], count: int) -> Optional[float]:
+    """Estimate a quantile from cumulative buckets, like PromQL histogram_quantile."""
+    if not count:
+        return None
+    rank = q * count
+    lower_bound, lower_count = 0.0, 0
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            if cumulative == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (cumulative - lower_count)
+        lower_bound, lower_count = bound, cumulative
+    return buckets[-1][0] # Beyond the last finite bucket
+
+
+def latency_snapshot() -> Dict[str, dict]:
+    """interval -> {"buckets": [(le, cumulative count)], "count", "sum", "quantiles"}"""
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    for name in INTERVALS:
+        pipe.hgetall(_histogram_key(name))
+    snapshot = {}
+    for name, raw in zip(INTERVALS, pipe.execute()):
+        count = int(raw.get("count", 0))
+        buckets = [(bound, int(raw.get(f"le:{bound}", 0))) for bound in settings.LATENCY_BUCKETS_SECONDS]
+        snapshot[name] = {
+            "buckets": buckets,
+            "count": count,
+            "sum": float(raw.get("sum", 0)),
+            "quantiles": {q: histogram_quantile(q, buckets, count) for q in QUANTILES},
+        }
+    return snapshot
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition (format 0.0.4) of the Speed-to-Lead histograms."""
+    snapshot = latency_snapshot()
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent waiting for and running each Speed-to-Lead stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for name, data in snapshot.items():
+        for bound, cumulative in data["buckets"]:
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="+Inf"}} {data["count"]}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {data["sum"]}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {data["count"]}')
+
+    lines += [
+        f"# HELP {METRIC_NAME}_quantile Quantiles estimated from the stage histograms.",
+        f"# TYPE {METRIC_NAME}_quantile gauge",
+    ]
+    for name, data in snapshot.items():
+        for q, value in data["quantiles"].items():
+            if value is not None:
+                lines.append(f'{METRIC_NAME}_quantile{{stage="{name}",quantile="{q}"}} {value}')
+
+    breaches = int(get_redis().get(f"metrics:{SLO_BREACHES}") or 0)
+    lines += [
+        "# HELP speed_to_lead_slo_seconds Target time from OTP verification to the manager call.",
+        "# TYPE speed_to_lead_slo_seconds gauge",
+        f"speed_to_lead_slo_seconds {settings.SPEED_TO_LEAD_SLO_SECONDS}",
+        f"# HELP {SLO_BREACHES} Calls placed later than the SLO after verification.",
+        f"# TYPE {SLO_BREACHES} counter",
+        f"{SLO_BREACHES} {breaches}",
+    ]
+    return "\n".join(lines) + "\n"
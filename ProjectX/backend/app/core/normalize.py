@@ -0,0 +1,67 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# USPS-style abbreviations so "123 North Main Street" and "123 N. Main St" share a key
+_ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "boulevard": "blvd",
+    "lane": "ln", "court": "ct", "place": "pl", "terrace": "ter", "circle": "cir",
+    "highway": "hwy", "parkway": "pkwy", "square": "sq", "trail": "trl",
+    "apartment": "apt", "suite": "ste", "unit": "unit",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """
+    Canonical form used for duplicate detection: trimmed and lower-cased.
+    """
+    if not email:
+        return None
+    email = email.strip().lower()
+    return email or None
+
+
+def normalize_phone(phone: Optional[str], default_country_code: str = "1") -> Optional[str]:
+    """
+    Best-effort E.164 normalization ("+13055550123").
+    National numbers default to NANP; returns None when the input can't be a real number.
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub("", phone)
+    if phone.strip().startswith("+"):
+        if not 8 <= len(digits) <= 15:
+            return None
+    elif len(digits) == 10:
+        digits = default_country_code + digits
+    elif len(digits) == 11 and digits.startswith("1"):
+        pass
+    else:
+        return None
+
+    # NANP area codes and exchanges never start with 0 or 1 (also drops "000-000-0000" placeholders)
+    if digits.startswith("1") and len(digits) == 11 and (digits[1] in "01" or digits[4] in "01"):
+        return None
+    return f"+{digits}"
+
+
+def normalize_address(address: Optional[str], zip_code: Optional[str] = None) -> Optional[str]:
+    """
+    Cache/lookup key for a street address: lower-cased, punctuation stripped,
+    common suffixes abbreviated, and the 5-digit ZIP appended when known.
+    """
+    if not address:
+        return None
+    words = _NON_WORD.sub(" ", address.lower()).split()
+    if not words:
+        return None
+    key = " ".join(_ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+    if zip_code:
+        zip5 = _NON_DIGITS.sub("", zip_code)[:5]
+        if zip5:
+            key = f"{key} {zip5}"
+    return key
@@ -0,0 +1,74 @@
+import ipaddress
+from typing import Sequence
+
+import redis
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+def _key(name: str) -> str:
+    return f"throttle:{name}"
+
+
+def retry_after(name: str, limit: int) -> int:
+    """
+    Seconds until `name` is back under `limit` counted attempts; 0 if it is
+    already. Fails open (0) when Redis is unreachable, like the locks.
+    """
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.get(_key(name))
+        pipe.ttl(_key(name))
+        count, ttl = pipe.execute()
+    except redis.RedisError as e:
+        print(f"[Throttle] Could not read {name}: {e!r}")
+        return 0
+    if count is None or int(count) < limit:
+        return 0
+    return max(ttl, 1)
+
+
+def count_attempt(name: str, window_seconds: int):
+    """Count one attempt in a fixed window that starts with the first attempt."""
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(_key(name), 0, nx=True, ex=window_seconds)
+        pipe.incr(_key(name))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"[Throttle] Could not count {name}: {e!r}")
+
+
+def clear_attempts(name: str):
+    try:
+        get_redis().delete(_key(name))
+    except redis.RedisError as e:
+        print(f"[Throttle] Could not clear {name}: {e!r}")
+
+
+def _is_trusted(address: str, proxies: Sequence) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in proxy for proxy in proxies)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The address to count a client's attempts against. Requests relayed by a
+    TRUSTED_PROXY_IPS proxy are attributed to the nearest X-Forwarded-For hop
+    that isn't one; hops further left are whatever the client chose to send.
+    """
+    host = request.client.host if request.client else None
+    proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXY_IPS]
+    if host is None or not _is_trusted(host, proxies):
+        return host or "unknown"
+    hops = [hop.strip() for value in request.headers.getlist("x-forwarded-for") for hop in value.split(",")]
+    hops = [hop for hop in hops if hop]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, proxies):
+            return hop
+    return hops[0] if hops else host
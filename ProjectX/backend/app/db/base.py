@@ -1,10 +1,19 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.sql import functions
 from app.core.config import settings
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP would store 'YYYY-MM-DD HH:MM:SS', but SQLAlchemy binds
+    # datetimes as 'YYYY-MM-DD HH:MM:SS.ffffff'; these text values must compare
+    # like the datetimes they hold (keyset cursors on created_at), so store that
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 class Base(DeclarativeBase):
     pass
 
@@ -1,7 +1,11 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.metrics import render_prometheus
+from app.core.security import password_hasher
+from app.services import enrichment_cache
 
 app = FastAPI(
     title="M.O.S. Engine API",
@@ -21,10 +25,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.shutdown()
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "service": "mos-engine-backend"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus scrape target: Speed-to-Lead stage latency histograms, enrichment cache hit rates
+    body = render_prometheus() + enrichment_cache.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to M.O.S. Engine API"}
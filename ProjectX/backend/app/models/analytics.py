@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from app.db.base import Base
+
+class LeadDailyStats(Base):
+    """
+    Rollup of `leads`: how many of an org's leads created on `day` (UTC) are
+    currently in `status`, per source. Kept in step by lead_stats_service.
+    """
+    __tablename__ = "lead_daily_stats"
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    source = Column(String, primary_key=True) # "unknown" when the lead has none
+    leads = Column(Integer, default=0, nullable=False)
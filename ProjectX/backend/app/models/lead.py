@@ -1,10 +1,24 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index, Text, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.db.base import Base
+from app.core.normalize import normalize_email, normalize_phone
 # Import Pipeline for string reference in relationship if needed, 
 # but usually string is fine. Keeping imports minimal.
 
+def search_document(*columns):
+    """
+    Lowercased, space-joined text that lead search matches against. Built
+    from immutable functions only, so Postgres can index the expression.
+    """
+    document = None
+    for column in columns:
+        part = func.coalesce(column, literal_column("''"))
+        document = part if document is None else document.op("||")(literal_column("' '")).op("||")(part)
+    return func.lower(document)
+
+
 class Lead(Base):
     __tablename__ = "leads"
 
@@ -14,6 +28,7 @@ class Lead(Base):
     # Pipeline Info
     pipeline_id = Column(Integer, ForeignKey("pipelines.id"), nullable=True)
     stage_id = Column(Integer, ForeignKey("pipeline_stages.id"), nullable=True)
+    stage_entered_at = Column(DateTime(timezone=True), nullable=True) # When the lead moved into stage_id
     
     # Contact Info
     first_name = Column(String, nullable=True)
@@ -21,6 +36,10 @@ class Lead(Base):
     email = Column(String, index=True, nullable=True)
     phone = Column(String, index=True, nullable=True)
     
+    # Normalized contact keys for duplicate detection (unique per organization)
+    email_normalized = Column(String, nullable=True)
+    phone_e164 = Column(String, nullable=True)
+    
     # Location
     address = Column(String, nullable=True)
     city = Column(String, nullable=True)
@@ -36,9 +55,15 @@ class Lead(Base):
     household_income = Column(Float, nullable=True)
     social_profile_url = Column(String, nullable=True)
     
+    # AI Scoring & Dialing (written by the worker pipeline)
+    priority_tag = Column(String, nullable=True) # HOT_LEAD, WARM_LEAD, ... from the org's scoring rules
+    ai_dossier = Column(Text, nullable=True)
+    sales_cheat_sheet = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True) # List of talking points
+    last_call_sid = Column(String, nullable=True)
+
     # Meta
     source = Column(String, nullable=True) # web, facebook, yelp
-    meta_data = Column(JSON, default={}) # Store raw JSON from varying sources
+    meta_data = Column(JSON().with_variant(JSONB(), "postgresql"), default={}) # Store raw JSON from varying sources
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -47,9 +72,63 @@ class Lead(Base):
     organization = relationship("Organization")
     
     # Phase 3 Relationships
+    property_data = relationship("PropertyData", back_populates="lead", uselist=False)
     vision_scans = relationship("VisionScan", back_populates="lead")
     seo_jobs = relationship("SEOJob", back_populates="lead")
     
     # Pipeline Relationships
     pipeline = relationship("Pipeline")
     stage = relationship("PipelineStage")
+
+    __table_args__ = (
+        Index(
+            "uq_leads_org_email_normalized", "organization_id", "email_normalized", unique=True,
+            postgresql_where=email_normalized.isnot(None), sqlite_where=email_normalized.isnot(None),
+        ),
+        Index(
+            "uq_leads_org_phone_e164", "organization_id", "phone_e164", unique=True,
+            postgresql_where=phone_e164.isnot(None), sqlite_where=phone_e164.isnot(None),
+        ),
+        Index("ix_leads_org_id", "organization_id", "id"), # Per-org scans in id order (rescoring)
+        Index("ix_leads_org_status_score", "organization_id", "status", "lead_score"), # Dashboard counts, index-only
+        # Newest leads per org (dashboard, listing). The included filter columns let
+        # the listing pick a page of ids with an index-only scan.
+        Index(
+            "ix_leads_org_created_at", "organization_id", "created_at", "id",
+            postgresql_include=["status", "lead_score", "zip_code", "source"],
+        ),
+        Index(
+            "ix_leads_org_status_created_at", "organization_id", "status", "created_at", "id",
+            postgresql_include=["lead_score"],
+        ), # Listing filtered by status
+        Index(
+            "ix_leads_org_priority_created_at", "organization_id", "priority_tag", "created_at", "id",
+            postgresql_include=["status", "lead_score"],
+        ), # Listing filtered by priority tag ("all HOT leads")
+        # Containment (@>) queries on the raw source payload (Postgres only)
+        Index(
+            "ix_leads_meta_data", meta_data, postgresql_using="gin", postgresql_ops={"meta_data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_leads_stage_board", stage_id, func.coalesce(lead_score, 0), created_at, id), # Kanban columns
+        # Lead search (Postgres only; needs the pg_trgm and btree_gin extensions)
+        Index(
+            "ix_leads_search_trgm", organization_id,
+            search_document(first_name, last_name, email, address).label("search_document"),
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_leads_search_tsv", organization_id,
+            func.to_tsvector(literal_column("'simple'"), search_document(first_name, last_name, email, address)),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @validates("email")
+    def _sync_email_normalized(self, key, value):
+        self.email_normalized = normalize_email(value)
+        return value
+
+    @validates("phone")
+    def _sync_phone_e164(self, key, value):
+        self.phone_e164 = normalize_phone(value)
+        return value
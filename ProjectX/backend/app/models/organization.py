@@ -7,6 +7,8 @@ class Organization(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
-    api_key = Column(String, unique=True, index=True, nullable=False)
+    # Partner API key: only its SHA-256 is stored. The prefix tells keys apart in the UI.
+    api_key_hash = Column(String, unique=True, index=True, nullable=True)
+    api_key_prefix = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
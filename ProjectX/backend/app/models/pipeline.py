@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Index
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -13,6 +14,14 @@ class Pipeline(Base):
     stages = relationship("PipelineStage", back_populates="pipeline", order_by="PipelineStage.order")
     organization = relationship("Organization")
 
+    __table_args__ = (
+        # At most one default pipeline per organization (makes the bootstrap an upsert)
+        Index(
+            "uq_pipelines_org_default", "organization_id", unique=True,
+            postgresql_where=is_default.is_(True), sqlite_where=is_default.is_(True),
+        ),
+    )
+
 class PipelineStage(Base):
     __tablename__ = "pipeline_stages"
 
@@ -24,3 +33,43 @@ class PipelineStage(Base):
     is_system_stage = Column(Boolean, default=False) # e.g. "Unsorted", "Won", "Lost"
 
     pipeline = relationship("Pipeline", back_populates="stages")
+
+class LeadStageTransition(Base):
+    """Append-only log of lead stage moves. Never updated or deleted."""
+    __tablename__ = "lead_stage_transitions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    pipeline_id = Column(Integer, ForeignKey("pipelines.id"), nullable=False) # Pipeline of the target stage
+    from_stage_id = Column(Integer, ForeignKey("pipeline_stages.id"), nullable=True) # None on first placement
+    to_stage_id = Column(Integer, ForeignKey("pipeline_stages.id"), nullable=False)
+    seconds_in_stage = Column(Float, nullable=True) # Time spent in from_stage, when its entry time is known
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_lead_stage_transitions_lead_id", "lead_id", "id"),
+        Index("ix_lead_stage_transitions_pipeline_id", "pipeline_id", "created_at"),
+    )
+
+class PipelineStageStats(Base):
+    """Running per-stage counters, updated in the same transaction as each move."""
+    __tablename__ = "pipeline_stage_stats"
+
+    stage_id = Column(Integer, ForeignKey("pipeline_stages.id"), primary_key=True)
+    pipeline_id = Column(Integer, ForeignKey("pipelines.id"), nullable=False, index=True)
+    entered = Column(Integer, default=0, nullable=False)
+    exited = Column(Integer, default=0, nullable=False)
+    seconds_in_stage_sum = Column(Float, default=0, nullable=False) # Over exits with a known entry time
+
+class PipelineStageDuration(Base):
+    """
+    Time-in-stage histogram: stays in the stage that lasted up to `le` seconds
+    (and longer than the previous bucket). The last bucket's `le` is infinity.
+    """
+    __tablename__ = "pipeline_stage_durations"
+
+    stage_id = Column(Integer, ForeignKey("pipeline_stages.id"), primary_key=True)
+    le = Column(Float, primary_key=True)
+    pipeline_id = Column(Integer, ForeignKey("pipelines.id"), nullable=False, index=True)
+    leads = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class RescoreJob(Base):
+    __tablename__ = "rescore_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    scoring_version = Column(Integer, nullable=False) # ClientSettings.scoring_version this run scores for
+    
+    # pending, running, completed, cancelled, failed
+    status = Column(String, default="pending", nullable=False, index=True)
+    
+    # Resume point: every lead up to this id has been rescored and committed
+    last_lead_id = Column(Integer, default=0, nullable=False)
+    scanned = Column(Integer, default=0, nullable=False)
+    updated = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True) # Last committed chunk
+    finished_at = Column(DateTime(timezone=True), nullable=True)
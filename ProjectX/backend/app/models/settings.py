@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, JSON
 from sqlalchemy.orm import relationship
-from app.db.base_class import Base
+from app.db.base import Base
 
 class ClientSettings(Base):
     __tablename__ = "client_settings"
@@ -33,4 +33,12 @@ class ClientSettings(Base):
         "urgency": 0.1
     })
     
+    # 5. Custom Scoring Rules (optional; replaces the weighted built-in tiers)
+    # Structure: see app/services/scoring_rules.py
+    scoring_rules = Column(JSON, nullable=True)
+    
+    # Bumped whenever the weights, rules or min_lead_score change; rescore jobs for an
+    # older version cancel themselves
+    scoring_version = Column(Integer, default=1, nullable=False)
+    
     organization = relationship("Organization")
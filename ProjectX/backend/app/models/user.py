@@ -11,6 +11,7 @@ class User(Base):
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0") # Bump to revoke every issued token
     
     # In a real multi-tenant app, you'd link to Organization
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
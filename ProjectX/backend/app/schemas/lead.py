@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Any
+from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, Any, Dict, List
+from app.core.config import settings
 
 class LeadBase(BaseModel):
     first_name: str
@@ -23,6 +25,91 @@ class LeadResponse(LeadBase):
     class Config:
         from_attributes = True
 
+class LeadBatchCreate(BaseModel):
+    leads: List[LeadCreate] = Field(..., min_length=1, max_length=settings.LEAD_BATCH_MAX_SIZE)
+    source: str = "partner"
+    enrich: bool = True # Partner leads are pre-verified, so enrichment can start right away
+
+class LeadBatchResponse(BaseModel):
+    ids: List[int] # Lead ids in request order; duplicates resolve to the existing lead
+    count: int
+    duplicates: int = 0
+    enrichment_tasks: int
+
+class LeadImportError(BaseModel):
+    row: int # Line number in the uploaded file
+    error: str
+
+class LeadImportResult(BaseModel):
+    rows_received: int
+    imported: int
+    duplicates: int = 0
+    failed: int
+    chunks_committed: int
+    enrichment_tasks: int
+    errors: List[LeadImportError] = []
+    errors_truncated: bool = False
+
+class LeadBufferedAccepted(BaseModel):
+    ingest_id: str # Redis stream entry id; resolve it to a lead id once flushed
+    status: str = "accepted"
+
+class LeadBufferedStatus(BaseModel):
+    ingest_id: str
+    status: str # accepted (still buffered), stored, or unknown
+    lead_id: Optional[int] = None
+
+class LeadBufferStats(BaseModel):
+    stream_length: int
+    pending: int
+    lag: Optional[int] = None
+    consumers: int
+    oldest_pending_age_seconds: Optional[float] = None
+    oldest_entry_age_seconds: Optional[float] = None
+    dead_letters: int
+
+class LeadTimeline(BaseModel):
+    lead_id: int
+    stages: Dict[str, float] # stage -> unix timestamp
+    verify_to_call_seconds: Optional[float] = None
+
 class OTPVerify(BaseModel):
     lead_id: int
     otp_code: str
+
+class LeadListItem(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    zip_code: Optional[str] = None
+    status: Optional[str] = None
+    lead_score: Optional[int] = 0
+    priority_tag: Optional[str] = None
+    source: Optional[str] = None
+    pipeline_id: Optional[int] = None
+    stage_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class LeadPage(BaseModel):
+    items: List[LeadListItem]
+    next_cursor: Optional[str] = None # Pass back as `cursor` for the next page; None on the last page
+
+class LeadSearchHit(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    zip_code: Optional[str] = None
+    status: Optional[str] = None
+    lead_score: Optional[int] = 0
+    rank: float
+
+class LeadSearchResponse(BaseModel):
+    query: str
+    items: List[LeadSearchHit]
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from app.core.config import settings
 
 # --- Stage Schemas ---
 class PipelineStageBase(BaseModel):
@@ -15,6 +17,9 @@ class PipelineStageUpdate(PipelineStageBase):
     color: Optional[str] = None
     order: Optional[int] = None
 
+class PipelineStageReorder(BaseModel):
+    stage_ids: List[int] = Field(..., min_length=1) # New board order, first to last
+
 class PipelineStage(PipelineStageBase):
     id: int
     pipeline_id: int
@@ -42,3 +47,70 @@ class Pipeline(PipelineBase):
 
     class Config:
         from_attributes = True
+
+# --- Stage Moves & Funnel ---
+class LeadStageMoveRequest(BaseModel):
+    stage_id: int
+
+class LeadBulkMove(BaseModel):
+    lead_ids: List[int] = Field(..., min_length=1, max_length=settings.PIPELINE_BULK_MOVE_MAX_SIZE)
+    stage_id: int
+
+class LeadBulkMoveResult(BaseModel):
+    stage_id: int
+    moved: List[int]
+    unchanged: List[int] # Already in the stage, or not found in the organization
+
+class LeadStageMove(BaseModel):
+    lead_id: int
+    from_stage_id: Optional[int] = None
+    to_stage_id: int
+    moved: bool # False when the lead was already in the stage
+    seconds_in_stage: Optional[float] = None # Time spent in the previous stage
+
+class FunnelStage(BaseModel):
+    stage_id: int
+    name: Optional[str] = None
+    order: Optional[int] = 0
+    is_system_stage: bool = False
+    current: int
+    entered: int
+    exited: int
+    conversion_rate: Optional[float] = None # % of first-stage entries
+    step_conversion_rate: Optional[float] = None # % of the previous working stage's entries
+    median_seconds_in_stage: Optional[float] = None
+    avg_seconds_in_stage: Optional[float] = None
+
+class PipelineFunnel(BaseModel):
+    pipeline_id: int
+    stages: List[FunnelStage]
+
+# --- Kanban Board ---
+class BoardLead(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    status: Optional[str] = None
+    lead_score: Optional[int] = 0
+    created_at: Optional[datetime] = None
+    stage_entered_at: Optional[datetime] = None
+
+class BoardColumn(BaseModel):
+    stage_id: int
+    name: Optional[str] = None
+    color: Optional[str] = None
+    order: Optional[int] = 0
+    total: int
+    leads: List[BoardLead]
+    next_cursor: Optional[str] = None # Pass to /pipeline/stages/{stage_id}/leads for the next page
+
+class PipelineBoard(BaseModel):
+    pipeline_id: int
+    columns: List[BoardColumn]
+
+class BoardColumnPage(BaseModel):
+    stage_id: int
+    leads: List[BoardLead]
+    next_cursor: Optional[str] = None
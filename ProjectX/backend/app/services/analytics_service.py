@@ -1,14 +1,41 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.lead import Lead
+from app.services.lead_writes import leads_generation
 
-def get_dashboard_stats(db: Session):
-    """
-    Aggregates stats from the database for the dashboard.
-    """
-    total_leads = db.query(Lead).count()
-    qualified_leads = db.query(Lead).filter(Lead.lead_score > 60).count()
-    closed_leads = db.query(Lead).filter(Lead.status == 'closed_won').count() # Assuming status exists, else mock
+QUALIFIED_SCORE = 60
+RECENT_LEADS_LIMIT = 5
+
+# Per-process cache: (org id, leads generation) -> stats. Any committed write to
+# the org's leads bumps the generation, so a hit is never older than the last write
+# (or than the TTL, if Redis is unreachable).
+_dashboard_cache = TTLCache(maxsize=settings.DASHBOARD_CACHE_MAXSIZE, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def _recent_leads(db: Session, organization_id: int) -> list:
+    rows = db.execute(
+        select(
+            Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.status,
+            Lead.lead_score, Lead.source, Lead.created_at,
+        )
+        .where(Lead.organization_id == organization_id)
+        .order_by(Lead.created_at.desc(), Lead.id.desc())
+        .limit(RECENT_LEADS_LIMIT)
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def _compute_dashboard_stats(db: Session, organization_id: int) -> dict:
+    # One pass over the org's rows (index-only on ix_leads_org_status_score)
+    total_leads, qualified_leads, closed_leads = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((Lead.lead_score > QUALIFIED_SCORE, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Lead.status == 'closed_won', 1), else_=0)), 0),
+        ).where(Lead.organization_id == organization_id)
+    ).one()
     
     # Mock Revenue Logic (e.g., avg deal size $1500)
     revenue = closed_leads * 1500
@@ -22,13 +49,23 @@ def get_dashboard_stats(db: Session):
     else:
         conversion_rate = (closed_leads / total_leads * 100) if total_leads > 0 else 0
 
-    recent_leads = db.query(Lead).order_by(Lead.created_at.desc()).limit(5).all()
-    
     return {
         "revenue": revenue,
         "total_leads": total_leads,
         "qualified_leads": qualified_leads,
         "conversion_rate": round(conversion_rate, 1),
         "pipeline_value": qualified_leads * 500, # Mock pipeline value
-        "recent_leads": recent_leads
+        "recent_leads": _recent_leads(db, organization_id)
     }
+
+
+def get_dashboard_stats(db: Session, organization_id: int):
+    """
+    Aggregates stats from the database for the organization's dashboard.
+    """
+    key = (organization_id, leads_generation(organization_id))
+    stats = _dashboard_cache.get(key)
+    if stats is None:
+        stats = _compute_dashboard_stats(db, organization_id)
+        _dashboard_cache.set(key, stats)
+    return stats
@@ -0,0 +1,120 @@
+import hashlib
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.organization import Organization
+
+API_KEY_PREFIX = "mos_"
+API_KEY_DISPLAY_CHARS = 12 # "mos_" + 8 random characters
+_GENERATION_KEY = "api_keys:generation"
+
+
+def generate_api_key() -> str:
+    return API_KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def hash_api_key(api_key: str) -> str:
+    # Keys are 256 random bits, so a fast hash is safe to store and lets
+    # a lookup be a dict hit instead of a bcrypt check per request
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _api_keys_generation() -> Optional[int]:
+    try:
+        return int(get_redis().get(_GENERATION_KEY) or 0)
+    except redis.RedisError:
+        return None # Fall back to reloading on the check interval
+
+
+class ApiKeyIndex:
+    """
+    Every active org's key hash -> organization id, held in memory. The
+    index is reloaded (one query) when the Redis generation moves. The
+    generation is checked every API_KEY_INDEX_CHECK_SECONDS, and on a miss,
+    so a key rotated in another process works within a second; however fast
+    unknown keys arrive, they trigger at most one check per second.
+    """
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._keys: Dict[str, int] = {}
+        self._generation: Optional[int] = None
+        self._loaded_at: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, api_key: str) -> Optional[int]:
+        digest = hash_api_key(api_key)
+        organization_id = self._keys.get(digest)
+        now = time.monotonic()
+        if organization_id is None or now - self._checked_at >= self.check_seconds:
+            self._refresh(db, now, miss=organization_id is None)
+            organization_id = self._keys.get(digest)
+        return organization_id
+
+    def _refresh(self, db: Session, now: float, miss: bool):
+        with self._lock:
+            if miss and now - self._checked_at < min(self.check_seconds, 1.0):
+                return # Another caller just checked
+            self._checked_at = now
+            generation = _api_keys_generation()
+            if self._loaded_at is not None:
+                if generation is not None and generation == self._generation:
+                    return
+                if generation is None and now - self._loaded_at < self.check_seconds:
+                    return
+            rows = db.execute(
+                select(Organization.api_key_hash, Organization.id).where(
+                    Organization.api_key_hash.isnot(None), Organization.is_active.isnot(False)
+                )
+            )
+            self._keys = dict(rows.all())
+            self._generation = generation
+            self._loaded_at = now
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._loaded_at = None
+            self._checked_at = 0.0
+
+
+_index = ApiKeyIndex(settings.API_KEY_INDEX_CHECK_SECONDS)
+
+
+def organization_for_api_key(db: Session, api_key: str) -> Optional[int]:
+    """The active organization owning `api_key`, or None. Usually no database query."""
+    return _index.resolve(db, api_key)
+
+
+def invalidate_api_keys():
+    """Call after committing a change to any org's key or active flag."""
+    _index.clear()
+    try:
+        get_redis().incr(_GENERATION_KEY)
+    except redis.RedisError as e:
+        print(f"[ApiKeys] Could not invalidate API keys: {e!r}")
+
+
+def rotate_api_key(db: Session, organization_id: int) -> str:
+    """
+    Give the org a new API key and revoke the old one. Commits; returns the
+    key, which is only ever available here (just its hash is stored).
+    """
+    api_key = generate_api_key()
+    db.execute(
+        update(Organization)
+        .where(Organization.id == organization_id)
+        .values(api_key_hash=hash_api_key(api_key), api_key_prefix=api_key[:API_KEY_DISPLAY_CHARS])
+    )
+    db.commit()
+    invalidate_api_keys()
+    return api_key
\ No newline at end of file
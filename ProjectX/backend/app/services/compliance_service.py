@@ -29,8 +29,10 @@ def anonymize_lead(db: Session, lead_id: int):
     lead.phone = "000-000-0000"
     lead.address = "REDACTED"
     
-    # Metadata cleanup
+    # Metadata cleanup (the dossier and cheat sheet are built from the lead's PII)
     lead.meta_data = {"status": "anonymized_per_request"}
+    lead.ai_dossier = None
+    lead.sales_cheat_sheet = None
     
     db.commit()
     return lead
@@ -0,0 +1,209 @@
+import hashlib
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.lead import Lead
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter. `might_contain` never returns a false negative for
+    keys added to this filter; false positives only cost an indexed DB lookup.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def contact_keys(email_normalized: Optional[str], phone_e164: Optional[str]) -> List[str]:
+    keys = []
+    if email_normalized:
+        keys.append(f"e:{email_normalized}")
+    if phone_e164:
+        keys.append(f"p:{phone_e164}")
+    return keys
+
+
+class ContactIndex:
+    """
+    Per-process, per-organization Bloom filters over normalized contact keys.
+    A filter is warmed from the database the first time an org is seen. Leads
+    written by other processes are caught by the unique indexes on `leads`, so
+    the filter only decides when the DB lookup can be skipped.
+    """
+
+    def __init__(self):
+        self._filters: Dict[int, BloomFilter] = {}
+        self._lock = threading.Lock()
+
+    def _filter(self, db: Session, organization_id: int) -> BloomFilter:
+        bloom = self._filters.get(organization_id)
+        if bloom is not None:
+            return bloom
+        with self._lock:
+            bloom = self._filters.get(organization_id)
+            if bloom is None:
+                bloom = BloomFilter(settings.DEDUPE_BLOOM_CAPACITY, settings.DEDUPE_BLOOM_ERROR_RATE)
+                rows = db.execute(
+                    select(Lead.email_normalized, Lead.phone_e164)
+                    .where(Lead.organization_id == organization_id)
+                    .execution_options(yield_per=10000)
+                )
+                for email_normalized, phone_e164 in rows:
+                    for key in contact_keys(email_normalized, phone_e164):
+                        bloom.add(key)
+                self._filters[organization_id] = bloom
+        return bloom
+
+    def might_exist(self, db: Session, organization_id: int, email_normalized, phone_e164) -> bool:
+        bloom = self._filter(db, organization_id)
+        return any(bloom.might_contain(key) for key in contact_keys(email_normalized, phone_e164))
+
+    def add(self, organization_id: int, email_normalized, phone_e164):
+        bloom = self._filters.get(organization_id)
+        if bloom is not None:
+            for key in contact_keys(email_normalized, phone_e164):
+                bloom.add(key)
+
+    def reset(self):
+        with self._lock:
+            self._filters.clear()
+
+
+contact_index = ContactIndex()
+
+
+def _lead_with_contact(db: Session, organization_id: int, email_normalized, phone_e164) -> Optional[Lead]:
+    conditions = []
+    if email_normalized:
+        conditions.append(Lead.email_normalized == email_normalized)
+    if phone_e164:
+        conditions.append(Lead.phone_e164 == phone_e164)
+    if not conditions:
+        return None
+    return (
+        db.query(Lead)
+        .filter(Lead.organization_id == organization_id, or_(*conditions))
+        .order_by(Lead.id)
+        .first()
+    )
+
+
+def find_duplicate_lead(db: Session, organization_id: int, email_normalized, phone_e164) -> Optional[Lead]:
+    """
+    Look up an existing lead by normalized email or phone. Served by the
+    per-organization unique indexes; skipped when the Bloom filter rules it out.
+    """
+    if not contact_keys(email_normalized, phone_e164):
+        return None
+    if not contact_index.might_exist(db, organization_id, email_normalized, phone_e164):
+        return None
+    return _lead_with_contact(db, organization_id, email_normalized, phone_e164)
+
+
+def find_conflicting_lead(db: Session, organization_id: int, email_normalized, phone_e164) -> Optional[Lead]:
+    """
+    The lead an insert collided with on the contact unique indexes. Always asks
+    the database: that lead was usually written by another process, which this
+    process's Bloom filter has not seen. Adds its keys to the filter.
+    """
+    lead = _lead_with_contact(db, organization_id, email_normalized, phone_e164)
+    if lead is not None:
+        contact_index.add(organization_id, lead.email_normalized, lead.phone_e164)
+    return lead
+
+
+MERGEABLE_FIELDS = ("first_name", "last_name", "email", "phone", "address", "zip_code", "city", "state")
+
+
+def merge_lead(existing: Lead, lead_in) -> bool:
+    """
+    Fill blanks on an existing lead from a duplicate submission.
+    Values already on the lead win. Returns True if anything changed.
+    """
+    changed = False
+    for field in MERGEABLE_FIELDS:
+        value = getattr(lead_in, field, None)
+        if value and not getattr(existing, field):
+            setattr(existing, field, value)
+            changed = True
+    return changed
+
+
+def resolve_duplicates(db: Session, rows: Sequence[dict], use_index: bool = True) -> Dict[int, Tuple[str, int]]:
+    """
+    Find duplicates for a batch of lead rows (dicts with organization_id,
+    email_normalized, phone_e164).
+    Returns {position: ("lead", lead_id)} for rows matching an existing lead
+    and {position: ("row", first_position)} for repeats within the batch.
+    Only rows the Bloom filter can't rule out are looked up, in one query per
+    org. With `use_index=False` every row is looked up (after an insert hit
+    the unique indexes) and the leads found are added to the filter.
+    """
+    duplicates: Dict[int, Tuple[str, int]] = {}
+    first_seen: Dict[Tuple[int, str], int] = {}
+    candidates: Dict[int, List[int]] = {}
+
+    for position, row in enumerate(rows):
+        org_id = row["organization_id"]
+        keys = contact_keys(row["email_normalized"], row["phone_e164"])
+        earlier = next((first_seen[(org_id, key)] for key in keys if (org_id, key) in first_seen), None)
+        if earlier is not None:
+            duplicates[position] = ("row", earlier)
+            continue
+        for key in keys:
+            first_seen[(org_id, key)] = position
+        if keys and (
+            not use_index or contact_index.might_exist(db, org_id, row["email_normalized"], row["phone_e164"])
+        ):
+            candidates.setdefault(org_id, []).append(position)
+
+    for org_id, positions in candidates.items():
+        emails = {rows[p]["email_normalized"] for p in positions} - {None}
+        phones = {rows[p]["phone_e164"] for p in positions} - {None}
+        existing = db.execute(
+            select(Lead.id, Lead.email_normalized, Lead.phone_e164)
+            .where(
+                Lead.organization_id == org_id,
+                or_(Lead.email_normalized.in_(emails), Lead.phone_e164.in_(phones)),
+            )
+            .order_by(Lead.id)
+        ).all()
+        by_key = {}
+        for lead_id, email_normalized, phone_e164 in existing:
+            for key in contact_keys(email_normalized, phone_e164):
+                by_key.setdefault(key, lead_id)
+            if not use_index:
+                contact_index.add(org_id, email_normalized, phone_e164)
+        for position in positions:
+            keys = contact_keys(rows[position]["email_normalized"], rows[position]["phone_e164"])
+            lead_id = next((by_key[key] for key in keys if key in by_key), None)
+            if lead_id is not None:
+                duplicates[position] = ("lead", lead_id)
+
+    return duplicates
+
+
+def remember_contacts(rows: Iterable[dict]):
+    for row in rows:
+        contact_index.add(row["organization_id"], row["email_normalized"], row["phone_e164"])
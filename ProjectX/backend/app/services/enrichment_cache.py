@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+import redis
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+# Counters summed across processes in Redis (local_size stays per process).
+# Lookup counter -> (tier, result) labels.
+LOOKUP_COUNTERS = {
+    "local_hits": ("local", "hit"),
+    "local_misses": ("local", "miss"),
+    "redis_hits": ("redis", "hit"),
+    "redis_misses": ("redis", "miss"),
+}
+SHARED_COUNTERS = (*LOOKUP_COUNTERS, "redis_errors")
+
+
+def _stats_key(namespace: str) -> str:
+    return f"metrics:cache:{namespace}"
+
+
+class TieredCache:
+    """
+    Two-tier cache for provider results: an in-process LRU in front of Redis.
+    Each tier has its own TTL and hit/miss counters. Redis being unavailable
+    only turns its lookups into misses.
+    """
+
+    def __init__(self, namespace: str, local_ttl: float, redis_ttl: int, local_maxsize: int, client: redis.Redis = None):
+        self.namespace = namespace
+        self.local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.redis_ttl = redis_ttl
+        self._client = client
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._reported = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        return self._get_redis(key)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """`get` for event-loop callers: a Redis lookup runs in a thread instead of blocking the loop."""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self._get_redis, key)
+
+    def _get_redis(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self._redis_key(key))
+        except redis.RedisError:
+            self.redis_errors += 1
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value) # Promote so the next lookup stays in-process
+        return value
+
+    def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        self._set_redis(key, value)
+
+    async def set_async(self, key: str, value: Any):
+        self.local.set(key, value)
+        await asyncio.to_thread(self._set_redis, key, value)
+
+    def _set_redis(self, key: str, value: Any):
+        try:
+            self.client.set(self._redis_key(key), json.dumps(value), ex=self.redis_ttl)
+        except redis.RedisError:
+            self.redis_errors += 1
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        try:
+            self.client.delete(self._redis_key(key))
+        except redis.RedisError:
+            self.redis_errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+            "local_size": len(self.local),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors,
+        }
+
+    def report_stats(self):
+        """
+        Add the counters' growth since the last report to the totals in Redis,
+        which sum every process's lookups for /metrics.
+        """
+        stats = self.stats()
+        deltas = {name: stats[name] - self._reported.get(name, 0) for name in SHARED_COUNTERS}
+        if not any(deltas.values()):
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for name, delta in deltas.items():
+                if delta:
+                    pipe.hincrby(_stats_key(self.namespace), name, delta)
+            pipe.execute()
+        except redis.RedisError:
+            return # Reported with the next batch
+        self._reported = {name: stats[name] for name in SHARED_COUNTERS}
+
+
+def _tiered(namespace: str) -> TieredCache:
+    return TieredCache(
+        namespace,
+        local_ttl=settings.ENRICHMENT_CACHE_LOCAL_TTL_SECONDS,
+        redis_ttl=settings.ENRICHMENT_CACHE_REDIS_TTL_SECONDS,
+        local_maxsize=settings.ENRICHMENT_CACHE_LOCAL_MAXSIZE,
+    )
+
+
+# Property data is keyed by normalized address, social data by canonical email
+property_cache = _tiered("enrich:property")
+social_cache = _tiered("enrich:social")
+
+
+_caches = {
+    "property_data": property_cache,
+    "social_data": social_cache,
+}
+_reported_at = 0.0
+
+
+def enrichment_cache_stats() -> dict:
+    """This process's counters, per provider."""
+    return {provider: cache.stats() for provider, cache in _caches.items()}
+
+
+async def report_enrichment_cache_stats():
+    """Push the counters to Redis, at most every ENRICHMENT_CACHE_STATS_INTERVAL_SECONDS."""
+    global _reported_at
+    now = time.monotonic()
+    if now - _reported_at < settings.ENRICHMENT_CACHE_STATS_INTERVAL_SECONDS:
+        return
+    _reported_at = now
+    for cache in _caches.values():
+        await asyncio.to_thread(cache.report_stats)
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition of the enrichment cache counters, summed over every process."""
+    lookups = [
+        "# HELP enrichment_cache_lookups_total Enrichment result cache lookups by provider, tier and result.",
+        "# TYPE enrichment_cache_lookups_total counter",
+    ]
+    errors = [
+        "# HELP enrichment_cache_redis_errors_total Enrichment cache reads and writes that failed on Redis.",
+        "# TYPE enrichment_cache_redis_errors_total counter",
+    ]
+    for provider, cache in _caches.items():
+        totals = get_redis().hgetall(_stats_key(cache.namespace))
+        for counter, (tier, result) in LOOKUP_COUNTERS.items():
+            lookups.append(
+                f'enrichment_cache_lookups_total{{provider="{provider}",tier="{tier}",result="{result}"}} '
+                f'{int(totals.get(counter, 0))}'
+            )
+        errors.append(f'enrichment_cache_redis_errors_total{{provider="{provider}"}} {int(totals.get("redis_errors", 0))}')
+    return "\n".join(lookups + errors) + "\n"
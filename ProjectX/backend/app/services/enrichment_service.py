@@ -1,15 +1,22 @@
+import asyncio
 import random
-import time
+from typing import Optional
 
-def enrich_lead_data(email: str, phone: str = None, address: str = None):
+import httpx
+
+from app.core.config import settings
+from app.core.http import get_http_client, run_async
+from app.core.normalize import normalize_address, normalize_email
+from app.services.enrichment_cache import property_cache, report_enrichment_cache_stats, social_cache
+
+
+async def fetch_property_data(client: httpx.AsyncClient, email: str, phone: str = None, address: str = None):
     """
-    Mock Service: Simulates 'Deep Recon' by fetching data from Mashvisor (Property), 
-    Clay (Social), and others.
+    Mock Provider: Mashvisor/Estated property lookup by address.
     """
-    time.sleep(2) # Simulate API latency
-    
-    # 1. Property Data (Mock Mashvisor)
-    property_data = {
+    await asyncio.sleep(1.2) # Simulate API latency
+
+    return {
         "sqft": random.randint(1500, 3500),
         "lot_size": round(random.uniform(0.1, 0.5), 2),
         "year_built": random.randint(1980, 2020),
@@ -23,24 +30,126 @@ def enrich_lead_data(email: str, phone: str = None, address: str = None):
             {"year": 2022, "tax": 8200}
         ]
     }
-    
-    # 2. Social Data (Mock Clay/Apollo)
-    social_data = {
+
+
+async def fetch_social_data(client: httpx.AsyncClient, email: str, phone: str = None, address: str = None):
+    """
+    Mock Provider: Clay/Apollo identity lookup by email.
+    """
+    await asyncio.sleep(0.8) # Simulate API latency
+
+    return {
         "linkedin_url": f"https://linkedin.com/in/{email.split('@')[0]}",
         "job_title": random.choice(["VP of Engineering", "Senior Marketing Manager", "Small Business Owner", "Surgeon"]),
         "company_name": random.choice(["Tech Corp", "Local Hospital", "Real Estate Ventures", "Global Inc"]),
         "verified_email": email
     }
-    
-    # 3. Generate Sales Cheat Sheet (Heuristic Rule-Based for Mock)
+
+
+# Result key -> provider. All providers for a lead are queried at once.
+PROVIDERS = {
+    "property_data": fetch_property_data,
+    "social_data": fetch_social_data,
+}
+
+# Result key -> (cache, cache key builder taking (email, address, zip_code))
+PROVIDER_CACHES = {
+    "property_data": (property_cache, lambda email, address, zip_code: normalize_address(address, zip_code)),
+    "social_data": (social_cache, lambda email, address, zip_code: normalize_email(email)),
+}
+
+
+async def _call_provider(name: str, fetch, client, email, phone, address):
+    """
+    Run one provider under its own timeout. Failures become a missing result
+    instead of failing the whole enrichment.
+    """
+    timeout = settings.ENRICHMENT_PROVIDER_TIMEOUTS.get(name, settings.ENRICHMENT_PROVIDER_TIMEOUT_SECONDS)
+    try:
+        return await asyncio.wait_for(fetch(client, email, phone, address), timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"[Enrichment] {name} timed out after {timeout}s")
+    except Exception as e:
+        print(f"[Enrichment] {name} failed: {e!r}")
+    return None
+
+
+def build_sales_cheat_sheet(property_data: Optional[dict], social_data: Optional[dict]):
+    """
+    Heuristic Rule-Based cheat sheet (Mock). Rules whose provider data is missing are skipped.
+    """
     cheat_sheet = []
-    if property_data["year_built"] < 2000:
-        cheat_sheet.append("⚠️ Home built before 2000: HVAC likely nearing end of life.")
-    if property_data["estimated_value"] > 800000:
-        cheat_sheet.append("💰 High-Value Property: Pitch premium 'Inverter' systems.")
-    if "Owner" in social_data["job_title"] or "VP" in social_data["job_title"]:
-        cheat_sheet.append("👔 Decision Maker: Likely values time and efficiency over lowest price.")
-        
+    if property_data:
+        if property_data["year_built"] < 2000:
+            cheat_sheet.append("⚠️ Home built before 2000: HVAC likely nearing end of life.")
+        if property_data["estimated_value"] > 800000:
+            cheat_sheet.append("💰 High-Value Property: Pitch premium 'Inverter' systems.")
+    if social_data:
+        if "Owner" in social_data["job_title"] or "VP" in social_data["job_title"]:
+            cheat_sheet.append("👔 Decision Maker: Likely values time and efficiency over lowest price.")
+    return cheat_sheet
+
+
+async def enrich_lead_data_async(
+    email: str,
+    phone: str = None,
+    address: str = None,
+    zip_code: str = None,
+    client: httpx.AsyncClient = None,
+    use_cache: bool = True,
+):
+    """
+    'Deep Recon': query every provider (Mashvisor property, Clay social, ...)
+    concurrently over one pooled HTTP client, so latency is the slowest
+    provider's rather than the sum. Providers that fail or time out are
+    listed in `missing_providers` and their data is None.
+    Cached results (by normalized address / email) skip the provider call;
+    use_cache=False forces fresh lookups (which then refresh the cache).
+    """
+    data, cache_keys = {}, {}
+    if settings.ENRICHMENT_CACHE_ENABLED:
+        for name, (_, build_key) in PROVIDER_CACHES.items():
+            key = build_key(email, address, zip_code)
+            if key:
+                cache_keys[name] = key
+        if use_cache:
+            # Async lookups: many enrichments share this loop, so never block it on Redis
+            values = await asyncio.gather(*(
+                PROVIDER_CACHES[name][0].get_async(key) for name, key in cache_keys.items()
+            ))
+            data.update(zip(cache_keys, values))
+    cached = [name for name, value in data.items() if value is not None]
+
+    names = [name for name in PROVIDERS if name not in cached]
+    client = client or get_http_client()
+    results = await asyncio.gather(*(
+        _call_provider(name, PROVIDERS[name], client, email, phone, address) for name in names
+    ))
+    data.update(zip(names, results))
+    await asyncio.gather(*(
+        PROVIDER_CACHES[name][0].set_async(cache_keys[name], result)
+        for name, result in zip(names, results)
+        if result is not None and name in cache_keys
+    ))
+    if settings.ENRICHMENT_CACHE_ENABLED:
+        await report_enrichment_cache_stats()
+
+    property_data = data["property_data"]
+    social_data = data["social_data"]
+
     return {
-        "social_profile_url": "https://linkedin.com/in/example-profile"
+        "property_data": property_data,
+        "social_data": social_data,
+        "sales_cheat_sheet": build_sales_cheat_sheet(property_data, social_data),
+        "social_profile_url": social_data["linkedin_url"] if social_data else None,
+        "job_title": social_data["job_title"] if social_data else None,
+        "missing_providers": [name for name in names if data[name] is None],
+        "cached_providers": cached,
     }
+
+
+def enrich_lead_data(email: str, phone: str = None, address: str = None, zip_code: str = None, use_cache: bool = True):
+    """
+    Sync entry point for Celery tasks; runs on the shared per-process event loop.
+    """
+    return run_async(enrich_lead_data_async(email, phone, address, zip_code=zip_code, use_cache=use_cache))
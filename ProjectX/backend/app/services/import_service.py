@@ -0,0 +1,160 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.schemas.lead import LeadCreate
+from app.services.ingest_service import commit_leads_chunk, queue_enrichment
+
+# (line number, parsed payload, parse error)
+ImportRecord = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_text_lines(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decode an upload incrementally and yield one line at a time.
+    Only the current partial line is buffered, never the whole body.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in byte_chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[ImportRecord]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(payload, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, payload, None
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[ImportRecord]:
+    """
+    Parse CSV from a line stream. A record whose quoted field spans several
+    lines is re-assembled by tracking quote parity before handing it to `csv`.
+    """
+    header = None
+    record_lines: List[str] = []
+    record_start = 0
+    quotes = 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not record_lines:
+            record_start = line_no
+        record_lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue # Still inside a quoted field
+
+        values = next(csv.reader(["\n".join(record_lines)]), [])
+        record_lines, quotes = [], 0
+        if not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield record_start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells fall back to the schema defaults
+        yield record_start, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if record_lines:
+        yield record_start, None, "Unterminated quoted field"
+
+
+async def import_leads_stream(
+    db: Session,
+    byte_chunks: AsyncIterator[bytes],
+    fmt: str,
+    source: str = "vendor_import",
+    enrich: bool = True,
+    organization_id: Optional[int] = None,
+) -> dict:
+    """
+    Stream an NDJSON/CSV upload into `leads`, for `organization_id` when
+    given (overriding the rows' own). Rows are validated against LeadCreate
+    and committed every LEAD_IMPORT_CHUNK_SIZE rows. The next part of the
+    body is only read once the current chunk is committed, so a slow
+    database pushes back on the client instead of growing memory.
+    """
+    parse = iter_csv_records if fmt == "csv" else iter_ndjson_records
+    status = "verified" if enrich else "pending"
+
+    result = {
+        "rows_received": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "failed": 0,
+        "chunks_committed": 0,
+        "enrichment_tasks": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+
+    def add_error(line_no: int, message: str):
+        result["failed"] += 1
+        if len(result["errors"]) < settings.LEAD_IMPORT_MAX_ERRORS:
+            result["errors"].append({"row": line_no, "error": message})
+        else:
+            result["errors_truncated"] = True
+
+    async def flush(chunk):
+        leads_in = [lead_in for _, lead_in in chunk]
+        lead_ids, created_ids, errors = await run_in_threadpool(commit_leads_chunk, db, leads_in, status, source)
+        for position, message in errors.items():
+            add_error(chunk[position][0], message)
+        result["imported"] += len(created_ids)
+        result["duplicates"] += len(lead_ids) - len(errors) - len(created_ids)
+        result["chunks_committed"] += 1
+        if enrich:
+            # Duplicates resolve to leads that were already enriched (or queued)
+            result["enrichment_tasks"] += queue_enrichment(created_ids)
+
+    chunk: List[Tuple[int, LeadCreate]] = []
+    async for line_no, payload, error in parse(iter_text_lines(byte_chunks)):
+        result["rows_received"] += 1
+        if error:
+            add_error(line_no, error)
+            continue
+        try:
+            lead_in = LeadCreate.model_validate(payload)
+            if organization_id is not None:
+                lead_in.organization_id = organization_id
+            chunk.append((line_no, lead_in))
+        except ValidationError as e:
+            add_error(line_no, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+
+        if len(chunk) >= settings.LEAD_IMPORT_CHUNK_SIZE:
+            await flush(chunk)
+            chunk = []
+
+    if chunk:
+        await flush(chunk)
+
+    return result
@@ -0,0 +1,175 @@
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+import redis
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.schemas.lead import LeadCreate
+from app.services.ingest_service import commit_leads_chunk
+
+# (stream entry id, fields)
+StreamEntry = Tuple[str, dict]
+
+
+def _entry_age_seconds(entry_id: Optional[str], now_ms: int) -> Optional[float]:
+    # Stream ids are "<ms timestamp>-<seq>"
+    if not entry_id:
+        return None
+    return max(now_ms - int(entry_id.split("-")[0]), 0) / 1000
+
+
+class LeadIngestBuffer:
+    """
+    Write-behind buffer for lead ingest on top of a Redis stream.
+    The API appends and returns immediately; flushers read through a consumer
+    group and only XACK after the rows are committed, so every accepted lead
+    is written at least once even if a flusher dies mid-batch.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, consumer: Optional[str] = None):
+        self.client = client or get_redis()
+        self.stream = settings.LEAD_INGEST_STREAM
+        self.group = settings.LEAD_INGEST_GROUP
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def append(self, lead_in: LeadCreate, source: str = "web_form") -> str:
+        """Accept a lead into the buffer. Returns the stream entry id (the ingest id)."""
+        return self.client.xadd(self.stream, {
+            "lead": lead_in.model_dump_json(),
+            "source": source,
+        })
+
+    def read_batch(self, count: int) -> List[StreamEntry]:
+        """
+        Claim up to `count` entries: first ones another flusher left pending for
+        too long, then new ones.
+        """
+        self.ensure_group()
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=settings.LEAD_INGEST_CLAIM_IDLE_MS, start_id="0-0", count=count,
+        )
+        entries = [entry for entry in entries if entry[1]] # Skip entries deleted while pending
+        if len(entries) < count:
+            response = self.client.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=count - len(entries)
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+        return entries
+
+    def ack(self, entry_ids: List[str]):
+        """Acknowledge flushed entries and drop them so the stream only holds unflushed leads."""
+        if not entry_ids:
+            return
+        pipe = self.client.pipeline(transaction=True)
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.xdel(self.stream, *entry_ids)
+        pipe.execute()
+
+    def dead_letter(self, entry_id: str, fields: dict, error: str):
+        self.client.xadd(settings.LEAD_INGEST_DEAD_LETTER_STREAM, {
+            **fields, "ingest_id": entry_id, "error": error,
+        })
+
+    def record_results(self, results: List[Tuple[str, int]]):
+        """Remember ingest id -> lead id so clients can look their lead up after the flush."""
+        if not results:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for entry_id, lead_id in results:
+            pipe.set(f"{self.stream}:result:{entry_id}", lead_id, ex=settings.LEAD_INGEST_RESULT_TTL_SECONDS)
+        pipe.execute()
+
+    def get_result(self, entry_id: str) -> Optional[int]:
+        lead_id = self.client.get(f"{self.stream}:result:{entry_id}")
+        return int(lead_id) if lead_id is not None else None
+
+    def is_pending(self, entry_id: str) -> bool:
+        return bool(self.client.xrange(self.stream, min=entry_id, max=entry_id, count=1))
+
+    def stats(self) -> dict:
+        """Lag metrics for the buffer."""
+        self.ensure_group()
+        now_ms = int(time.time() * 1000)
+
+        pending = self.client.xpending(self.stream, self.group)
+        group_info = next(
+            (g for g in self.client.xinfo_groups(self.stream) if g["name"] == self.group), {}
+        )
+        oldest = self.client.xrange(self.stream, count=1)
+
+        return {
+            "stream_length": self.client.xlen(self.stream),
+            "pending": pending["pending"],
+            "lag": group_info.get("lag"), # Entries not yet delivered to any flusher (Redis >= 7)
+            "consumers": group_info.get("consumers", 0),
+            "oldest_pending_age_seconds": _entry_age_seconds(pending["min"], now_ms),
+            "oldest_entry_age_seconds": _entry_age_seconds(oldest[0][0] if oldest else None, now_ms),
+            "dead_letters": self.client.xlen(settings.LEAD_INGEST_DEAD_LETTER_STREAM),
+        }
+
+
+def flush_ingest_buffer(db: Session, buffer: LeadIngestBuffer, max_batches: Optional[int] = None) -> dict:
+    """
+    Drain the buffer into `leads` in batches.
+    Entries are acked only after their batch commits; on a database failure the
+    batch stays pending and is re-delivered after LEAD_INGEST_CLAIM_IDLE_MS.
+    Rows the database rejects on their own are moved to the dead-letter stream.
+    Entries resolved to an existing lead count as duplicates, not inserts.
+    """
+    max_batches = max_batches or settings.LEAD_INGEST_FLUSH_MAX_BATCHES
+    totals = {"batches": 0, "inserted": 0, "duplicates": 0, "dead_lettered": 0}
+
+    for _ in range(max_batches):
+        entries = buffer.read_batch(settings.LEAD_INGEST_FLUSH_BATCH)
+        if not entries:
+            break
+
+        by_source = defaultdict(list)
+        for entry_id, fields in entries:
+            try:
+                lead_in = LeadCreate.model_validate_json(fields["lead"])
+            except (KeyError, ValidationError) as e:
+                buffer.dead_letter(entry_id, fields, f"Invalid payload: {e.__class__.__name__}")
+                buffer.ack([entry_id])
+                totals["dead_lettered"] += 1
+                continue
+            by_source[fields.get("source", "web_form")].append((entry_id, fields, lead_in))
+
+        for source, items in by_source.items():
+            lead_ids, created_ids, errors = commit_leads_chunk(db, [lead_in for _, _, lead_in in items], source=source)
+            for position, message in errors.items():
+                entry_id, fields, _ = items[position]
+                buffer.dead_letter(entry_id, fields, message)
+                totals["dead_lettered"] += 1
+
+            results = [(items[i][0], lead_id) for i, lead_id in enumerate(lead_ids) if lead_id is not None]
+            for entry_id, lead_id in results:
+                # Trigger Mock OTP (Log to console), same as the synchronous ingest path
+                print(f"DTO: Sending OTP for Lead {lead_id} (ingest {entry_id}): 123456")
+            buffer.record_results(results)
+            buffer.ack([entry_id for entry_id, _, _ in items])
+            totals["inserted"] += len(created_ids)
+            totals["duplicates"] += len(results) - len(created_ids)
+
+        totals["batches"] += 1
+
+    return totals
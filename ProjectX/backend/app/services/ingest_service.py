@@ -0,0 +1,218 @@
+import csv
+import io
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.normalize import normalize_email, normalize_phone
+from app.models.lead import Lead
+from app.schemas.lead import LeadCreate
+from app.services.dedupe_service import find_conflicting_lead, remember_contacts, resolve_duplicates
+from app.services.lead_stats_service import apply_lead_stats, stats_key
+from app.services.lead_writes import mark_leads_written
+
+# Columns written by the bulk ingest paths, in COPY order.
+LEAD_INGEST_COLUMNS = (
+    "organization_id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "address",
+    "zip_code",
+    "city",
+    "state",
+    "status",
+    "source",
+    "email_normalized",
+    "phone_e164",
+)
+
+
+class LeadInsertResult(NamedTuple):
+    lead_ids: List[int] # One id per input row, in input order (duplicates map to the existing lead)
+    created_ids: List[int] # Ids of the rows actually inserted
+
+
+def _lead_rows(leads_in: Sequence[LeadCreate], status: str, source: str) -> List[dict]:
+    rows = []
+    for lead_in in leads_in:
+        row = lead_in.model_dump(include=set(LEAD_INGEST_COLUMNS))
+        row["status"] = status
+        row["source"] = source
+        row["email_normalized"] = normalize_email(lead_in.email)
+        row["phone_e164"] = normalize_phone(lead_in.phone)
+        rows.append(row)
+    return rows
+
+
+def _copy_insert(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Postgres fast path: COPY the rows into a temp staging table, then move them
+    into `leads` with a single INSERT ... SELECT.
+    Ids come from the `leads` sequence in staging order, so sorting the returned
+    ids gives them back in request order.
+    """
+    columns = ", ".join(LEAD_INGEST_COLUMNS)
+    select_list = ", ".join(("organization_id::integer",) + LEAD_INGEST_COLUMNS[1:])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for ordinal, row in enumerate(rows):
+        writer.writerow([ordinal] + [r"\N" if row[col] is None else row[col] for col in LEAD_INGEST_COLUMNS])
+    buffer.seek(0)
+
+    dbapi = db.get_bind().dialect.loaded_dbapi
+    cursor = db.connection().connection.cursor()
+
+    def run(statement: str, copy_from: Optional[io.StringIO] = None):
+        # The raw cursor skips SQLAlchemy's exception translation; do it here so a
+        # rejected row (FK, unique contact) raises IntegrityError as on the INSERT
+        # path, and callers roll back and fall back to row-by-row.
+        try:
+            if copy_from is None:
+                cursor.execute(statement)
+            else:
+                cursor.copy_expert(statement, copy_from)
+        except dbapi.Error as e:
+            raise DBAPIError.instance(statement, None, e, dbapi.Error) from e
+
+    try:
+        run(
+            "CREATE TEMP TABLE IF NOT EXISTS lead_ingest_staging "
+            f"(ordinal integer, {', '.join(f'{col} text' for col in LEAD_INGEST_COLUMNS)}) "
+            "ON COMMIT DELETE ROWS"
+        )
+        run(
+            f"COPY lead_ingest_staging (ordinal, {columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+        run(
+            f"INSERT INTO leads ({columns}, meta_data) "
+            f"SELECT {select_list}, '{{}}'::jsonb "
+            "FROM lead_ingest_staging ORDER BY ordinal RETURNING id"
+        )
+        ids = sorted(row[0] for row in cursor.fetchall())
+        run("TRUNCATE lead_ingest_staging")
+    finally:
+        cursor.close()
+    return ids
+
+
+def _insert_rows(db: Session, rows: List[dict]) -> List[int]:
+    if not rows:
+        return []
+    if db.get_bind().dialect.name == "postgresql" and len(rows) >= settings.LEAD_COPY_THRESHOLD:
+        return _copy_insert(db, rows)
+
+    for row in rows:
+        row["meta_data"] = {}
+    result = db.execute(
+        insert(Lead).returning(Lead.id, sort_by_parameter_order=True),
+        rows,
+    )
+    return [row.id for row in result]
+
+
+def bulk_insert_leads(
+    db: Session,
+    leads_in: Sequence[LeadCreate],
+    status: str = "pending",
+    source: str = "web_form",
+    use_contact_index: bool = True,
+) -> LeadInsertResult:
+    """
+    Insert many leads in one statement and return their ids in input order.
+    Uses COPY on Postgres and an ordered multi-row INSERT elsewhere.
+    Rows whose normalized email/phone already exist in the organization (or
+    earlier in the batch) are not inserted and resolve to that lead's id.
+    Pass `use_contact_index=False` to retry after an IntegrityError: every
+    contact is then checked against the database, not just those the
+    process's Bloom filter knows.
+    The caller owns the transaction (commit/rollback).
+    """
+    if not leads_in:
+        return LeadInsertResult([], [])
+
+    rows = _lead_rows(leads_in, status, source)
+    duplicates = resolve_duplicates(db, rows, use_index=use_contact_index)
+
+    new_positions = [p for p in range(len(rows)) if p not in duplicates]
+    new_rows = [rows[p] for p in new_positions]
+    created_ids = _insert_rows(db, new_rows)
+    remember_contacts(new_rows)
+    mark_leads_written(db, {row["organization_id"] for row in new_rows})
+    apply_lead_stats(db, Counter(
+        stats_key(row["organization_id"], None, row["status"], row["source"]) for row in new_rows
+    ))
+
+    lead_ids: List[Optional[int]] = [None] * len(rows)
+    for position, lead_id in zip(new_positions, created_ids):
+        lead_ids[position] = lead_id
+    # Existing-lead matches first: an in-batch repeat may point at one of them
+    for kind in ("lead", "row"):
+        for position, (match_kind, ref) in duplicates.items():
+            if match_kind == kind:
+                lead_ids[position] = ref if kind == "lead" else lead_ids[ref]
+
+    return LeadInsertResult(lead_ids, created_ids)
+
+
+def commit_leads_chunk(
+    db: Session,
+    leads_in: Sequence[LeadCreate],
+    status: str = "pending",
+    source: str = "web_form",
+) -> Tuple[List[Optional[int]], List[int], Dict[int, str]]:
+    """
+    Insert and commit one chunk of leads. If the multi-row insert fails, fall
+    back to row-by-row savepoints so only the offending rows are rejected.
+    Connection-level errors are not caught here and propagate to the caller.
+    Returns the lead ids aligned with `leads_in` (None where a row failed),
+    the ids actually created, and the database error for each failed position.
+    """
+    try:
+        result = bulk_insert_leads(db, leads_in, status=status, source=source)
+        db.commit()
+        return result.lead_ids, result.created_ids, {}
+    except SQLAlchemyError:
+        db.rollback()
+
+    lead_ids, created_ids, errors = [], [], {}
+    for position, lead_in in enumerate(leads_in):
+        try:
+            with db.begin_nested():
+                result = bulk_insert_leads(db, [lead_in], status=status, source=source)
+            lead_ids.extend(result.lead_ids)
+            created_ids.extend(result.created_ids)
+        except (IntegrityError, DataError) as e:
+            # Lost a race with another writer for the same contact?
+            existing = find_conflicting_lead(
+                db, lead_in.organization_id, normalize_email(lead_in.email), normalize_phone(lead_in.phone)
+            )
+            lead_ids.append(existing.id if existing else None)
+            if not existing:
+                errors[position] = f"Database error: {e.__class__.__name__}"
+    db.commit()
+    return lead_ids, created_ids, errors
+
+
+def queue_enrichment(lead_ids: Sequence[int]) -> int:
+    """
+    Fan enrichment out as grouped Celery work: one batch task per chunk of
+    leads instead of one `process_lead_enrichment.delay` per lead.
+    Returns the number of tasks queued.
+    """
+    if not lead_ids:
+        return 0
+
+    from app.worker import process_lead_enrichment_batch
+
+    chunk_size = settings.ENRICHMENT_CHUNK_SIZE
+    lead_ids = list(lead_ids)
+    for start in range(0, len(lead_ids), chunk_size):
+        process_lead_enrichment_batch.delay(lead_ids[start:start + chunk_size])
+    return (len(lead_ids) + chunk_size - 1) // chunk_size
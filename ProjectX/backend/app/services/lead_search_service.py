@@ -0,0 +1,152 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Set
+
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.models.lead import Lead, search_document
+
+SEARCH_COLUMNS = (
+    Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.phone,
+    Lead.address, Lead.zip_code, Lead.status, Lead.lead_score,
+)
+# pg_trgm's default word_similarity_threshold; the fallback index uses the same cut-off
+WORD_SIMILARITY_THRESHOLD = 0.6
+# pg_trgm extracts no trigram a shorter ILIKE pattern could use, so shorter
+# queries only match word prefixes
+MIN_SUBSTRING_QUERY_LENGTH = 3
+_WORD = re.compile(r"\w+")
+
+_document = search_document(Lead.first_name, Lead.last_name, Lead.email, Lead.address)
+_tsvector = func.to_tsvector(literal_column("'simple'"), _document)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _postgres_search(db: Session, organization_id: int, query: str, limit: int) -> List[dict]:
+    """
+    Matches a substring (trigram index), a fuzzy word (word similarity, so
+    typos still hit) or word prefixes (tsvector index). Ranked by word
+    similarity plus full-text rank. Queries shorter than
+    MIN_SUBSTRING_QUERY_LENGTH only match word prefixes.
+    """
+    words = _WORD.findall(query)
+    matches, rank = [], None
+    if len(query) >= MIN_SUBSTRING_QUERY_LENGTH:
+        matches += [_document.ilike(_like_pattern(query)), _document.op("%>")(query)]
+        rank = func.word_similarity(query, _document)
+    if words:
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{word}:*" for word in words))
+        matches.append(_tsvector.op("@@")(tsquery))
+        text_rank = func.ts_rank_cd(_tsvector, tsquery)
+        rank = text_rank if rank is None else rank + text_rank
+    if not matches:
+        return []
+
+    rows = db.execute(
+        select(*SEARCH_COLUMNS, rank.label("rank"))
+        .where(Lead.organization_id == organization_id)
+        .where(or_(*matches))
+        .order_by(rank.desc(), Lead.id.desc())
+        .limit(limit)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word lowercased and padded ('  w', ' wo', 'wor', ...)."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index over one org's search documents, for databases
+    without pg_trgm (SQLite in tests). Scores mirror pg_trgm's
+    word_similarity closely enough to rank the same leads first.
+    """
+
+    def __init__(self, documents: Dict[int, str]):
+        self.documents = documents
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        for lead_id, document in documents.items():
+            for gram in trigrams(document):
+                self.postings[gram].add(lead_id)
+
+    def search(self, query: str, limit: int) -> List[tuple]:
+        """(lead_id, rank) pairs, best first."""
+        query = query.lower()
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            for lead_id in self.postings.get(gram, ()):
+                shared[lead_id] += 1
+
+        words = _WORD.findall(query)
+        substring = len(query) >= MIN_SUBSTRING_QUERY_LENGTH
+        candidates = set(shared)
+        if not query_grams:
+            candidates = set(self.documents) # Punctuation-only query: substring match only
+        hits = []
+        for lead_id in candidates:
+            document = self.documents[lead_id]
+            similarity = shared[lead_id] / len(query_grams) if query_grams and substring else 0.0
+            document_words = _WORD.findall(document)
+            prefix = bool(words) and all(any(w.startswith(q) for w in document_words) for q in words)
+            if (substring and query in document) or prefix or similarity >= WORD_SIMILARITY_THRESHOLD:
+                hits.append((lead_id, similarity + (0.1 if prefix else 0.0)))
+        hits.sort(key=lambda hit: (-hit[1], -hit[0]))
+        return hits[:limit]
+
+
+# Fallback indexes per (org, fingerprint of its leads): the fingerprint is read
+# from the database on every search, so inserts, deletes and edits made by
+# any process rebuild the index, with or without Redis
+_fallback_indexes = TTLCache(maxsize=32, ttl=300)
+
+
+def _leads_fingerprint(db: Session, organization_id: int) -> tuple:
+    return tuple(db.execute(
+        select(func.count(), func.max(Lead.id), func.max(Lead.updated_at))
+        .where(Lead.organization_id == organization_id)
+    ).one())
+
+
+def _fallback_index(db: Session, organization_id: int) -> TrigramIndex:
+    key = (organization_id, _leads_fingerprint(db, organization_id))
+    index = _fallback_indexes.get(key)
+    if index is None:
+        rows = db.execute(select(Lead.id, _document).where(Lead.organization_id == organization_id))
+        index = TrigramIndex({lead_id: document for lead_id, document in rows})
+        _fallback_indexes.set(key, index)
+    return index
+
+
+def _fallback_search(db: Session, organization_id: int, query: str, limit: int) -> List[dict]:
+    hits = _fallback_index(db, organization_id).search(query, limit)
+    if not hits:
+        return []
+    rows = {row.id: row for row in db.execute(select(*SEARCH_COLUMNS).where(Lead.id.in_([i for i, _ in hits])))}
+    return [{**rows[lead_id]._mapping, "rank": rank} for lead_id, rank in hits if lead_id in rows]
+
+
+def search_leads(db: Session, organization_id: int, query: str, limit: int) -> List[dict]:
+    """
+    Typeahead search over the org's leads by name, email or street fragment.
+    Postgres uses the trigram/tsvector indexes; other databases an in-process
+    trigram index.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _postgres_search(db, organization_id, query, limit)
+    return _fallback_search(db, organization_id, query, limit)
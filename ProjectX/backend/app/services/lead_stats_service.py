@@ -0,0 +1,153 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.models.analytics import LeadDailyStats
+from app.models.lead import Lead
+
+# lead_daily_stats is maintained incrementally, in the same transaction as the
+# lead write: +1 on insert, and -1/+1 on a status change (a lead stays on the
+# day it was created). ORM writes are rolled up automatically at flush; Core
+# statements (bulk INSERT/UPDATE, COPY) must pass their deltas to
+# `apply_lead_stats` themselves.
+
+UNKNOWN_SOURCE = "unknown"
+DEFAULT_STATUS = "pending"
+TIMESERIES_DIMENSIONS = ("status", "source")
+
+StatsKey = Tuple[int, date, str, str] # (organization_id, day, status, source)
+
+
+def _day(created_at: Optional[datetime]) -> date:
+    if created_at is None:
+        return datetime.now(timezone.utc).date() # Being inserted now
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def stats_key(organization_id: int, created_at: Optional[datetime], status: Optional[str], source: Optional[str]) -> StatsKey:
+    return (organization_id, _day(created_at), status or DEFAULT_STATUS, source or UNKNOWN_SOURCE)
+
+
+def apply_lead_stats(db: Session, deltas: Counter):
+    """
+    Add count deltas to the rollup in the caller's transaction, as one upsert.
+    Rows are written in key order so concurrent writers lock them in the same
+    order and cannot deadlock.
+    """
+    rows = [
+        {"organization_id": key[0], "day": key[1], "status": key[2], "source": key[3], "leads": delta}
+        for key, delta in sorted(deltas.items()) if delta
+    ]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    insert_fn = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert_fn(LeadDailyStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LeadDailyStats.organization_id, LeadDailyStats.day, LeadDailyStats.status, LeadDailyStats.source],
+        set_={"leads": LeadDailyStats.leads + stmt.excluded.leads},
+    )
+    db.execute(stmt)
+
+
+def status_change_deltas(changes) -> Counter:
+    """Deltas for (lead, new status) pairs, from the leads' currently loaded status."""
+    deltas = Counter()
+    for lead, status in changes:
+        if lead.status != status:
+            deltas[stats_key(lead.organization_id, lead.created_at, lead.status, lead.source)] -= 1
+            deltas[stats_key(lead.organization_id, lead.created_at, status, lead.source)] += 1
+    return deltas
+
+
+@event.listens_for(Lead.status, "set", active_history=True)
+def _load_previous_status(target, value, oldvalue, initiator):
+    # Registered for active_history: the ORM loads an expired status before it
+    # is overwritten, so the flush below always sees both sides of a change.
+    return value
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _roll_up_lead_writes(session: Session, flush_context):
+    deltas = Counter()
+    for lead in session.new:
+        if isinstance(lead, Lead):
+            deltas[stats_key(lead.organization_id, None, lead.status, lead.source)] += 1
+    for lead in session.dirty:
+        if isinstance(lead, Lead):
+            history = inspect(lead).attrs.status.history
+            if history.deleted and history.added:
+                deltas[stats_key(lead.organization_id, lead.created_at, history.deleted[0], lead.source)] -= 1
+                deltas[stats_key(lead.organization_id, lead.created_at, history.added[0], lead.source)] += 1
+    for lead in session.deleted:
+        if isinstance(lead, Lead):
+            deltas[stats_key(lead.organization_id, lead.created_at, lead.status, lead.source)] -= 1
+    apply_lead_stats(session, deltas)
+
+
+def _created_day(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", Lead.created_at))
+    return func.date(Lead.created_at)
+
+
+def rebuild_lead_daily_stats(db: Session, organization_id: int) -> int:
+    """
+    Recompute one org's rollup from `leads` and commit; returns the number of
+    rollup rows. On Postgres lead writes wait (SHARE lock) until the rebuild
+    commits, so no concurrent increment is lost or counted twice.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE leads IN SHARE MODE"))
+    db.execute(delete(LeadDailyStats).where(LeadDailyStats.organization_id == organization_id))
+
+    day = _created_day(db)
+    status = func.coalesce(Lead.status, DEFAULT_STATUS)
+    source = func.coalesce(Lead.source, UNKNOWN_SOURCE)
+    totals = (
+        select(Lead.organization_id, day, status, source, func.count())
+        .where(Lead.organization_id == organization_id)
+        .group_by(Lead.organization_id, day, status, source)
+    )
+    result = db.execute(
+        insert(LeadDailyStats).from_select(["organization_id", "day", "status", "source", "leads"], totals)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def lead_timeseries(db: Session, organization_id: int, start: date, end: date, by: str = "status") -> List[dict]:
+    """
+    Leads created per day in [start, end], split by their current status or
+    by source. Reads only the rollup, so cost depends on the range, not on
+    the number of leads. Days without leads are returned with zero counts.
+    """
+    dimension = LeadDailyStats.status if by == "status" else LeadDailyStats.source
+    rows = db.execute(
+        select(LeadDailyStats.day, dimension, func.sum(LeadDailyStats.leads))
+        .where(
+            LeadDailyStats.organization_id == organization_id,
+            LeadDailyStats.day >= start,
+            LeadDailyStats.day <= end,
+        )
+        .group_by(LeadDailyStats.day, dimension)
+    )
+    breakdowns: Dict[date, Dict[str, int]] = {}
+    for day, value, leads in rows:
+        if leads:
+            breakdowns.setdefault(day, {})[value] = int(leads)
+
+    points = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        breakdown = breakdowns.get(day, {})
+        points.append({"day": day, "total": sum(breakdown.values()), "breakdown": breakdown})
+    return points
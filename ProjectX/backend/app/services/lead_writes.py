@@ -0,0 +1,67 @@
+from typing import Iterable, Optional
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.redis import get_redis
+from app.db.base import SessionLocal
+from app.models.lead import Lead
+
+# Per-org "leads generation": a Redis counter bumped after every commit that
+# wrote one of the org's leads. Caches of per-org lead aggregates key on it,
+# so a write anywhere (API, worker, script) invalidates them in every process.
+#
+# ORM writes are picked up from the session automatically; Core statements
+# (bulk INSERT/UPDATE, COPY) must call `mark_leads_written` before commit.
+
+_SESSION_KEY = "lead_orgs_written"
+
+
+def _generation_key(organization_id: int) -> str:
+    return f"leads:generation:{organization_id}"
+
+
+def mark_leads_written(db: Session, organization_ids: Iterable[int]):
+    """Record that this transaction wrote leads of these orgs; announced on commit."""
+    db.info.setdefault(_SESSION_KEY, set()).update(organization_ids)
+
+
+def leads_generation(organization_id: int) -> Optional[int]:
+    """The org's current generation, or None when Redis is unreachable."""
+    try:
+        return int(get_redis().get(_generation_key(organization_id)) or 0)
+    except redis.RedisError:
+        return None
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_lead_writes(session: Session, flush_context):
+    organization_ids = {
+        obj.organization_id
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, Lead) and obj.organization_id is not None
+    }
+    if organization_ids:
+        mark_leads_written(session, organization_ids)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_generations(session: Session):
+    organization_ids = session.info.pop(_SESSION_KEY, None)
+    if not organization_ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for organization_id in organization_ids:
+            pipe.incr(_generation_key(organization_id))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"[LeadWrites] Could not bump generations for orgs {sorted(organization_ids)}: {e!r}")
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_lead_writes(session: Session, previous_transaction):
+    # Savepoint rollbacks keep what the enclosing transaction already wrote
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
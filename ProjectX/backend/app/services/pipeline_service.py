@@ -0,0 +1,479 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import redis
+from sqlalchemy import case, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.metrics import histogram_quantile
+from app.models.lead import Lead
+from app.models.pipeline import (
+    LeadStageTransition, Pipeline, PipelineStage, PipelineStageDuration, PipelineStageStats,
+)
+from app.core.redis import get_redis
+from app.schemas import pipeline as pipeline_schema
+from app.services.lead_writes import mark_leads_written
+
+DEFAULT_PIPELINE_NAME = "Sales Pipeline"
+DEFAULT_STAGES = (
+    {"name": "Initial Contact", "color": "bg-blue-500", "order": 0},
+    {"name": "Offer Made", "color": "bg-yellow-500", "order": 1},
+    {"name": "Negotiation", "color": "bg-purple-500", "order": 2},
+    {"name": "Closed Won", "color": "bg-green-500", "order": 3, "is_system_stage": True},
+    {"name": "Closed Lost", "color": "bg-red-500", "order": 4, "is_system_stage": True},
+)
+
+# Per-process cache: (org id, pipelines generation) -> serialized pipelines
+# with their stages. Every pipeline or stage write bumps the org's generation
+# in Redis (`invalidate_org_pipelines`), which retires the entry in all processes.
+_org_pipelines = TTLCache(maxsize=settings.PIPELINE_CACHE_MAXSIZE, ttl=settings.PIPELINE_CACHE_TTL_SECONDS)
+
+
+def _insert_fn(db: Session):
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def _pipelines_generation_key(organization_id: int) -> str:
+    return f"pipelines:generation:{organization_id}"
+
+
+def _pipelines_generation(organization_id: int) -> Optional[int]:
+    try:
+        return int(get_redis().get(_pipelines_generation_key(organization_id)) or 0)
+    except redis.RedisError:
+        return None # Fall back to the cache TTL
+
+
+def invalidate_org_pipelines(organization_id: int):
+    """Call after committing any change to the org's pipelines or stages."""
+    _org_pipelines.delete((organization_id, None))
+    try:
+        generation = get_redis().incr(_pipelines_generation_key(organization_id))
+    except redis.RedisError as e:
+        print(f"[Pipelines] Could not invalidate pipelines for org {organization_id}: {e!r}")
+        return
+    _org_pipelines.delete((organization_id, generation - 1))
+
+
+def ensure_default_pipeline(db: Session, organization_id: int) -> bool:
+    """
+    Create the org's default pipeline and stages unless it has one. An upsert
+    on the one-default-per-org index, so concurrent first requests cannot
+    create two. Commits; returns whether this call created it.
+    """
+    stmt = (
+        _insert_fn(db)(Pipeline)
+        .values(organization_id=organization_id, name=DEFAULT_PIPELINE_NAME, is_default=True)
+        .on_conflict_do_nothing(index_elements=[Pipeline.organization_id], index_where=Pipeline.is_default.is_(True))
+        .returning(Pipeline.id)
+    )
+    pipeline_id = db.execute(stmt).scalar()
+    if pipeline_id is not None:
+        db.execute(insert(PipelineStage), [
+            {"pipeline_id": pipeline_id, "is_system_stage": False, **stage} for stage in DEFAULT_STAGES
+        ])
+    db.commit()
+    if pipeline_id is not None:
+        invalidate_org_pipelines(organization_id)
+    return pipeline_id is not None
+
+
+def _load_org_pipelines(db: Session, organization_id: int) -> List[Pipeline]:
+    # Two statements however many pipelines: the pipelines, then all their stages
+    return (
+        db.query(Pipeline)
+        .options(selectinload(Pipeline.stages))
+        .filter(Pipeline.organization_id == organization_id)
+        .order_by(Pipeline.id)
+        .all()
+    )
+
+
+def org_pipelines(db: Session, organization_id: int) -> List[dict]:
+    """
+    The org's pipelines with stages (schema-shaped dicts), from the cache
+    when current. An org without pipelines gets the default one first.
+    """
+    key = (organization_id, _pipelines_generation(organization_id))
+    cached = _org_pipelines.get(key)
+    if cached is not None:
+        return cached
+
+    pipelines = _load_org_pipelines(db, organization_id)
+    if not pipelines:
+        ensure_default_pipeline(db, organization_id)
+        key = (organization_id, _pipelines_generation(organization_id))
+        pipelines = _load_org_pipelines(db, organization_id)
+
+    serialized = [pipeline_schema.Pipeline.model_validate(p).model_dump() for p in pipelines]
+    _org_pipelines.set(key, serialized)
+    return serialized
+
+
+class StageMove(NamedTuple):
+    lead_id: int
+    organization_id: int
+    from_stage_id: Optional[int]
+    to_stage_id: int
+    seconds_in_stage: Optional[float] # Time spent in from_stage, when its entry time is known
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _seconds_since(entered_at: Optional[datetime], now: datetime) -> Optional[float]:
+    if entered_at is None:
+        return None
+    if entered_at.tzinfo is None:
+        entered_at = entered_at.replace(tzinfo=timezone.utc) # SQLite drops the zone
+    return max((now - entered_at).total_seconds(), 0.0)
+
+
+def _duration_bucket(seconds: float) -> float:
+    for bound in settings.STAGE_DURATION_BUCKETS_SECONDS:
+        if seconds <= bound:
+            return float(bound)
+    return float("inf")
+
+
+def _upsert_increments(db: Session, model, index_elements: List, rows: List[dict], counters: Sequence[str]):
+    """INSERT rows, or add their counter columns to the existing row."""
+    stmt = _insert_fn(db)(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: getattr(model, col) + stmt.excluded[col] for col in counters},
+    )
+    db.execute(stmt)
+
+
+def record_stage_moves(db: Session, moves: Sequence[StageMove]):
+    """
+    Append moves to the transition log and update the per-stage counters and
+    time-in-stage histograms, in the caller's transaction. Counter rows are
+    written in key order so concurrent moves cannot deadlock on them.
+    """
+    if not moves:
+        return
+    stage_ids = {m.to_stage_id for m in moves} | {m.from_stage_id for m in moves if m.from_stage_id is not None}
+    pipeline_of = dict(db.execute(
+        select(PipelineStage.id, PipelineStage.pipeline_id).where(PipelineStage.id.in_(stage_ids))
+    ).all())
+
+    db.execute(insert(LeadStageTransition), [
+        {
+            "organization_id": m.organization_id,
+            "lead_id": m.lead_id,
+            "pipeline_id": pipeline_of[m.to_stage_id],
+            "from_stage_id": m.from_stage_id,
+            "to_stage_id": m.to_stage_id,
+            "seconds_in_stage": m.seconds_in_stage,
+        }
+        for m in moves
+    ])
+
+    stats = defaultdict(lambda: {"entered": 0, "exited": 0, "seconds_in_stage_sum": 0.0})
+    durations = Counter()
+    for m in moves:
+        stats[m.to_stage_id]["entered"] += 1
+        if m.from_stage_id is not None:
+            stats[m.from_stage_id]["exited"] += 1
+            if m.seconds_in_stage is not None:
+                stats[m.from_stage_id]["seconds_in_stage_sum"] += m.seconds_in_stage
+                durations[(m.from_stage_id, _duration_bucket(m.seconds_in_stage))] += 1
+
+    _upsert_increments(
+        db, PipelineStageStats, [PipelineStageStats.stage_id],
+        [{"stage_id": stage_id, "pipeline_id": pipeline_of[stage_id], **stats[stage_id]} for stage_id in sorted(stats)],
+        ("entered", "exited", "seconds_in_stage_sum"),
+    )
+    if durations:
+        _upsert_increments(
+            db, PipelineStageDuration, [PipelineStageDuration.stage_id, PipelineStageDuration.le],
+            [
+                {"stage_id": stage_id, "le": le, "pipeline_id": pipeline_of[stage_id], "leads": count}
+                for (stage_id, le), count in sorted(durations.items())
+            ],
+            ("leads",),
+        )
+
+
+def move_lead(db: Session, lead: Lead, stage: PipelineStage) -> Optional[StageMove]:
+    """
+    Put the lead in `stage` and record the move. Returns None if it is already
+    there. The caller should hold the lead's row lock (SELECT ... FOR UPDATE)
+    so two concurrent moves cannot both count the same exit, and commits.
+    """
+    if lead.stage_id == stage.id:
+        return None
+    now = _now()
+    move = StageMove(
+        lead_id=lead.id,
+        organization_id=lead.organization_id,
+        from_stage_id=lead.stage_id,
+        to_stage_id=stage.id,
+        seconds_in_stage=_seconds_since(lead.stage_entered_at, now) if lead.stage_id is not None else None,
+    )
+    lead.pipeline_id = stage.pipeline_id
+    lead.stage_id = stage.id
+    lead.stage_entered_at = now
+    record_stage_moves(db, [move])
+    return move
+
+
+def _org_stage_exists(db: Session, organization_id: int, stage_id: int) -> bool:
+    return db.execute(
+        select(PipelineStage.id)
+        .join(Pipeline, Pipeline.id == PipelineStage.pipeline_id)
+        .where(PipelineStage.id == stage_id, Pipeline.organization_id == organization_id)
+    ).first() is not None
+
+
+def move_leads(
+    db: Session, organization_id: int, lead_ids: Sequence[int], stage_id: int
+) -> Optional[List[StageMove]]:
+    """
+    Move many of the org's leads to a stage with one UPDATE ... FROM ...
+    RETURNING. The FROM side locks the leads (in id order) and hands back
+    their previous stage, and the stage's ownership is checked by the same
+    statement. Leads already in the stage, or not in the org, are left alone.
+    Returns the moves made, or None if the stage is not one of the org's;
+    the caller commits.
+    """
+    now = _now()
+    previous = (
+        select(Lead.id, Lead.stage_id, Lead.stage_entered_at)
+        .where(Lead.id.in_(lead_ids), Lead.organization_id == organization_id)
+        .order_by(Lead.id)
+        .with_for_update()
+        .subquery("previous")
+    )
+    target_pipeline_id = (
+        select(PipelineStage.pipeline_id)
+        .join(Pipeline, Pipeline.id == PipelineStage.pipeline_id)
+        .where(PipelineStage.id == stage_id, Pipeline.organization_id == organization_id)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        update(Lead)
+        .where(
+            Lead.id == previous.c.id,
+            previous.c.stage_id.is_distinct_from(stage_id),
+            target_pipeline_id.isnot(None),
+        )
+        .values(stage_id=stage_id, pipeline_id=target_pipeline_id, stage_entered_at=now)
+        .returning(Lead.id, previous.c.stage_id, previous.c.stage_entered_at)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    moves = [
+        StageMove(
+            lead_id=lead_id,
+            organization_id=organization_id,
+            from_stage_id=from_stage_id,
+            to_stage_id=stage_id,
+            seconds_in_stage=_seconds_since(entered_at, now) if from_stage_id is not None else None,
+        )
+        for lead_id, from_stage_id, entered_at in sorted(rows)
+    ]
+    if not moves and not _org_stage_exists(db, organization_id, stage_id):
+        return None # Nothing moved because the stage is missing, not because the leads were there
+    record_stage_moves(db, moves)
+    if moves:
+        mark_leads_written(db, [organization_id])
+    return moves
+
+
+def reorder_stages(
+    db: Session, organization_id: int, pipeline_id: int, stage_ids: Sequence[int]
+) -> Optional[List[int]]:
+    """
+    Set the board order of a pipeline's stages to their position in
+    `stage_ids`, which must list every stage of the pipeline once, so no two
+    stages end up sharing an order. The stages are locked, checked, then
+    updated in one UPDATE. Returns the ids updated, or None if the pipeline
+    is not the org's; raises ValueError for an incomplete list. The caller
+    commits or rolls back.
+    """
+    current = set(db.execute(
+        select(PipelineStage.id)
+        .join(Pipeline, Pipeline.id == PipelineStage.pipeline_id)
+        .where(Pipeline.id == pipeline_id, Pipeline.organization_id == organization_id)
+        .with_for_update(of=PipelineStage)
+    ).scalars())
+    if not current:
+        return None
+    if len(stage_ids) != len(current) or set(stage_ids) != current:
+        raise ValueError("stage_ids must list every stage of the pipeline exactly once")
+
+    result = db.execute(
+        update(PipelineStage)
+        .where(PipelineStage.id.in_(stage_ids), PipelineStage.pipeline_id == pipeline_id)
+        .values(order=case({stage_id: position for position, stage_id in enumerate(stage_ids)}, value=PipelineStage.id))
+        .returning(PipelineStage.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+
+def _percent(part: int, whole: int) -> Optional[float]:
+    return round(part / whole * 100, 1) if whole else None
+
+
+def pipeline_funnel(db: Session, pipeline: Pipeline) -> List[dict]:
+    """
+    Per-stage funnel for a pipeline, from the counters only (no lead scans).
+    `entered` counts moves into the stage, `current` the leads in it now.
+    `conversion_rate` is entries relative to the first stage and
+    `step_conversion_rate` relative to the previous working stage (system
+    stages like Won/Lost are outcomes, not steps). Time in stage covers
+    completed stays with a known entry time.
+    """
+    stages = (
+        db.query(PipelineStage)
+        .filter(PipelineStage.pipeline_id == pipeline.id)
+        .order_by(PipelineStage.order, PipelineStage.id)
+        .all()
+    )
+    stats: Dict[int, PipelineStageStats] = {
+        row.stage_id: row
+        for row in db.query(PipelineStageStats).filter(PipelineStageStats.pipeline_id == pipeline.id)
+    }
+    histograms = defaultdict(list)
+    for row in (
+        db.query(PipelineStageDuration)
+        .filter(PipelineStageDuration.pipeline_id == pipeline.id)
+        .order_by(PipelineStageDuration.stage_id, PipelineStageDuration.le)
+    ):
+        histograms[row.stage_id].append((row.le, row.leads))
+
+    first_entered = None
+    previous_entered = None
+    funnel = []
+    for stage in stages:
+        row = stats.get(stage.id)
+        entered, exited = (row.entered, row.exited) if row else (0, 0)
+        if first_entered is None:
+            first_entered = entered
+
+        histogram = histograms.get(stage.id, [])
+        timed = sum(count for _, count in histogram)
+        buckets = [
+            (bound, sum(count for le, count in histogram if le <= bound))
+            for bound in settings.STAGE_DURATION_BUCKETS_SECONDS
+        ]
+
+        funnel.append({
+            "stage_id": stage.id,
+            "name": stage.name,
+            "order": stage.order,
+            "is_system_stage": bool(stage.is_system_stage),
+            "current": entered - exited,
+            "entered": entered,
+            "exited": exited,
+            "conversion_rate": _percent(entered, first_entered),
+            "step_conversion_rate": _percent(entered, previous_entered) if previous_entered is not None else None,
+            "median_seconds_in_stage": histogram_quantile(0.5, buckets, timed),
+            "avg_seconds_in_stage": row.seconds_in_stage_sum / timed if timed else None,
+        })
+        if not stage.is_system_stage:
+            previous_entered = entered
+    return funnel
+
+
+# Kanban board: each stage's leads, best score first, then newest. Matches
+# ix_leads_stage_board so both the window query and the keyset pages are
+# index scans.
+BOARD_COLUMNS = (
+    Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.phone,
+    Lead.status, Lead.lead_score, Lead.created_at, Lead.stage_entered_at,
+)
+_board_score = func.coalesce(Lead.lead_score, 0)
+_board_order = (_board_score.desc(), Lead.created_at.desc(), Lead.id.desc())
+
+
+def encode_board_cursor(row) -> str:
+    return encode_cursor(row.lead_score or 0, row.created_at.isoformat(), row.id)
+
+
+def decode_board_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """Raises ValueError for a cursor this module did not produce."""
+    score, created_at, lead_id = decode_cursor(cursor, 3)
+    try:
+        return int(score), datetime.fromisoformat(created_at), int(lead_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _lead_dict(row) -> dict:
+    return {column.key: getattr(row, column.key) for column in BOARD_COLUMNS}
+
+
+def pipeline_board(db: Session, pipeline: Pipeline, limit: int) -> List[dict]:
+    """
+    Every stage of the pipeline with its lead count and first `limit` leads,
+    fetched in one query (ROW_NUMBER/COUNT windows per stage). Stages come in
+    board order, empty ones included; `next_cursor` pages a column further
+    through `stage_leads_page`.
+    """
+    stages = (
+        db.query(PipelineStage)
+        .filter(PipelineStage.pipeline_id == pipeline.id)
+        .order_by(PipelineStage.order, PipelineStage.id)
+        .all()
+    )
+    ranked = (
+        select(
+            Lead.stage_id, *BOARD_COLUMNS,
+            func.row_number().over(partition_by=Lead.stage_id, order_by=_board_order).label("rank"),
+            func.count().over(partition_by=Lead.stage_id).label("total"),
+        )
+        .where(
+            Lead.organization_id == pipeline.organization_id,
+            Lead.stage_id.in_([stage.id for stage in stages]),
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked).where(ranked.c.rank <= limit).order_by(ranked.c.stage_id, ranked.c.rank)
+    ).all()
+
+    by_stage = defaultdict(list)
+    for row in rows:
+        by_stage[row.stage_id].append(row)
+
+    columns = []
+    for stage in stages:
+        stage_rows = by_stage.get(stage.id, [])
+        total = stage_rows[0].total if stage_rows else 0
+        columns.append({
+            "stage_id": stage.id,
+            "name": stage.name,
+            "color": stage.color,
+            "order": stage.order,
+            "total": total,
+            "leads": [_lead_dict(row) for row in stage_rows],
+            "next_cursor": encode_board_cursor(stage_rows[-1]) if total > len(stage_rows) else None,
+        })
+    return columns
+
+
+def stage_leads_page(
+    db: Session, stage: PipelineStage, organization_id: int, limit: int, cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    The next `limit` leads of one board column after `cursor` (keyset, so a
+    deep page costs the same as the first). Raises ValueError for a bad cursor.
+    """
+    query = select(*BOARD_COLUMNS).where(Lead.stage_id == stage.id, Lead.organization_id == organization_id)
+    if cursor:
+        query = query.where(tuple_(_board_score, Lead.created_at, Lead.id) < tuple_(*decode_board_cursor(cursor)))
+    rows = db.execute(query.order_by(*_board_order).limit(limit + 1)).all()
+    next_cursor = encode_board_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [_lead_dict(row) for row in rows[:limit]], next_cursor
@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import redis
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.base import SessionLocal
+from app.models.enrichment import PropertyData
+from app.models.lead import Lead
+from app.models.scoring import RescoreJob
+from app.models.settings import ClientSettings
+from app.services.lead_writes import mark_leads_written
+from app.services.scoring_service import DEFAULT_SCORING, ScoringConfig, score_leads_batch, scoring_config
+
+ACTIVE_JOB_STATUSES = ("pending", "running")
+# Leads in these statuses have not been scored yet; enrichment scores them with the current weights
+UNSCORED_LEAD_STATUSES = ("pending", "verified")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_client_settings(db: Session, organization_id: int) -> ClientSettings:
+    """The org's settings row, created with defaults on first access."""
+    row = db.query(ClientSettings).filter(ClientSettings.organization_id == organization_id).first()
+    if row:
+        return row
+    try:
+        with db.begin_nested():
+            row = ClientSettings(organization_id=organization_id)
+            db.add(row)
+    except IntegrityError:
+        # Created concurrently by another request
+        row = db.query(ClientSettings).filter(ClientSettings.organization_id == organization_id).one()
+    return row
+
+
+# Per-process cache: org id -> (scoring_version, compiled scoring). Hits are
+# checked against the version published in Redis on every settings change, so
+# workers pick up new rules on the next lead without reading settings per lead.
+_org_scorers = TTLCache(maxsize=settings.SCORING_CACHE_MAXSIZE, ttl=settings.SCORING_CACHE_TTL_SECONDS)
+
+
+def _scoring_version_key(organization_id: int) -> str:
+    return f"scoring:version:{organization_id}"
+
+
+def _published_scoring_version(organization_id: int) -> Optional[int]:
+    try:
+        version = get_redis().get(_scoring_version_key(organization_id))
+    except redis.RedisError:
+        return None # Fall back to the cache TTL
+    return int(version) if version is not None else None
+
+
+def publish_scoring_version(organization_id: int, scoring_version: int):
+    """Tell every process that cached the org's scoring to recompile it."""
+    _org_scorers.delete(organization_id)
+    try:
+        get_redis().set(_scoring_version_key(organization_id), scoring_version)
+    except redis.RedisError as e:
+        print(f"[Scoring] Could not publish scoring version for org {organization_id}: {e!r}")
+
+
+def client_scoring_config(row: ClientSettings) -> ScoringConfig:
+    return scoring_config(row.lead_score_weights, row.min_lead_score, row.scoring_rules)
+
+
+def org_scoring_config(db: Session, organization_id: int) -> ScoringConfig:
+    """The org's compiled scoring, from the per-process cache when still current."""
+    cached = _org_scorers.get(organization_id)
+    if cached is not None:
+        version, config = cached
+        published = _published_scoring_version(organization_id)
+        if published is None or published == version:
+            return config
+
+    row = db.query(ClientSettings).filter(ClientSettings.organization_id == organization_id).first()
+    if row is None:
+        version, config = 0, DEFAULT_SCORING
+    else:
+        version, config = row.scoring_version, client_scoring_config(row)
+    _org_scorers.set(organization_id, (version, config))
+    return config
+
+
+def start_rescore(db: Session, organization_id: int, scoring_version: int) -> RescoreJob:
+    """
+    Queue a rescoring run for the org's current scoring version. Runs for older
+    versions are cancelled here; one already mid-chunk stops after that chunk.
+    """
+    db.query(RescoreJob).filter(
+        RescoreJob.organization_id == organization_id,
+        RescoreJob.status.in_(ACTIVE_JOB_STATUSES),
+        RescoreJob.scoring_version < scoring_version,
+    ).update({"status": "cancelled", "finished_at": _now()}, synchronize_session=False)
+
+    job = RescoreJob(
+        organization_id=organization_id, scoring_version=scoring_version,
+        status="pending", last_lead_id=0, scanned=0, updated=0,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    from app.worker import rescore_leads
+
+    rescore_leads.delay(job.id)
+    return job
+
+
+def _claim_job(db: Session, job_id: int) -> bool:
+    """
+    Take ownership of a pending job, or of a running one whose owner stopped
+    heartbeating (worker died mid-run). Exactly one caller wins.
+    """
+    now = _now()
+    stale = now - timedelta(seconds=settings.RESCORE_STALL_SECONDS)
+    result = db.execute(
+        update(RescoreJob)
+        .where(
+            RescoreJob.id == job_id,
+            or_(
+                RescoreJob.status == "pending",
+                and_(RescoreJob.status == "running", RescoreJob.heartbeat_at < stale),
+            ),
+        )
+        .values(status="running", heartbeat_at=now, error=None)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _finish(db: Session, job: RescoreJob, status: str, error: Optional[str] = None):
+    job.status = status
+    job.error = error
+    job.finished_at = _now()
+    db.commit()
+
+
+def _changed_rows(rows, scores, tags) -> List[dict]:
+    return [
+        {"id": row.id, "lead_score": int(score), "priority_tag": tag}
+        for row, score, tag in zip(rows, scores, tags)
+        if row.lead_score != score or row.priority_tag != tag
+    ]
+
+
+def run_rescore_job(job_id: int, chunk_size: Optional[int] = None) -> dict:
+    """
+    Rescore one org's scored leads for the job's scoring version.
+    Leads are streamed in id order through a server-side cursor on a read-only
+    session; each chunk is scored with NumPy and only rows whose score or tag
+    changed are written, on a second session, together with the job's resume
+    point. A restarted job therefore continues after its last committed chunk.
+    The run stops as soon as the org's scoring version moves past the job's.
+    """
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    db = SessionLocal()
+    read_db = SessionLocal()
+    try:
+        if not _claim_job(db, job_id):
+            return {"job_id": job_id, "status": "skipped"}
+
+        job = db.get(RescoreJob, job_id)
+        client_settings = get_client_settings(db, job.organization_id)
+        if client_settings.scoring_version != job.scoring_version:
+            _finish(db, job, "cancelled")
+            return {"job_id": job_id, "status": job.status}
+        config = client_scoring_config(client_settings)
+
+        query = (
+            select(
+                Lead.id, Lead.property_value, Lead.household_income, Lead.zip_code,
+                Lead.lead_score, Lead.priority_tag, PropertyData.job_title,
+            )
+            .outerjoin(PropertyData, PropertyData.lead_id == Lead.id)
+            .where(
+                Lead.organization_id == job.organization_id,
+                Lead.id > job.last_lead_id,
+                Lead.status.notin_(UNSCORED_LEAD_STATUSES),
+            )
+            .order_by(Lead.id)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        status = "completed"
+        for rows in read_db.execute(query).partitions():
+            # No social score is stored on the lead; enrichment scores it as missing too
+            scores, tags = score_leads_batch(
+                [row.property_value for row in rows], [row.household_income for row in rows], [None] * len(rows),
+                config, zip_codes=[row.zip_code for row in rows], job_titles=[row.job_title for row in rows],
+            )
+            updates = _changed_rows(rows, scores, tags)
+            if updates:
+                db.execute(update(Lead), updates) # Bulk UPDATE by primary key
+                mark_leads_written(db, [job.organization_id])
+
+            job.last_lead_id = rows[-1].id
+            job.scanned += len(rows)
+            job.updated += len(updates)
+            job.heartbeat_at = _now()
+            db.commit()
+
+            current_version = db.scalar(
+                select(ClientSettings.scoring_version).where(ClientSettings.organization_id == job.organization_id)
+            )
+            if current_version != job.scoring_version:
+                status = "cancelled" # A newer job rescans the whole book
+                break
+
+        _finish(db, job, status)
+        return {"job_id": job_id, "status": status, "scanned": job.scanned, "updated": job.updated}
+
+    except Exception as e:
+        db.rollback()
+        job = db.get(RescoreJob, job_id)
+        if job is not None:
+            _finish(db, job, "failed", error=repr(e)[:500])
+        raise
+    finally:
+        read_db.close()
+        db.close()
+
+
+def stalled_rescore_job_ids(db: Session) -> List[int]:
+    """Jobs whose worker died (stale heartbeat) or whose task message was lost."""
+    stale = _now() - timedelta(seconds=settings.RESCORE_STALL_SECONDS)
+    return list(db.scalars(
+        select(RescoreJob.id).where(or_(
+            and_(RescoreJob.status == "running", RescoreJob.heartbeat_at < stale),
+            and_(RescoreJob.status == "pending", RescoreJob.created_at < stale),
+        ))
+    ))
+
+
+def resume_rescore(db: Session, job: RescoreJob) -> RescoreJob:
+    """Re-queue a failed job from its last committed chunk, if its scoring version is still current."""
+    current_version = get_client_settings(db, job.organization_id).scoring_version
+    if job.status != "failed" or job.scoring_version != current_version:
+        return job
+    job.status = "pending"
+    job.error = None
+    job.finished_at = None
+    db.commit()
+
+    from app.worker import rescore_leads
+
+    rescore_leads.delay(job.id)
+    return job
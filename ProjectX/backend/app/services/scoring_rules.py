@@ -0,0 +1,207 @@
+import hashlib
+import json
+import math
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Declarative scoring rules (ClientSettings.scoring_rules):
+#
+#   {
+#     "base": 50,
+#     "max": 100,
+#     "rules": [
+#       {"field": "property_value", "tiers": [[1000000, 25], [500000, 15]]},  # first threshold exceeded wins
+#       {"field": "zip_code", "in": ["33101", "33139"], "points": 5},
+#       {"field": "job_title", "contains": ["Owner", "VP"], "points": 10},
+#     ],
+#     "priority": [[80, "HOT_LEAD"], [60, "WARM"]],  # score above -> tag, first match wins
+#     "min_lead_score": 50                            # below this the tag is always LOW
+#   }
+#
+# Rules are compiled into Python source once (one straight-line function per
+# rule set plus a NumPy twin for batches), so scoring a lead never walks the
+# rule document.
+
+NUMERIC_FIELDS = ("property_value", "household_income", "social_quality_score")
+TEXT_FIELDS = ("zip_code", "job_title")
+DEFAULT_TAG = "LOW"
+
+
+def _number(value, where: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{where} must be a finite number")
+    return value
+
+
+def _integer(value, where: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{where} must be an integer")
+    return value
+
+
+def _strings(value, where: str) -> List[str]:
+    if not isinstance(value, list) or not value or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{where} must be a non-empty list of strings")
+    return value
+
+
+def validate_rules(doc: dict) -> dict:
+    """
+    Check a rule document and return it in canonical form. Raises ValueError
+    with a message fit for a 422 response.
+    """
+    if not isinstance(doc, dict):
+        raise ValueError("scoring rules must be an object")
+
+    rules = []
+    for i, rule in enumerate(doc.get("rules", [])):
+        where = f"rules[{i}]"
+        if not isinstance(rule, dict):
+            raise ValueError(f"{where} must be an object")
+        field = rule.get("field")
+        if field in NUMERIC_FIELDS:
+            tiers = rule.get("tiers")
+            if not isinstance(tiers, list) or not tiers:
+                raise ValueError(f"{where}.tiers must be a non-empty list of [threshold, points]")
+            for j, tier in enumerate(tiers):
+                if not isinstance(tier, (list, tuple)) or len(tier) != 2:
+                    raise ValueError(f"{where}.tiers[{j}] must be [threshold, points]")
+            rules.append({"field": field, "tiers": [
+                [_number(t, f"{where}.tiers[{j}][0]"), _integer(p, f"{where}.tiers[{j}][1]")]
+                for j, (t, p) in enumerate(tiers)
+            ]})
+        elif field in TEXT_FIELDS:
+            ops = [op for op in ("in", "contains") if op in rule]
+            if len(ops) != 1:
+                raise ValueError(f"{where} needs exactly one of 'in' or 'contains'")
+            rules.append({
+                "field": field,
+                ops[0]: _strings(rule[ops[0]], f"{where}.{ops[0]}"),
+                "points": _integer(rule.get("points"), f"{where}.points"),
+            })
+        else:
+            raise ValueError(f"{where}.field must be one of {', '.join(NUMERIC_FIELDS + TEXT_FIELDS)}")
+
+    priority = doc.get("priority", [])
+    if not isinstance(priority, list):
+        raise ValueError("priority must be a list of [score above, tag]")
+    for j, tier in enumerate(priority):
+        if not isinstance(tier, (list, tuple)) or len(tier) != 2 or not isinstance(tier[1], str):
+            raise ValueError(f"priority[{j}] must be [score above, tag]")
+
+    return {
+        "base": _integer(doc.get("base", 0), "base"),
+        "max": _integer(doc.get("max", 100), "max"),
+        "rules": rules,
+        "priority": [[_number(t, f"priority[{j}][0]"), tag] for j, (t, tag) in enumerate(priority)],
+        "min_lead_score": _integer(doc.get("min_lead_score", 0), "min_lead_score"),
+    }
+
+
+def _scalar_source(doc: dict) -> str:
+    used = sorted({rule["field"] for rule in doc["rules"]})
+    lines = ["def score(lead_data):"]
+    for field in used:
+        empty = "0" if field in NUMERIC_FIELDS else "''"
+        lines.append(f"    {field} = lead_data.get({field!r}) or {empty}")
+    lines.append(f"    s = {doc['base']!r}")
+
+    for rule in doc["rules"]:
+        field = rule["field"]
+        if "tiers" in rule:
+            for j, (threshold, points) in enumerate(rule["tiers"]):
+                keyword = "if" if j == 0 else "elif"
+                lines.append(f"    {keyword} {field} > {threshold!r}:")
+                lines.append(f"        s += {points!r}")
+        elif "in" in rule:
+            lines.append(f"    if {field} in {frozenset(rule['in'])!r}:")
+            lines.append(f"        s += {rule['points']!r}")
+        else:
+            test = " or ".join(f"{keyword!r} in {field}" for keyword in rule["contains"])
+            lines.append(f"    if {test}:")
+            lines.append(f"        s += {rule['points']!r}")
+
+    lines.append(f"    s = min(s, {doc['max']!r})")
+    lines.append(f"    if s < {doc['min_lead_score']!r}:")
+    lines.append(f"        return s, {DEFAULT_TAG!r}")
+    for threshold, tag in doc["priority"]:
+        lines.append(f"    if s > {threshold!r}:")
+        lines.append(f"        return s, {tag!r}")
+    lines.append(f"    return s, {DEFAULT_TAG!r}")
+    return "\n".join(lines) + "\n"
+
+
+def _batch_source(doc: dict) -> str:
+    lines = ["def score_batch(n, columns):", f"    s = np.full(n, {doc['base']!r}, dtype=np.int64)"]
+    for rule in doc["rules"]:
+        column = f"columns[{rule['field']!r}]"
+        if "tiers" in rule:
+            conditions = ", ".join(f"{column} > {t!r}" for t, _ in rule["tiers"])
+            points = ", ".join(repr(p) for _, p in rule["tiers"])
+            lines.append(f"    s += np.select([{conditions}], [{points}], 0)")
+        elif "in" in rule:
+            lines.append(f"    s += np.where(np.isin({column}, {sorted(rule['in'])!r}), {rule['points']!r}, 0)")
+        else:
+            test = " | ".join(f"(np.char.find({column}, {keyword!r}) >= 0)" for keyword in rule["contains"])
+            lines.append(f"    s += np.where({test}, {rule['points']!r}, 0)")
+
+    conditions = [f"s < {doc['min_lead_score']!r}"] + [f"s > {t!r}" for t, _ in doc["priority"]]
+    tags = [DEFAULT_TAG] + [tag for _, tag in doc["priority"]]
+    lines.append(f"    s = np.minimum(s, {doc['max']!r})")
+    lines.append(f"    tags = np.select([{', '.join(conditions)}], {tags!r}, {DEFAULT_TAG!r}).astype(object)")
+    lines.append("    return s, tags")
+    return "\n".join(lines) + "\n"
+
+
+class CompiledRules:
+    """
+    A rule set compiled to code. `score(lead_data)` returns (score, tag) for
+    one lead; `score_batch(columns)` does the same for columnar arrays and
+    gives identical results.
+    """
+
+    def __init__(self, doc: dict):
+        self.rules = doc
+        self.fingerprint = hashlib.sha256(json.dumps(doc, sort_keys=True).encode()).hexdigest()[:16]
+        self.fields = sorted({rule["field"] for rule in doc["rules"]})
+
+        namespace = {"np": np}
+        exec(compile(_scalar_source(doc), f"<scoring-rules {self.fingerprint}>", "exec"), namespace)
+        exec(compile(_batch_source(doc), f"<scoring-rules-batch {self.fingerprint}>", "exec"), namespace)
+        self.score: Callable[[dict], Tuple[int, str]] = namespace["score"]
+        self._score_batch = namespace["score_batch"]
+
+    def score_batch(self, n: int, columns: dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `columns` maps field -> sequence of length n (None allowed; missing
+        fields count as empty). Returns (scores as int64, tags as object array).
+        """
+        prepared = {}
+        for field in self.fields:
+            values = columns.get(field)
+            if field in NUMERIC_FIELDS:
+                # None/NaN score like 0 (the scalar function's `or 0`)
+                prepared[field] = np.zeros(n) if values is None else np.nan_to_num(
+                    np.asarray(values, dtype=np.float64), nan=0.0
+                )
+            else:
+                prepared[field] = np.full(n, "") if values is None else np.asarray(
+                    ["" if v is None else str(v) for v in values], dtype=str
+                )
+        return self._score_batch(n, prepared)
+
+
+@lru_cache(maxsize=1024)
+def _compile_canonical(canonical: str) -> CompiledRules:
+    return CompiledRules(json.loads(canonical))
+
+
+def compile_rules(doc: dict) -> CompiledRules:
+    """
+    Validate and compile a rule set. Compiled code is shared per process by
+    rule content, so orgs on the same rules (e.g. the defaults) compile once.
+    """
+    canonical = json.dumps(validate_rules(doc), sort_keys=True)
+    return _compile_canonical(canonical)
@@ -1,41 +1,105 @@
-def calculate_lead_score(lead_data: dict, enrichment_data: dict = {}):
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring_rules import CompiledRules, compile_rules
+
+# (threshold, points): the first threshold the value exceeds wins
+PROPERTY_VALUE_TIERS = ((1000000, 25), (500000, 15))
+INCOME_TIERS = ((150000, 20), (80000, 10))
+SOCIAL_TIERS = ((80, 10),)
+BASE_SCORE = 50
+MAX_SCORE = 100
+# (score above, tag); anything else is LOW
+PRIORITY_TIERS = ((80, "HOT_LEAD"), (60, "WARM"))
+
+# ClientSettings.lead_score_weights defaults. Weights are relative: each one's
+# share of the total scales that signal's points, so these (or any multiple,
+# e.g. 60/30/10) reproduce the tiers above exactly.
+DEFAULT_WEIGHTS = {"property_value": 0.6, "social_presence": 0.3, "urgency": 0.1}
+DEFAULT_MIN_LEAD_SCORE = 50
+
+
+# Compiled rule set; build one with `scoring_config`
+ScoringConfig = CompiledRules
+
+
+def _scale_tiers(tiers, factor: float) -> list:
+    return [[threshold, int(round(points * factor))] for threshold, points in tiers]
+
+
+def validate_weights(weights: dict) -> dict:
+    """
+    Check lead_score_weights before they are saved. Raises ValueError with a
+    message fit for a 422 response: a negative weight would invert its signal,
+    and all-zero weights would flatten every lead to the base score.
+    """
+    for key, value in weights.items():
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{key} must be a finite number >= 0")
+    merged = {**DEFAULT_WEIGHTS, **{k: v for k, v in weights.items() if k in DEFAULT_WEIGHTS}}
+    if not any(merged.values()):
+        raise ValueError(f"at least one of {', '.join(DEFAULT_WEIGHTS)} must be above 0")
+    return weights
+
+
+def weighted_rules(weights: Optional[dict] = None, min_lead_score: Optional[int] = None) -> dict:
+    """
+    The built-in rule set with an org's lead_score_weights applied. Unknown
+    weight keys are ignored; "urgency" only dilutes the others until there
+    is an urgency signal.
+    """
+    weights = {**DEFAULT_WEIGHTS, **{k: v for k, v in (weights or {}).items() if k in DEFAULT_WEIGHTS}}
+    total = sum(float(v) for v in weights.values()) or 1.0
+    default_total = sum(DEFAULT_WEIGHTS.values())
+
+    def factor(key):
+        return (float(weights[key]) / total) / (DEFAULT_WEIGHTS[key] / default_total)
+
+    return {
+        "base": BASE_SCORE,
+        "max": MAX_SCORE,
+        "rules": [
+            {"field": "property_value", "tiers": _scale_tiers(PROPERTY_VALUE_TIERS, factor("property_value"))},
+            {"field": "household_income", "tiers": _scale_tiers(INCOME_TIERS, 1.0)},
+            {"field": "social_quality_score", "tiers": _scale_tiers(SOCIAL_TIERS, factor("social_presence"))},
+        ],
+        "priority": [list(tier) for tier in PRIORITY_TIERS],
+        "min_lead_score": DEFAULT_MIN_LEAD_SCORE if min_lead_score is None else min_lead_score,
+    }
+
+
+def scoring_config(
+    weights: Optional[dict] = None, min_lead_score: Optional[int] = None, rules: Optional[dict] = None,
+) -> ScoringConfig:
+    """
+    Compile an org's scoring from its ClientSettings: its own `scoring_rules`
+    when set, otherwise the built-in tiers scaled by `lead_score_weights`.
+    `min_lead_score` (the settings column) always wins over the rule document.
+    """
+    if rules is None:
+        return compile_rules(weighted_rules(weights, min_lead_score))
+    if min_lead_score is not None:
+        rules = {**rules, "min_lead_score": min_lead_score}
+    return compile_rules(rules)
+
+
+DEFAULT_SCORING = scoring_config()
+
+
+def calculate_lead_score(lead_data: dict, enrichment_data: dict = {}, config: ScoringConfig = DEFAULT_SCORING):
     """
     Mock Service: Uses Claude 4.5 Sonnet (simulated) to score leads.
     Inputs: Enriched lead data.
     Outputs: Score (0-100), Priority Tag, Dossier Summary.
+    `config` is the org's compiled scoring (see `scoring_config`).
     """
-    # Weightage Logic for Mocking
-    base_score = 50
-    
-    # 1. Property Value (40%)
-    prop_val = lead_data.get("property_value", 0)
-    if prop_val > 1000000:
-        base_score += 25
-    elif prop_val > 500000:
-        base_score += 15
-        
-    # 2. Income (30%)
-    income = lead_data.get("household_income", 0)
-    if income > 150000:
-        base_score += 20
-    elif income > 80000:
-        base_score += 10
-        
-    # 3. Social Intent (10%)
-    social_score = lead_data.get("social_quality_score", 0)
-    if social_score > 80:
-        base_score += 10
-        
-    # Cap 100
-    final_score = min(base_score, 100)
+    # Weightage Logic for Mocking: the org's compiled rules
+    # (defaults: property value 40%, income 30%, social intent 10%, cap 100)
+    final_score, priority = config.score(lead_data)
+    prop_val = lead_data.get("property_value") or 0
     
-    # Priority
-    priority = "LOW"
-    if final_score > 80:
-        priority = "HOT_LEAD"
-    elif final_score > 60:
-        priority = "WARM"
-        
     # Dossier Generation (Mock Claude Output)
     dossier = f"""
     AI ANALYSIS:
@@ -50,3 +114,26 @@ def calculate_lead_score(lead_data: dict, enrichment_data: dict = {}):
         "priority_tag": priority,
         "dossier": dossier.strip()
     }
+
+
+def score_leads_batch(
+    property_values: Sequence,
+    household_incomes: Sequence,
+    social_quality_scores: Sequence,
+    config: ScoringConfig = DEFAULT_SCORING,
+    zip_codes: Optional[Sequence] = None,
+    job_titles: Optional[Sequence] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized `calculate_lead_score` for whole-book rescoring.
+    Takes columnar inputs (lists or arrays, None allowed) and returns
+    (scores as int64, priority tags as object array), identical to scoring
+    each lead one at a time. Dossiers are not generated here.
+    """
+    return config.score_batch(len(property_values), {
+        "property_value": property_values,
+        "household_income": household_incomes,
+        "social_quality_score": social_quality_scores,
+        "zip_code": zip_codes,
+        "job_title": job_titles,
+    })
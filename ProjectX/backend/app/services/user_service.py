@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User
+
+# Authenticated requests resolve the user from this cache instead of the
+# database: (user id, user generation) -> CurrentUser. Deactivation and
+# logout-all bump the user's generation in Redis (`invalidate_user`), which
+# retires the entry in all processes.
+_users = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user: a read-only snapshot of the `users` row."""
+    id: int
+    email: str
+    full_name: Optional[str]
+    organization_id: Optional[int]
+    is_active: bool
+    is_superuser: bool
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            organization_id=user.organization_id,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            token_version=user.token_version or 0,
+        )
+
+
+def access_token_for(user: User) -> str:
+    """
+    Access token carrying what authentication checks: org (org), active flag
+    (act) and token version (tv), next to the user id (sub).
+    """
+    return security.create_access_token(
+        subject=user.id,
+        claims={"org": user.organization_id, "act": bool(user.is_active), "tv": user.token_version or 0},
+    )
+
+
+def _user_generation_key(user_id: int) -> str:
+    return f"users:generation:{user_id}"
+
+
+def _user_generation(user_id: int) -> Optional[int]:
+    try:
+        return int(get_redis().get(_user_generation_key(user_id)) or 0)
+    except redis.RedisError:
+        return None # Fall back to the cache TTL
+
+
+def cached_user(db: Session, user_id: int) -> Optional[CurrentUser]:
+    """The user from the process cache, loaded from the database on a miss. None if it doesn't exist."""
+    key = (user_id, _user_generation(user_id))
+    user = _users.get(key)
+    if user is None:
+        row = db.get(User, user_id)
+        if row is None:
+            return None
+        user = CurrentUser.from_user(row)
+        _users.set(key, user)
+    return user
+
+
+def invalidate_user(user_id: int):
+    """Call after committing any change to the user."""
+    _users.delete((user_id, None))
+    try:
+        generation = get_redis().incr(_user_generation_key(user_id))
+    except redis.RedisError as e:
+        print(f"[Users] Could not invalidate user {user_id}: {e!r}")
+        return
+    _users.delete((user_id, generation - 1))
+
+
+def revoke_tokens(db: Session, user_id: int, deactivate: bool = False) -> Optional[User]:
+    """
+    Invalidate every token issued to the user so far by bumping its token
+    version (optionally deactivating it too). Commits; None if no such user.
+    """
+    values = {"token_version": User.token_version + 1}
+    if deactivate:
+        values["is_active"] = False
+    result = db.execute(update(User).where(User.id == user_id).values(**values).returning(User.id))
+    if result.scalar() is None:
+        db.rollback()
+        return None
+    db.commit()
+    invalidate_user(user_id)
+    return db.get(User, user_id)
\ No newline at end of file
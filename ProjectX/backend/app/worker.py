@@ -1,102 +1,374 @@
+import asyncio
+from typing import List, Optional
+
+from celery import chain
+from sqlalchemy import exists, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.http import run_async
+from app.core.locks import claim_once, redis_lock, release_claim
+from app.core.metrics import record_stage, record_stages
 from app.db.base import SessionLocal
 from app.models.lead import Lead
-from app.services.enrichment_service import enrich_lead_data
-from app.services.scoring_service import calculate_lead_score
+from app.models.enrichment import PropertyData
+from app.services.enrichment_service import enrich_lead_data, enrich_lead_data_async
+from app.services.lead_stats_service import apply_lead_stats, status_change_deltas
+from app.services.lead_writes import mark_leads_written
+from app.services.rescoring_service import org_scoring_config, run_rescore_job, stalled_rescore_job_ids
+from app.services.scoring_service import ScoringConfig, calculate_lead_score
 from app.services.telephony_service import initiate_manager_call
-import json
+from app.services.ingest_buffer import LeadIngestBuffer, flush_ingest_buffer
+
+PROPERTY_DATA_COLUMNS = ("sqft", "lot_size", "year_built", "estimated_value", "linkedin_url", "job_title", "company_name")
+
+
+def _property_data_row(lead_id: int, enrichment_data: dict) -> dict:
+    # Providers that failed or timed out come back as None
+    prop_data = enrichment_data["property_data"] or {}
+    soc_data = enrichment_data["social_data"] or {}
+    return {
+        "lead_id": lead_id,
+        "sqft": prop_data.get("sqft"),
+        "lot_size": prop_data.get("lot_size"),
+        "year_built": prop_data.get("year_built"),
+        "estimated_value": prop_data.get("estimated_value"),
+        "linkedin_url": soc_data.get("linkedin_url"),
+        "job_title": soc_data.get("job_title"),
+        "company_name": soc_data.get("company_name"),
+    }
+
+
+def _upsert_property_data(db, rows: List[dict]):
+    """
+    Insert PropertyData rows in one statement; a row that already exists for
+    the lead is updated instead of failing the whole transaction.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    insert_fn = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert_fn(PropertyData).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PropertyData.lead_id],
+        set_={col: stmt.excluded[col] for col in PROPERTY_DATA_COLUMNS},
+    )
+    db.execute(stmt)
+
+
+def _score_values(lead: Lead, enrichment_data: dict, config: ScoringConfig) -> dict:
+    """
+    AI scoring for one lead with its org's scoring config. Returns the new
+    column values for the lead (nothing is written here); dialing is a separate stage.
+    """
+    # Combine base lead data + enriched data for scoring
+    scoring_input = {
+        "property_value": lead.property_value,
+        "household_income": lead.household_income,
+        "social_quality_score": enrichment_data.get("social_quality_score"),
+        "job_title": enrichment_data.get("job_title"),
+        "zip_code": lead.zip_code,
+    }
+    score_result = calculate_lead_score(scoring_input, config=config)
+
+    # Final Status Update, with the dossier and tag the dialer and sales team read
+    return {
+        "lead_score": score_result["score"],
+        "status": "enriched",
+        "priority_tag": score_result["priority_tag"],
+        "ai_dossier": score_result["dossier"],
+    }
+
+
+def _dispatch_dial(lead_id: int, priority_tag: str):
+    # Speed-to-Lead Trigger: only HOT leads get a manager call (on the dialer queue)
+    if priority_tag == "HOT_LEAD":
+        dial_lead.delay(lead_id)
+
+
+def start_lead_processing(lead_id: int, use_cache: bool = True):
+    """
+    Queue the staged pipeline for a verified lead: enrich -> score, with the
+    score stage handing HOT leads to the dialer. Each stage runs on its own queue.
+    """
+    return chain(enrich_lead.s(lead_id, use_cache), score_lead.s()).apply_async()
+
 
 @celery_app.task
-def process_lead_enrichment(lead_id: int):
+def process_lead_enrichment(lead_id: int, use_cache: bool = True):
     """
-    Async Task:
-    1. Fetch Lead
-    2. Enrich Data (Mashvisor/Clay)
-    3. Calculate AI Score (Claude 4.5)
-    4. Update DB
-    5. Trigger Call if Hot Lead
+    Entry point kept for already-queued messages: hands the lead to the staged pipeline.
     """
+    start_lead_processing(lead_id, use_cache)
+
+
+@celery_app.task
+def enrich_lead(lead_id: int, use_cache: bool = True) -> Optional[dict]:
+    """
+    Stage 1 - Enrich Data (Mashvisor/Clay), store PropertyData + cheat sheet.
+    Returns what the scoring stage needs, or None to stop the chain.
+    A per-lead lock makes concurrent deliveries (verify retries) no-ops.
+    """
+    with redis_lock(f"lead:{lead_id}:enrich", settings.ENRICHMENT_LOCK_TTL_SECONDS) as acquired:
+        if not acquired:
+            print(f"Lead {lead_id} is already being enriched, skipping.")
+            return None
+        return _enrich_lead(lead_id, use_cache)
+
+
+def _enrich_lead(lead_id: int, use_cache: bool) -> Optional[dict]:
     db = SessionLocal()
     try:
         lead = db.query(Lead).filter(Lead.id == lead_id).first()
         if not lead:
             print(f"Lead {lead_id} not found.")
-            return
+            return None
+        
+        if lead.property_data is not None:
+            # Duplicate delivery or merged contact: never pay for enrichment twice
+            print(f"Lead {lead_id} already enriched, skipping.")
+            return None
 
         print(f"Starting enrichment for Lead {lead_id}...")
+        record_stage(lead_id, "enrich_started")
         
-        # 1. Enrichment (Deep Recon)
-        enrichment_data = enrich_lead_data(lead.email, lead.phone, lead.address)
-        
-        # Save Property Data
-        prop_data = enrichment_data["property_data"]
-        soc_data = enrichment_data["social_data"]
-        
-        # Ideally, we update a PropertyData model here. For the mock/MVP speed, 
-        # we might just dump important bits into meta_data or simple fields on Lead,
-        # BUT since we created the PropertyData model, let's try to populate it if we can access the DB session properly.
-        # NOTE: Celery worker DB session management is tricky. For this specific 'worker.py' standalone, 
-        # we are re-creating a session.
-        
-        from app.models.enrichment import PropertyData
-        
-        property_record = PropertyData(
-            lead_id=lead.id,
-            sqft=prop_data["sqft"],
-            lot_size=prop_data["lot_size"],
-            year_built=prop_data["year_built"],
-            estimated_value=prop_data["estimated_value"],
-            linkedin_url=soc_data["linkedin_url"],
-            job_title=soc_data["job_title"],
-            company_name=soc_data["company_name"]
+        # Deep Recon
+        enrichment_data = enrich_lead_data(
+            lead.email, lead.phone, lead.address, zip_code=lead.zip_code, use_cache=use_cache
         )
-        db.add(property_record)
+        if enrichment_data["missing_providers"]:
+            print(f"Lead {lead_id}: partial enrichment, missing {enrichment_data['missing_providers']}")
         
-        # Update Lead Metadata with Cheat Sheet
-        current_meta = lead.meta_data or {}
-        current_meta["sales_cheat_sheet"] = enrichment_data["sales_cheat_sheet"]
-        lead.meta_data = current_meta
+        _upsert_property_data(db, [_property_data_row(lead.id, enrichment_data)])
         
-        # 2. AI Scoring
-        # Combine base lead data + enriched data for scoring
-        scoring_input = {
-            "property_value": lead.property_value,
-            "household_income": lead.household_income,
+        lead.sales_cheat_sheet = enrichment_data["sales_cheat_sheet"]
+        
+        db.commit()
+        record_stage(lead_id, "enriched")
+        return {
+            "lead_id": lead_id,
             "social_quality_score": enrichment_data.get("social_quality_score"),
-            "job_title": enrichment_data.get("job_title")
+            "job_title": enrichment_data.get("job_title"),
         }
         
-        score_result = calculate_lead_score(scoring_input)
-        
-        lead.lead_score = score_result["score"]
-        
-        # Update metadata with dossier
-        lead.meta_data["ai_dossier"] = score_result["dossier"]
-        lead.meta_data["priority_tag"] = score_result["priority_tag"]
-        
-        # Final Status Update
-        lead.status = "enriched"
-        
-        # 3. Speed-to-Lead Trigger
-        if score_result["priority_tag"] == "HOT_LEAD":
-            print(f"HOT LEAD DETECTED ({lead.lead_score})! Initiating Speed-to-Lead protocol...")
-            lead_dict = {
-                "first_name": lead.first_name,
-                "last_name": lead.last_name,
-                "phone": lead.phone,
-                "zip_code": lead.zip_code
-            }
-            call_result = initiate_manager_call(lead_dict, lead.lead_score)
-            
-            lead.status = "contacted"
-            lead.meta_data["last_call_sid"] = call_result["call_sid"]
-            print(f"Call Completed. Recording: {call_result['recording_url']}")
-        
+    except Exception as e:
+        print(f"Error enriching lead {lead_id}: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+@celery_app.task
+def score_lead(enrichment: Optional[dict]):
+    """
+    Stage 2 - Calculate AI Score (Claude 4.5) and queue the dial for HOT leads.
+    """
+    if not enrichment:
+        return None
+
+    lead_id = enrichment["lead_id"]
+    record_stage(lead_id, "score_started")
+    db = SessionLocal()
+    try:
+        lead = db.query(Lead).filter(Lead.id == lead_id).first()
+        if not lead:
+            print(f"Lead {lead_id} not found.")
+            return None
+
+        config = org_scoring_config(db, lead.organization_id)
+        values = _score_values(lead, enrichment, config)
+        for key, value in values.items():
+            setattr(lead, key, value)
         db.commit()
-        print(f"Lead {lead_id} fully processed. Final Status: {lead.status}")
-        
+        record_stage(lead_id, "scored")
+
+        priority_tag = values["priority_tag"]
+        _dispatch_dial(lead_id, priority_tag)
+        print(f"Lead {lead_id} scored {values['lead_score']} ({priority_tag}).")
+        return {"lead_id": lead_id, "lead_score": values["lead_score"], "priority_tag": priority_tag}
+
     except Exception as e:
-        print(f"Error processing lead {lead_id}: {e}")
+        print(f"Error scoring lead {lead_id}: {e}")
         db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+@celery_app.task
+def dial_lead(lead_id: int):
+    """
+    Stage 3 - Speed-to-Lead: bridge the sales manager to the lead (Retell AI + Twilio).
+    """
+    claimed = False
+    db = SessionLocal()
+    try:
+        lead = db.query(Lead).filter(Lead.id == lead_id).first()
+        if not lead or lead.status != "enriched":
+            # Missing, or already dialed by an earlier delivery
+            return None
+        if not claim_once(f"lead:{lead_id}:dial", settings.LEAD_IDEMPOTENCY_TTL_SECONDS):
+            # Another delivery of this dial is in flight: never ring the manager twice
+            print(f"Lead {lead_id} dial already claimed, skipping.")
+            return None
+        claimed = True
+
+        record_stage(lead_id, "dial_started")
+        print(f"HOT LEAD DETECTED ({lead.lead_score})! Initiating Speed-to-Lead protocol...")
+        lead_dict = {
+            "first_name": lead.first_name,
+            "last_name": lead.last_name,
+            "phone": lead.phone,
+            "zip_code": lead.zip_code
+        }
+        call_result = initiate_manager_call(lead_dict, lead.lead_score)
+        claimed = False # The call went out; keep the key even if the write below fails
+
+        lead.last_call_sid = call_result["call_sid"]
+        lead.status = "contacted"
+        db.commit()
+        record_stage(lead_id, "called")
+        print(f"Call Completed. Recording: {call_result['recording_url']}")
+        return call_result["call_sid"]
+
+    except Exception as e:
+        print(f"Error dialing lead {lead_id}: {e}")
+        db.rollback()
+        if claimed:
+            release_claim(f"lead:{lead_id}:dial")
+        return None
+    finally:
+        db.close()
+
+
+async def _enrich_many(leads: List[Lead], use_cache: bool):
+    semaphore = asyncio.Semaphore(settings.ENRICHMENT_BATCH_CONCURRENCY)
+
+    async def enrich(lead):
+        async with semaphore:
+            return await enrich_lead_data_async(
+                lead.email, lead.phone, lead.address, zip_code=lead.zip_code, use_cache=use_cache
+            )
+
+    return await asyncio.gather(*(enrich(lead) for lead in leads))
+
+
+@celery_app.task
+def process_lead_enrichment_batch(lead_ids: Optional[List[int]] = None, limit: Optional[int] = None, use_cache: bool = True):
+    """
+    Batch Task: the enrich and score stages for many leads at once.
+    1. Claim the given leads (or up to `limit` verified ones) with
+       SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never share a lead
+    2. Enrich them concurrently on the shared event loop
+    3. Score each lead
+    4. Bulk upsert PropertyData and bulk update Lead in one transaction
+    5. Queue HOT leads on the dialer
+    When draining the backlog (no ids) and the batch was full, queue the next one
+    (unless every claimed lead failed, so a stuck head of the queue cannot spin).
+    """
+    limit = limit or settings.ENRICHMENT_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        query = select(Lead).where(~exists().where(PropertyData.lead_id == Lead.id))
+        if lead_ids:
+            query = query.where(Lead.id.in_(lead_ids))
+        else:
+            query = query.where(Lead.status == "verified").order_by(Lead.id).limit(limit)
+        leads = db.execute(query.with_for_update(skip_locked=True)).scalars().all()
+        if not leads:
+            return 0
+
+        print(f"Starting batch enrichment for {len(leads)} leads...")
+        claimed_ids = [lead.id for lead in leads]
+        record_stages(claimed_ids, "enrich_started")
+        enrichments = run_async(_enrich_many(leads, use_cache))
+        record_stages(claimed_ids, "enriched")
+        record_stages(claimed_ids, "score_started")
+
+        configs = {org_id: org_scoring_config(db, org_id) for org_id in {lead.organization_id for lead in leads}}
+        property_rows, lead_rows, scored_leads = [], [], []
+        for lead, enrichment_data in zip(leads, enrichments):
+            if enrichment_data["missing_providers"]:
+                print(f"Lead {lead.id}: partial enrichment, missing {enrichment_data['missing_providers']}")
+            try:
+                values = _score_values(lead, enrichment_data, configs[lead.organization_id])
+            except Exception as e:
+                # Same outcome as the staged pipeline: this lead is left untouched, the rest go through
+                print(f"Error processing lead {lead.id}: {e}")
+                continue
+            property_rows.append(_property_data_row(lead.id, enrichment_data))
+            lead_rows.append({"id": lead.id, "sales_cheat_sheet": enrichment_data["sales_cheat_sheet"], **values})
+            scored_leads.append(lead)
+
+        if lead_rows:
+            _upsert_property_data(db, property_rows)
+            apply_lead_stats(db, status_change_deltas(
+                (lead, row["status"]) for lead, row in zip(scored_leads, lead_rows)
+            ))
+            db.execute(update(Lead), lead_rows) # Bulk UPDATE by primary key
+            mark_leads_written(db, configs.keys())
+        db.commit()
+        record_stages([row["id"] for row in lead_rows], "scored")
+        print(f"Batch enrichment complete: {len(lead_rows)}/{len(leads)} leads.")
+
+        for row in lead_rows:
+            _dispatch_dial(row["id"], row["priority_tag"])
+
+        if not lead_ids and len(leads) == limit and lead_rows:
+            process_lead_enrichment_batch.delay(limit=limit, use_cache=use_cache)
+        return len(leads)
+
+    except Exception as e:
+        print(f"Error in batch enrichment: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def flush_lead_ingest_buffer():
+    """
+    Periodic Task: Drain the write-behind ingest buffer (Redis stream) into `leads`.
+    """
+    db = SessionLocal()
+    try:
+        totals = flush_ingest_buffer(db, LeadIngestBuffer())
+        if totals["inserted"] or totals["duplicates"] or totals["dead_lettered"]:
+            print(f"Ingest buffer flushed: {totals}")
+        return totals
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def rescore_leads(job_id: int):
+    """
+    Background Task: rescore an org's leads after its scoring weights changed.
+    Acked only when done, so a worker crash re-delivers it and the job resumes
+    from its last committed chunk.
+    """
+    result = run_rescore_job(job_id)
+    print(f"Rescore job {job_id}: {result}")
+    return result
+
+
+@celery_app.task
+def resume_stalled_rescore_jobs():
+    """
+    Periodic Task: re-queue rescore jobs whose worker died or whose message was lost.
+    """
+    db = SessionLocal()
+    try:
+        job_ids = stalled_rescore_job_ids(db)
     finally:
         db.close()
+    for job_id in job_ids:
+        rescore_leads.delay(job_id)
+    return job_ids
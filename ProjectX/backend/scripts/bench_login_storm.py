@@ -0,0 +1,139 @@
+"""
+Benchmark: latency of the other endpoints during a login storm.
+
+    python -m scripts.bench_login_storm --logins 200 --seconds 10
+
+Runs the API in-process against a throwaway SQLite database, floods
+/auth/login/access-token with `--logins` concurrent clients and meanwhile
+polls a trivial sync endpoint, served from the request threadpool like most
+of the API. Run once per mode and compare the probe p99:
+
+    --mode pool         bcrypt in the password hasher's process pool (current)
+    --mode threadpool   bcrypt inline in the request threadpool (previous behaviour)
+
+Login throttling is disabled so every attempt reaches bcrypt.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import pkgutil
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_login.db")
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.db.base import Base, SessionLocal, engine
+from app.main import app
+from app.models.organization import Organization
+from app.models.user import User
+
+for module in pkgutil.iter_modules(models.__path__):
+    importlib.import_module(f"app.models.{module.name}") # Every model, so the mappers configure
+
+EMAIL = "storm@example.com"
+PASSWORD = "correct horse battery staple"
+PROBE_PATH = "/bench/probe"
+
+
+@app.get(PROBE_PATH)
+def bench_probe():
+    return {"status": "ok"}
+
+
+class ThreadpoolHasher:
+    """The previous behaviour: bcrypt called synchronously in the request threadpool."""
+
+    saturated = False # No admission limit
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await run_in_threadpool(security.verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await run_in_threadpool(security.get_password_hash, password)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+async def storm(client: httpx.AsyncClient, deadline: float, statuses: dict):
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/v1/auth/login/access-token", data={"username": EMAIL, "password": PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 429:
+            await asyncio.sleep(0.05) # Rejected fast; back off briefly like a client would
+
+
+async def probe(client: httpx.AsyncClient, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(PROBE_PATH)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def run(logins: int, probes: int, seconds: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up: start the hasher's processes and the probe path
+        await client.post("/api/v1/auth/login/access-token", data={"username": EMAIL, "password": PASSWORD})
+        baseline = []
+        await probe(client, time.perf_counter() + 1, baseline)
+
+        statuses, latencies = {}, []
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(
+            *(storm(client, deadline, statuses) for _ in range(logins)),
+            *(probe(client, deadline, latencies) for _ in range(probes)),
+        )
+    return baseline, latencies, statuses, time.perf_counter() - started # In-flight logins can overrun the deadline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("pool", "threadpool"), default="pool")
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent login clients")
+    parser.add_argument("--probes", type=int, default=4, help="Concurrent probe pollers")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    settings.LOGIN_THROTTLE_ENABLED = False
+    if args.mode == "threadpool":
+        security.password_hasher = ThreadpoolHasher()
+
+    Base.metadata.create_all(engine, tables=[Organization.__table__, User.__table__])
+    db = SessionLocal()
+    if not db.query(User).filter(User.email == EMAIL).first():
+        db.add(User(email=EMAIL, hashed_password=security.get_password_hash(PASSWORD), organization_id=None))
+        db.commit()
+    db.close()
+
+    try:
+        baseline, latencies, statuses, elapsed = asyncio.run(run(args.logins, args.probes, args.seconds))
+    finally:
+        if args.mode == "pool":
+            security.password_hasher.shutdown()
+
+    ms = lambda seconds: f"{seconds * 1000:8.1f} ms"
+    print(f"mode={args.mode} logins={args.logins} seconds={elapsed:.1f}")
+    print(f"  probe idle      p50 {ms(percentile(baseline, 0.5))}  p99 {ms(percentile(baseline, 0.99))}")
+    print(
+        f"  probe in storm  p50 {ms(percentile(latencies, 0.5))}  p99 {ms(percentile(latencies, 0.99))}"
+        f"  max {ms(max(latencies, default=float('nan')))}  ({len(latencies)} requests)"
+    )
+    total = sum(statuses.values())
+    print(f"  logins: {total} responses, {statuses.get(200, 0) / elapsed:.1f}/s ok, by status {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
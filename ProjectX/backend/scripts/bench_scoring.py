@@ -0,0 +1,141 @@
+"""
+Benchmark: lead scoring paths on a synthetic book.
+
+    python -m scripts.bench_scoring --leads 300000
+
+Compares the original hard-coded scorer, the compiled org rules per lead
+(alone and inside `calculate_lead_score`) and vectorized `score_leads_batch`. Checks that they
+all produce identical scores and tags before timing them.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.scoring_service import DEFAULT_SCORING, calculate_lead_score, score_leads_batch, scoring_config
+
+ZIP_CODES = ["33101", "33139", "33140", "90210", None]
+JOB_TITLES = ["VP of Engineering", "Senior Marketing Manager", "Small Business Owner", "Surgeon", None]
+
+CUSTOM_RULES = {
+    "base": 40,
+    "max": 100,
+    "rules": [
+        {"field": "property_value", "tiers": [[750000, 30], [400000, 10]]},
+        {"field": "household_income", "tiers": [[120000, 15]]},
+        {"field": "zip_code", "in": ["33139", "33140"], "points": 10},
+        {"field": "job_title", "contains": ["Owner", "VP"], "points": 12},
+    ],
+    "priority": [[85, "HOT_LEAD"], [65, "WARM"]],
+}
+
+
+def make_book(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # Cluster values on and around the tier thresholds so boundaries get exercised
+    property_values = rng.choice([0, 500000, 500001, 1000000, 1000001], n) + rng.integers(0, 900000, n) * rng.integers(0, 2, n)
+    incomes = rng.choice([0, 80000, 80001, 150000, 150001], n) + rng.integers(0, 100000, n) * rng.integers(0, 2, n)
+    social_scores = rng.integers(0, 101, n)
+
+    property_values = property_values.astype(object)
+    property_values[rng.random(n) < 0.1] = None # Leads without a property value
+    incomes = incomes.astype(object)
+    incomes[rng.random(n) < 0.1] = None
+    zip_codes = [ZIP_CODES[i] for i in rng.integers(0, len(ZIP_CODES), n)]
+    job_titles = [JOB_TITLES[i] for i in rng.integers(0, len(JOB_TITLES), n)]
+    return property_values.tolist(), incomes.tolist(), social_scores.tolist(), zip_codes, job_titles
+
+
+def hard_coded_score(lead_data: dict):
+    """The scorer as it was before rules were configurable (the throughput baseline)."""
+    base_score = 50
+    prop_val = lead_data.get("property_value") or 0
+    if prop_val > 1000000:
+        base_score += 25
+    elif prop_val > 500000:
+        base_score += 15
+    income = lead_data.get("household_income") or 0
+    if income > 150000:
+        base_score += 20
+    elif income > 80000:
+        base_score += 10
+    social_score = lead_data.get("social_quality_score") or 0
+    if social_score > 80:
+        base_score += 10
+    final_score = min(base_score, 100)
+    priority = "LOW"
+    if final_score > 80:
+        priority = "HOT_LEAD"
+    elif final_score > 60:
+        priority = "WARM"
+    return final_score, priority
+
+
+def _lead_dicts(book):
+    return [
+        {"property_value": p, "household_income": i, "social_quality_score": s, "zip_code": z, "job_title": j}
+        for p, i, s, z, j in zip(*book)
+    ]
+
+
+def score_hard_coded(book, config=None):
+    results = [hard_coded_score(lead) for lead in _lead_dicts(book)]
+    return [r[0] for r in results], [r[1] for r in results]
+
+
+def score_one_by_one(book, config=DEFAULT_SCORING):
+    results = [calculate_lead_score(lead, config=config) for lead in _lead_dicts(book)]
+    return [r["score"] for r in results], [r["priority_tag"] for r in results]
+
+
+def score_compiled(book, config=DEFAULT_SCORING):
+    # The evaluator alone, without the dossier text calculate_lead_score also builds
+    results = [config.score(lead) for lead in _lead_dicts(book)]
+    return [r[0] for r in results], [r[1] for r in results]
+
+
+def score_batch(book, config=DEFAULT_SCORING):
+    property_values, incomes, social_scores, zip_codes, job_titles = book
+    return score_leads_batch(property_values, incomes, social_scores, config, zip_codes=zip_codes, job_titles=job_titles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--leads", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    book = make_book(args.leads)
+
+    assert score_one_by_one(book) == score_hard_coded(book), "default rules differ from the hard-coded scorer"
+    configs = {
+        "default": DEFAULT_SCORING,
+        "reweighted": scoring_config({"property_value": 20, "social_presence": 70, "urgency": 10}, 75),
+        "custom rules": scoring_config(rules=CUSTOM_RULES),
+    }
+    for label, config in configs.items():
+        scores, tags = score_one_by_one(book, config=config)
+        batch_scores, batch_tags = score_batch(book, config=config)
+        assert batch_scores.tolist() == scores, f"scores differ for {label}"
+        assert batch_tags.tolist() == tags, f"priority tags differ for {label}"
+
+    paths = (
+        ("hard-coded scorer (per lead)", score_hard_coded, DEFAULT_SCORING),
+        ("compiled rules (per lead)", score_compiled, DEFAULT_SCORING),
+        ("compiled custom rules (per lead)", score_compiled, configs["custom rules"]),
+        ("calculate_lead_score (per lead)", score_one_by_one, DEFAULT_SCORING),
+        ("score_leads_batch (NumPy)", score_batch, DEFAULT_SCORING),
+        ("score_leads_batch, custom rules", score_batch, configs["custom rules"]),
+    )
+    for name, fn, config in paths:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn(book, config)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"{name:36s} best of {args.repeat}: {best:8.3f}s  ({args.leads / best:,.0f} leads/s)")
+
+
+if __name__ == "__main__":
+    main()
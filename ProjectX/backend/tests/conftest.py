@@ -0,0 +1,93 @@
+"""
+Test fixtures: a throwaway SQLite database (or TEST_DATABASE_URL, e.g. a
+scratch Postgres database, to exercise the Postgres-only paths) and an
+in-process fake Redis.
+"""
+import importlib
+import os
+import pkgutil
+import tempfile
+
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.core import redis as app_redis
+from app.db.base import Base, SessionLocal, engine
+from app.main import app
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.user_service import access_token_for
+
+for module in pkgutil.iter_modules(models.__path__):
+    importlib.import_module(f"app.models.{module.name}") # Every model, so the mappers configure
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+def _reset_process_caches():
+    # Per-process caches outlive a test; ids are reused once the tables are recreated
+    from app.services import (
+        analytics_service, api_key_service, dedupe_service, lead_search_service, pipeline_service,
+        rescoring_service, user_service,
+    )
+    dedupe_service.contact_index.reset()
+    api_key_service._index.clear()
+    user_service._users.clear()
+    analytics_service._dashboard_cache.clear()
+    lead_search_service._fallback_indexes.clear()
+    pipeline_service._org_pipelines.clear()
+    rescoring_service._org_scorers.clear()
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(app_redis, "_client", client)
+    yield client
+    client.flushall()
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    _reset_process_caches()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def organization(db):
+    org = Organization(name="Acme Roofing")
+    db.add(org)
+    db.commit()
+    return org
+
+
+@pytest.fixture
+def user(db, organization):
+    user = User(email="owner@example.com", hashed_password="!", organization_id=organization.id)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {access_token_for(user)}"}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
@@ -0,0 +1,82 @@
+import pytest
+
+from app.core.config import settings
+from app.models.lead import Lead
+from app.models.organization import Organization
+from app.services import api_key_service
+from app.services.api_key_service import organization_for_api_key, rotate_api_key
+
+LEAD = {
+    "first_name": "Pat", "last_name": "Lee", "email": "pat@example.com", "phone": "555-010-2000",
+    "address": "1 Main St", "zip_code": "10001",
+}
+
+
+@pytest.fixture
+def superuser_headers(db, user, auth_headers):
+    user.is_superuser = True
+    db.commit()
+    return auth_headers
+
+
+def test_only_superusers_rotate_the_key(db, client, auth_headers):
+    assert client.post("/api/v1/settings/api-key", headers=auth_headers).status_code == 403
+
+
+def test_rotated_key_replaces_the_previous_one(db, client, superuser_headers, organization):
+    first = client.post("/api/v1/settings/api-key", headers=superuser_headers).json()["api_key"]
+    assert organization_for_api_key(db, first) == organization.id
+
+    second = client.post("/api/v1/settings/api-key", headers=superuser_headers).json()["api_key"]
+
+    assert organization_for_api_key(db, first) is None
+    assert organization_for_api_key(db, second) == organization.id
+
+
+def test_key_rotated_in_another_process_resolves(db, organization, monkeypatch):
+    monkeypatch.setattr(api_key_service._index, "check_seconds", 0)
+    old_key = rotate_api_key(db, organization.id)
+    assert organization_for_api_key(db, old_key) == organization.id
+
+    # Another process rotates: its commit and Redis bump, not this index's clear()
+    monkeypatch.setattr(api_key_service._index, "clear", lambda: None)
+    new_key = rotate_api_key(db, organization.id)
+
+    assert organization_for_api_key(db, new_key) == organization.id
+    assert organization_for_api_key(db, old_key) is None
+
+
+def test_api_key_decides_the_leads_organization(db, client, organization):
+    other = Organization(name="Other Org")
+    db.add(other)
+    db.commit()
+    api_key = rotate_api_key(db, other.id)
+
+    response = client.post(
+        "/api/v1/leads/ingest", json={**LEAD, "organization_id": organization.id}, headers={"X-API-Key": api_key}
+    )
+
+    assert response.status_code == 200
+    assert db.get(Lead, response.json()["id"]).organization_id == other.id
+
+
+def test_unknown_api_key_is_rejected(db, client):
+    response = client.post("/api/v1/leads/ingest", json=LEAD, headers={"X-API-Key": "mos_unknown"})
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("path", ["/api/v1/leads/ingest", "/api/v1/leads/ingest/buffered"])
+def test_unauthenticated_ingest_cannot_choose_the_organization(db, client, organization, path):
+    response = client.post(path, json={**LEAD, "organization_id": organization.id})
+
+    assert response.status_code == 401
+
+
+def test_unauthenticated_ingest_goes_to_the_public_form_organization(db, client, organization, monkeypatch):
+    monkeypatch.setattr(settings, "PUBLIC_FORM_ORGANIZATION_ID", organization.id)
+
+    response = client.post("/api/v1/leads/ingest", json=LEAD)
+
+    assert response.status_code == 200
+    assert db.get(Lead, response.json()["id"]).organization_id == organization.id
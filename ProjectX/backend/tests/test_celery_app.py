@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core.celery_app import DIALER_QUEUE, RESCORING_QUEUE, SCORING_QUEUE, celery_app
+
+
+def import_celery_app(worker_queues: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", "from app.core.celery_app import celery_app; print(celery_app.conf.worker_concurrency)"],
+        env={**os.environ, "WORKER_QUEUES": worker_queues},
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_worker_queues_size_the_pool():
+    result = import_celery_app("enrichment, scoring")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "20"
+
+
+def test_unknown_worker_queue_fails_with_the_known_names():
+    result = import_celery_app("enrichment,dialer-priority")
+    assert result.returncode != 0
+    assert "unknown queue(s) dialer-priority" in result.stderr
+    assert "known queues: main-queue, enrichment, scoring, dialer, rescoring" in result.stderr
+
+
+def test_dial_lead_runs_on_the_dialer_queue():
+    route = celery_app.amqp.router.route({}, "app.worker.dial_lead")
+    assert route["queue"].name == DIALER_QUEUE
+
+
+def test_rescores_run_off_the_live_scoring_queue():
+    route = celery_app.amqp.router.route({}, "app.worker.rescore_leads")
+    assert route["queue"].name == RESCORING_QUEUE != SCORING_QUEUE
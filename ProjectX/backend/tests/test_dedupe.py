@@ -0,0 +1,87 @@
+import pytest
+
+from app.core.normalize import normalize_email, normalize_phone
+from app.db.base import SessionLocal
+from app.models.lead import Lead
+from app.schemas.lead import LeadCreate
+from app.services.api_key_service import rotate_api_key
+from app.services.dedupe_service import contact_index, find_conflicting_lead, find_duplicate_lead
+from app.services.ingest_service import commit_leads_chunk
+
+CONTACT = {
+    "first_name": "Ann",
+    "last_name": "Lee",
+    "email": "Ann.Lee@Example.com",
+    "phone": "(415) 555-0101",
+    "address": "1 Main St",
+    "zip_code": "94107",
+}
+
+
+def insert_from_another_process(organization_id: int, **fields) -> int:
+    """A lead written behind this process's back: its Bloom filter never hears of it."""
+    with SessionLocal() as other:
+        lead = Lead(organization_id=organization_id, status="pending", **{**CONTACT, **fields})
+        other.add(lead)
+        other.commit()
+        return lead.id
+
+
+@pytest.fixture
+def warmed_index(db, organization):
+    # This process has already looked at the org, so its filter is loaded (and empty)
+    contact_index.might_exist(db, organization.id, "nobody@example.com", None)
+
+
+def test_conflict_lookup_skips_the_bloom_filter(db, organization, warmed_index):
+    lead_id = insert_from_another_process(organization.id)
+    email, phone = normalize_email(CONTACT["email"]), normalize_phone(CONTACT["phone"])
+
+    assert find_duplicate_lead(db, organization.id, email, phone) is None
+    assert find_conflicting_lead(db, organization.id, email, phone).id == lead_id
+    # The filter learned the contact, so the next cheap lookup finds it
+    assert find_duplicate_lead(db, organization.id, email, phone).id == lead_id
+
+
+def test_chunk_resolves_contacts_inserted_elsewhere(db, organization, warmed_index):
+    lead_id = insert_from_another_process(organization.id)
+    leads_in = [
+        LeadCreate(organization_id=organization.id, **CONTACT),
+        LeadCreate(organization_id=organization.id, **{**CONTACT, "email": "bob@example.com", "phone": "4155550199"}),
+    ]
+
+    lead_ids, created_ids, errors = commit_leads_chunk(db, leads_in)
+
+    assert errors == {}
+    assert lead_ids[0] == lead_id
+    assert created_ids == [lead_ids[1]]
+    assert db.query(Lead).count() == 2
+
+
+def test_ingest_merges_into_lead_created_by_another_process(db, organization, warmed_index, client):
+    lead_id = insert_from_another_process(organization.id, address="")
+
+    response = client.post("/api/v1/leads/ingest", json=CONTACT)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == lead_id
+    assert response.json()["address"] == CONTACT["address"] # Blank filled in from the repeat
+    assert db.query(Lead).count() == 1
+
+
+def test_batch_ingest_resolves_contacts_inserted_elsewhere(db, organization, warmed_index, client):
+    api_key = rotate_api_key(db, organization.id)
+    lead_id = insert_from_another_process(organization.id)
+    other = {**CONTACT, "email": "bob@example.com", "phone": "4155550199"}
+
+    response = client.post(
+        "/api/v1/leads/ingest/batch",
+        json={"leads": [other, CONTACT, CONTACT], "enrich": False},
+        headers={"X-API-Key": api_key},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ids"][1:] == [lead_id, lead_id]
+    assert body["duplicates"] == 2
+    assert db.query(Lead).count() == 2
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import enrichment_cache
+from app.services.enrichment_cache import TieredCache
+
+
+@pytest.fixture
+def cache(redis_client):
+    return TieredCache("test", local_ttl=60, redis_ttl=60, local_maxsize=10, client=redis_client)
+
+
+def test_async_lookups_fall_through_to_redis_and_promote(cache, redis_client):
+    asyncio.run(cache.set_async("k", {"sqft": 2000}))
+    cache.local.clear() # As seen from another process
+
+    assert asyncio.run(cache.get_async("k")) == {"sqft": 2000}
+    assert asyncio.run(cache.get_async("k")) == {"sqft": 2000}
+    assert asyncio.run(cache.get_async("missing")) is None
+
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["redis_hits"], stats["redis_misses"]) == (1, 1, 1)
+
+
+def test_report_stats_adds_only_new_counts(cache, redis_client):
+    cache.get("a")
+    cache.report_stats()
+    cache.report_stats() # Nothing new
+    cache.get("b")
+    cache.report_stats()
+
+    assert redis_client.hgetall("metrics:cache:test") == {"local_misses": "2", "redis_misses": "2"}
+
+
+def test_metrics_endpoint_exposes_cache_counters(monkeypatch):
+    monkeypatch.setattr(settings, "ENRICHMENT_CACHE_STATS_INTERVAL_SECONDS", 0)
+    enrichment_cache.property_cache.get("1 main st 94107")
+    asyncio.run(enrichment_cache.report_enrichment_cache_stats())
+
+    body = TestClient(app).get("/metrics").text
+
+    assert 'enrichment_cache_lookups_total{provider="property_data",tier="redis",result="miss"}' in body
+    assert 'enrichment_cache_redis_errors_total{provider="social_data"} 0' in body
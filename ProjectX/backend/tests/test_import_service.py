@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.models.lead import Lead
+from app.services.import_service import import_leads_stream
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "LEAD_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "LEAD_COPY_THRESHOLD", 1) # COPY on Postgres, as for real 1000-row chunks
+
+
+def run_import(db, body: str, fmt: str = "csv", **kwargs) -> dict:
+    async def chunks():
+        for start in range(0, len(body), 7): # Split lines across reads
+            yield body[start:start + 7].encode()
+
+    return asyncio.run(import_leads_stream(db, chunks(), fmt, enrich=False, **kwargs))
+
+
+def csv_rows(*rows) -> str:
+    header = "organization_id,first_name,last_name,email,phone,address,zip_code"
+    return "\n".join([header, *(",".join(map(str, row)) for row in rows)]) + "\n"
+
+
+def test_rejected_row_does_not_roll_back_its_chunk(db, organization):
+    body = csv_rows(
+        (organization.id, "Ann", "Lee", "ann@example.com", "4155550101", "1 Main St", "94107"),
+        (organization.id + 1000, "Ghost", "Lee", "ghost@example.com", "4155550102", "2 Main St", "94107"),
+        (organization.id, "Bob", "Lee", "bob@example.com", "4155550103", "3 Main St", "94107"),
+    )
+
+    result = run_import(db, body)
+
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["row"] == 3 # The header is line 1
+    assert result["chunks_committed"] == 2
+    assert sorted(db.query(Lead.first_name)) == [("Ann",), ("Bob",)]
+
+
+def test_invalid_rows_are_reported_and_skipped(db, organization):
+    body = csv_rows(
+        (organization.id, "Ann", "Lee", "not-an-email", "4155550101", "1 Main St", "94107"),
+        (organization.id, "Bob", "Lee", "bob@example.com", "4155550103", "3 Main St", "94107"),
+    )
+
+    result = run_import(db, body)
+
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [2]
+
+
+def test_repeated_contacts_resolve_to_one_lead(db, organization):
+    body = "\n".join(
+        f'{{"first_name": "Ann", "last_name": "Lee", "email": "{email}", "phone": "4155550101", '
+        f'"address": "1 Main St", "zip_code": "94107"}}'
+        for email in ("ann@example.com", "ANN@example.com", "ann@example.com")
+    )
+
+    result = run_import(db, body, fmt="ndjson", organization_id=organization.id)
+
+    assert result["imported"] == 1
+    assert result["duplicates"] == 2
+    assert db.query(Lead).count() == 1
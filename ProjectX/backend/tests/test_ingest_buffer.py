@@ -0,0 +1,93 @@
+import pytest
+
+from app.core.config import settings
+from app.models.lead import Lead
+from app.schemas.lead import LeadCreate
+from app.services.ingest_buffer import LeadIngestBuffer, flush_ingest_buffer
+
+
+def make_lead(organization_id: int, name: str, **fields) -> LeadCreate:
+    return LeadCreate(**{
+        "organization_id": organization_id,
+        "first_name": name,
+        "last_name": "Smith",
+        "email": f"{name.lower()}@example.com",
+        "phone": f"+1 415 555 {sum(map(ord, name)) % 10000:04d}",
+        "address": "1 Main St",
+        "zip_code": "94107",
+        **fields,
+    })
+
+
+@pytest.fixture
+def buffer(redis_client, monkeypatch):
+    # COPY on Postgres (TEST_DATABASE_URL) whatever the batch size, like a real 500-entry flush
+    monkeypatch.setattr(settings, "LEAD_COPY_THRESHOLD", 1)
+    return LeadIngestBuffer(client=redis_client, consumer="test-flusher")
+
+
+def test_flush_acks_batch_and_dead_letters_rejected_rows(db, organization, redis_client, buffer):
+    buffer.append(make_lead(organization.id, "Ann"))
+    ghost_id = buffer.append(make_lead(organization.id + 1000, "Ghost")) # No such organization
+    buffer.append(make_lead(organization.id, "Bob"))
+
+    totals = flush_ingest_buffer(db, buffer)
+
+    assert totals == {"batches": 1, "inserted": 2, "duplicates": 0, "dead_lettered": 1}
+    assert redis_client.xlen(settings.LEAD_INGEST_STREAM) == 0
+    assert redis_client.xpending(settings.LEAD_INGEST_STREAM, settings.LEAD_INGEST_GROUP)["pending"] == 0
+    [(_, dead)] = redis_client.xrange(settings.LEAD_INGEST_DEAD_LETTER_STREAM)
+    assert dead["ingest_id"] == ghost_id
+    assert dead["error"].startswith("Database error")
+    assert sorted(db.query(Lead.first_name)) == [("Ann",), ("Bob",)]
+
+
+def test_flush_records_lead_ids_for_ingest_ids(db, organization, buffer):
+    ingest_id = buffer.append(make_lead(organization.id, "Ann"))
+
+    flush_ingest_buffer(db, buffer)
+
+    lead = db.query(Lead).one()
+    assert buffer.get_result(ingest_id) == lead.id
+    assert not buffer.is_pending(ingest_id)
+
+
+def test_flush_dead_letters_invalid_payloads(db, organization, redis_client, buffer):
+    redis_client.xadd(settings.LEAD_INGEST_STREAM, {"lead": "{not json", "source": "web_form"})
+
+    totals = flush_ingest_buffer(db, buffer)
+
+    assert totals["dead_lettered"] == 1
+    assert redis_client.xlen(settings.LEAD_INGEST_STREAM) == 0
+    [(_, dead)] = redis_client.xrange(settings.LEAD_INGEST_DEAD_LETTER_STREAM)
+    assert dead["error"].startswith("Invalid payload")
+
+
+def test_flush_resolves_contacts_written_by_other_processes(db, organization, redis_client, buffer):
+    from app.db.base import SessionLocal
+    from app.services.dedupe_service import contact_index
+
+    contact_index.might_exist(db, organization.id, "nobody@example.com", None) # Filter warmed, then...
+    with SessionLocal() as api_worker: # ...an API process stores Ann
+        ann = Lead(**make_lead(organization.id, "Ann").model_dump())
+        api_worker.add(ann)
+        api_worker.commit()
+        ann_id = ann.id
+    ingest_id = buffer.append(make_lead(organization.id, "Ann"))
+    buffer.append(make_lead(organization.id, "Bob"))
+
+    totals = flush_ingest_buffer(db, buffer)
+
+    assert totals == {"batches": 1, "inserted": 1, "duplicates": 1, "dead_lettered": 0}
+    assert buffer.get_result(ingest_id) == ann_id
+    assert db.query(Lead).count() == 2
+    assert redis_client.xpending(settings.LEAD_INGEST_STREAM, settings.LEAD_INGEST_GROUP)["pending"] == 0
+
+
+def test_buffer_stats_require_a_signed_in_user(db, client, auth_headers, buffer):
+    assert client.get("/api/v1/leads/ingest/buffered/stats").status_code == 401
+
+    response = client.get("/api/v1/leads/ingest/buffered/stats", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["dead_letters"] == 0
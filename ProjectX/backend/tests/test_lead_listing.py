@@ -0,0 +1,52 @@
+from app.models.lead import Lead
+from app.services.pipeline_service import org_pipelines
+
+
+def _add_leads(db, organization_id, count, **values):
+    # One commit per lead, so created_at comes from the database default as in production
+    ids = []
+    for i in range(count):
+        lead = Lead(organization_id=organization_id, first_name=f"Lead {i}", **values)
+        db.add(lead)
+        db.commit()
+        ids.append(lead.id)
+    return ids
+
+
+def _pages(client, url, headers, items_key):
+    pages, params = [], {"limit": 2}
+    while True:
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        pages.append([item["id"] for item in body[items_key]])
+        if not body["next_cursor"]:
+            return pages
+        params["cursor"] = body["next_cursor"]
+        assert len(pages) <= 10, "cursor does not advance"
+
+
+def test_listing_pages_through_every_lead_once(db, client, auth_headers, organization):
+    lead_ids = _add_leads(db, organization.id, 5)
+
+    pages = _pages(client, "/api/v1/leads/", auth_headers, "items")
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [lead_id for page in pages for lead_id in page] == lead_ids[::-1]
+
+
+def test_listing_rejects_a_bad_cursor(db, client, auth_headers):
+    response = client.get("/api/v1/leads/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_board_column_pages_through_every_lead_once(db, client, auth_headers, organization):
+    [pipeline] = org_pipelines(db, organization.id)
+    stage_id = pipeline["stages"][0]["id"]
+    lead_ids = _add_leads(db, organization.id, 5, pipeline_id=pipeline["id"], stage_id=stage_id, lead_score=10)
+
+    pages = _pages(client, f"/api/v1/pipeline/stages/{stage_id}/leads", auth_headers, "leads")
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [lead_id for page in pages for lead_id in page] == lead_ids[::-1]
@@ -0,0 +1,44 @@
+import fakeredis
+import pytest
+
+from app.core import redis as app_redis
+from app.models.lead import Lead
+
+
+def _search(client, headers, q):
+    response = client.get("/api/v1/leads/search", params={"q": q}, headers=headers)
+    assert response.status_code == 200
+    return sorted(item["first_name"] for item in response.json()["items"])
+
+
+@pytest.fixture
+def sqlite_only(db):
+    if db.get_bind().dialect.name != "sqlite":
+        pytest.skip("Postgres searches its indexes, not the in-process fallback")
+
+
+def test_fallback_sees_writes_made_while_redis_is_down(db, client, auth_headers, organization, sqlite_only, monkeypatch):
+    db.add(Lead(organization_id=organization.id, first_name="Alice"))
+    db.commit()
+    assert _search(client, auth_headers, "alic") == ["Alice"]
+
+    server = fakeredis.FakeServer()
+    server.connected = False
+    monkeypatch.setattr(app_redis, "_client", fakeredis.FakeRedis(server=server))
+    added = Lead(organization_id=organization.id, first_name="Alicia")
+    db.add(added)
+    db.commit()
+    assert _search(client, auth_headers, "alic") == ["Alice", "Alicia"]
+
+    added.first_name = "Bob"
+    db.commit()
+    assert _search(client, auth_headers, "alic") == ["Alice"]
+
+
+def test_short_query_matches_word_prefixes_only(db, client, auth_headers, organization):
+    db.add_all([
+        Lead(organization_id=organization.id, first_name=name) for name in ("Al", "Alma", "Kalani")
+    ])
+    db.commit()
+
+    assert _search(client, auth_headers, "al") == ["Al", "Alma"]
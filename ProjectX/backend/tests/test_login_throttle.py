@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+
+PROXY = "10.0.0.5"
+
+
+@pytest.fixture
+def behind_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_IPS", ["10.0.0.0/24"])
+    monkeypatch.setattr(settings, "LOGIN_IP_MAX_ATTEMPTS", 2)
+    return TestClient(app, client=(PROXY, 50000))
+
+
+def _login(client, forwarded_for=None):
+    headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+    # Unknown accounts are counted against the IP without a password check
+    return client.post(
+        "/api/v1/auth/login/access-token", data={"username": "nobody@example.com", "password": "x"}, headers=headers
+    ).status_code
+
+
+def test_clients_behind_a_trusted_proxy_are_limited_separately(db, behind_proxy):
+    assert [_login(behind_proxy, "203.0.113.1") for _ in range(3)] == [400, 400, 429]
+
+    assert _login(behind_proxy, f"203.0.113.2, {PROXY}") == 400
+
+
+def test_forwarded_for_is_ignored_from_untrusted_clients(db, behind_proxy, monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_IPS", [])
+
+    assert [_login(behind_proxy, f"203.0.113.{i}") for i in range(3)] == [400, 400, 429]
+
+
+def test_spoofed_hops_left_of_the_proxy_are_ignored(db, behind_proxy):
+    assert [_login(behind_proxy, f"198.51.100.{i}, 203.0.113.1") for i in range(3)] == [400, 400, 429]
+
+
+def test_ip_limit_can_be_turned_off(db, behind_proxy, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_IP_MAX_ATTEMPTS", 0)
+
+    assert [_login(behind_proxy) for _ in range(3)] == [400, 400, 400]
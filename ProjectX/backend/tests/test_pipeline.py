@@ -0,0 +1,78 @@
+import pytest
+
+from app.models.lead import Lead
+from app.models.organization import Organization
+from app.models.pipeline import PipelineStage
+from app.services.pipeline_service import org_pipelines
+
+
+@pytest.fixture
+def stage_ids(db, organization):
+    [pipeline] = org_pipelines(db, organization.id)
+    return [stage["id"] for stage in sorted(pipeline["stages"], key=lambda stage: stage["order"])]
+
+
+@pytest.fixture
+def pipeline_id(db, organization, stage_ids):
+    return org_pipelines(db, organization.id)[0]["id"]
+
+
+@pytest.fixture
+def lead_ids(db, organization):
+    leads = [Lead(organization_id=organization.id, first_name=f"Lead {i}", status="verified") for i in range(3)]
+    db.add_all(leads)
+    db.commit()
+    return [lead.id for lead in leads]
+
+
+def test_bulk_move_moves_leads_once(db, client, auth_headers, stage_ids, lead_ids):
+    body = {"lead_ids": lead_ids, "stage_id": stage_ids[1]}
+
+    first = client.post("/api/v1/pipeline/leads/move", json=body, headers=auth_headers)
+    again = client.post("/api/v1/pipeline/leads/move", json=body, headers=auth_headers)
+
+    assert first.status_code == 200 and first.json()["moved"] == lead_ids
+    assert again.status_code == 200 and again.json()["unchanged"] == lead_ids
+
+
+def test_bulk_move_to_another_orgs_stage_is_not_found(db, client, auth_headers, lead_ids):
+    other = Organization(name="Other Org")
+    db.add(other)
+    db.commit()
+    [other_pipeline] = org_pipelines(db, other.id)
+
+    for stage_id in (other_pipeline["stages"][0]["id"], 10_000):
+        response = client.post(
+            "/api/v1/pipeline/leads/move", json={"lead_ids": lead_ids, "stage_id": stage_id}, headers=auth_headers
+        )
+        assert response.status_code == 404
+    assert db.query(Lead).filter(Lead.stage_id.isnot(None)).count() == 0
+
+
+def test_reorder_requires_every_stage(db, client, auth_headers, pipeline_id, stage_ids):
+    url = f"/api/v1/pipeline/{pipeline_id}/stages/order"
+
+    partial = client.put(url, json={"stage_ids": stage_ids[:2][::-1]}, headers=auth_headers)
+    repeated = client.put(url, json={"stage_ids": stage_ids[:-1] + stage_ids[:1]}, headers=auth_headers)
+    full = client.put(url, json={"stage_ids": stage_ids[::-1]}, headers=auth_headers)
+
+    assert partial.status_code == 400
+    assert repeated.status_code == 400
+    assert full.status_code == 200
+    assert [stage["id"] for stage in full.json()] == stage_ids[::-1]
+    orders = [order for (order,) in db.query(PipelineStage.order).filter(PipelineStage.pipeline_id == pipeline_id)]
+    assert sorted(orders) == list(range(len(stage_ids)))
+
+
+def test_reorder_another_orgs_pipeline_is_not_found(db, client, auth_headers, stage_ids):
+    other = Organization(name="Other Org")
+    db.add(other)
+    db.commit()
+    [other_pipeline] = org_pipelines(db, other.id)
+    other_stage_ids = [stage["id"] for stage in other_pipeline["stages"]]
+
+    response = client.put(
+        f"/api/v1/pipeline/{other_pipeline['id']}/stages/order", json={"stage_ids": other_stage_ids}, headers=auth_headers
+    )
+
+    assert response.status_code == 404
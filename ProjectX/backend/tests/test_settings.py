@@ -0,0 +1,18 @@
+import pytest
+
+from app.models.scoring import RescoreJob
+
+
+@pytest.mark.parametrize("weights", [
+    {"property_value": -0.6, "social_presence": 0.3, "urgency": 0.1},
+    {"property_value": 0, "social_presence": 0, "urgency": 0},
+    {"property_value": 0, "social_presence": 0, "urgency": 0, "unknown": 1},
+])
+def test_weights_that_would_invert_or_flatten_scores_are_rejected(db, client, auth_headers, weights):
+    version = client.get("/api/v1/settings/", headers=auth_headers).json()["scoring_version"]
+
+    response = client.put("/api/v1/settings/", json={"lead_score_weights": weights}, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert client.get("/api/v1/settings/", headers=auth_headers).json()["scoring_version"] == version
+    assert db.query(RescoreJob).count() == 0
@@ -0,0 +1,20 @@
+from sqlalchemy import update
+
+from app.models.user import User
+
+
+def test_tokens_revoked_in_another_process_are_rejected(db, client, auth_headers, user, redis_client):
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200 # Now cached here
+
+    # What revoke_tokens does in another API process: this process's cache is untouched
+    db.execute(update(User).where(User.id == user.id).values(token_version=User.token_version + 1))
+    db.commit()
+    redis_client.incr(f"users:generation:{user.id}")
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 403
+
+
+def test_logout_all_rejects_the_token(db, client, auth_headers):
+    assert client.post("/api/v1/auth/logout-all", headers=auth_headers).status_code == 204
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 403
@@ -36,7 +36,7 @@ export function SmartLeadForm() {
       const response = await fetch("http://localhost:8000/api/v1/leads/ingest", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ ...data, organization_id: 1, phone: data.phone }), // Ensure proper formatting in prod
+        body: JSON.stringify({ ...data, phone: data.phone }), // Ensure proper formatting in prod
       });
 
       if (!response.ok) {